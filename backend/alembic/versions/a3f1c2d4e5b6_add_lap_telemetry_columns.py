@@ -0,0 +1,26 @@
+"""add_lap_telemetry_columns
+
+Revision ID: a3f1c2d4e5b6
+Revises: d13957478150
+Create Date: 2026-10-17 09:12:40.518230
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f1c2d4e5b6"
+down_revision: Union[str, None] = "d13957478150"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("laps", sa.Column("telemetry_columns", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("laps", "telemetry_columns")
@@ -0,0 +1,64 @@
+"""query_path_indexes
+
+Revision ID: a9c3e5f1d7b4
+Revises: f2b6d8a3c1e5
+Create Date: 2026-10-17 18:41:37.905214
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9c3e5f1d7b4"
+down_revision: Union[str, None] = "f2b6d8a3c1e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns
+BTREE_INDEXES = [
+    ("ix_laps_team_recorded_time", "laps", ["team_id", sa.text("recorded_at DESC"), "lap_time_ms"]),
+    ("ix_sessions_team_date", "sessions", ["team_id", "session_date"]),
+    ("ix_sessions_team_driver_date", "sessions", ["team_id", "driver_id", "session_date"]),
+    ("ix_sessions_team_track_date", "sessions", ["team_id", "track_id", "session_date"]),
+    ("ix_sessions_team_kart_date", "sessions", ["team_id", "kart_id", "session_date"]),
+]
+
+# name, column of laps (PostgreSQL only)
+TRIGRAM_INDEXES = [
+    ("ix_laps_driver_name_trgm", "driver_name"),
+    ("ix_laps_track_name_trgm", "track_name"),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        for name, table, columns in BTREE_INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built without blocking uploads on large tables; CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in BTREE_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name,
+                "laps",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        for name, _ in TRIGRAM_INDEXES:
+            op.drop_index(name, table_name="laps")
+    for name, table, _ in reversed(BTREE_INDEXES):
+        op.drop_index(name, table_name=table)
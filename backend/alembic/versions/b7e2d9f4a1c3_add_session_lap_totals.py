@@ -0,0 +1,52 @@
+"""add_session_lap_totals
+
+Revision ID: b7e2d9f4a1c3
+Revises: a3f1c2d4e5b6
+Create Date: 2026-10-17 14:05:12.731904
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d9f4a1c3"
+down_revision: Union[str, None] = "a3f1c2d4e5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("valid_lap_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("sessions", sa.Column("valid_lap_time_sum_ms", sa.BigInteger(), server_default="0", nullable=False))
+    op.create_index("ix_laps_session_valid_time", "laps", ["session_id", "valid", "lap_time_ms"], unique=False)
+
+    # Backfill the running totals (and the stats derived from them) from existing laps
+    op.execute(
+        """
+        UPDATE sessions SET
+            total_laps = (SELECT COUNT(*) FROM laps WHERE laps.session_id = sessions.id),
+            valid_lap_count = (SELECT COUNT(*) FROM laps WHERE laps.session_id = sessions.id AND laps.valid),
+            valid_lap_time_sum_ms = (
+                SELECT COALESCE(SUM(lap_time_ms), 0) FROM laps WHERE laps.session_id = sessions.id AND laps.valid
+            ),
+            best_lap_time_ms = (
+                SELECT MIN(lap_time_ms) FROM laps WHERE laps.session_id = sessions.id AND laps.valid
+            )
+        WHERE EXISTS (SELECT 1 FROM laps WHERE laps.session_id = sessions.id)
+        """
+    )
+    op.execute(
+        """
+        UPDATE sessions SET average_lap_time_ms = valid_lap_time_sum_ms / valid_lap_count
+        WHERE valid_lap_count > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_laps_session_valid_time", table_name="laps")
+    op.drop_column("sessions", "valid_lap_time_sum_ms")
+    op.drop_column("sessions", "valid_lap_count")
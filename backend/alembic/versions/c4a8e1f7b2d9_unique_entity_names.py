@@ -0,0 +1,72 @@
+"""unique_entity_names
+
+Revision ID: c4a8e1f7b2d9
+Revises: b7e2d9f4a1c3
+Create Date: 2026-10-17 16:22:48.115307
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a8e1f7b2d9"
+down_revision: Union[str, None] = "b7e2d9f4a1c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table, natural key columns, (referencing table, column)
+ENTITIES = [
+    ("drivers", ["team_id", "name"], [("laps", "driver_id"), ("sessions", "driver_id")]),
+    ("tracks", ["name"], [("laps", "track_id"), ("sessions", "track_id")]),
+]
+
+
+def _dedupe(table: str, key: list[str], references: list[tuple[str, str]]) -> None:
+    """Point references at the oldest row of each duplicate group, then delete the others"""
+    same_key = " AND ".join(f"keep.{column} = dup.{column}" for column in key)
+    for ref_table, ref_column in references:
+        op.execute(
+            f"""
+            UPDATE {ref_table} SET {ref_column} = (
+                SELECT MIN(keep.id) FROM {table} keep JOIN {table} dup ON {same_key}
+                WHERE dup.id = {ref_table}.{ref_column}
+            )
+            WHERE {ref_column} IN (
+                SELECT dup.id FROM {table} dup JOIN {table} keep ON {same_key} WHERE keep.id < dup.id
+            )
+            """
+        )
+    op.execute(
+        f"""
+        DELETE FROM {table} WHERE id IN (
+            SELECT dup.id FROM {table} dup JOIN {table} keep ON {same_key} WHERE keep.id < dup.id
+        )
+        """
+    )
+
+
+def upgrade() -> None:
+    for table, key, references in ENTITIES:
+        _dedupe(table, key, references)
+        op.create_unique_constraint(f"uq_{table}_{'_'.join(key)}", table, key)
+
+    # Teams may own several karts of one brand, so karts are unique only by the car name imports created them for.
+    # The kart imports used to pick for a brand (the oldest) keeps serving it; no kart is merged or deleted.
+    op.add_column("karts", sa.Column("import_name", sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE karts SET import_name = chassis_brand
+        WHERE id IN (SELECT MIN(id) FROM karts GROUP BY team_id, chassis_brand)
+        """
+    )
+    op.create_index("uq_karts_team_id_import_name", "karts", ["team_id", "import_name"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_karts_team_id_import_name", table_name="karts")
+    op.drop_column("karts", "import_name")
+    for table, key, _ in reversed(ENTITIES):
+        op.drop_constraint(f"uq_{table}_{'_'.join(key)}", table, type_="unique")
@@ -0,0 +1,43 @@
+"""lap_list_filter_indexes
+
+Revision ID: d5f7b9a2c4e6
+Revises: a9c3e5f1d7b4
+Create Date: 2026-10-17 19:26:03.518470
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f7b9a2c4e6"
+down_revision: Union[str, None] = "a9c3e5f1d7b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, columns of laps
+INDEXES = [
+    ("ix_laps_team_lap_time", ["team_id", "lap_time_ms", "id"]),
+    ("ix_laps_session_lap_number", ["session_id", "lap_number", "id"]),
+    ("ix_laps_driver_recorded", ["driver_id", sa.text("recorded_at DESC")]),
+    ("ix_laps_kart_recorded", ["kart_id", sa.text("recorded_at DESC")]),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        for name, columns in INDEXES:
+            op.create_index(name, "laps", columns)
+        return
+
+    # Built without blocking uploads on large tables; CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, "laps", columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="laps")
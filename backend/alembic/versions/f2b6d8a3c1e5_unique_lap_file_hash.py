@@ -0,0 +1,33 @@
+"""unique_lap_file_hash
+
+Revision ID: f2b6d8a3c1e5
+Revises: c4a8e1f7b2d9
+Create Date: 2026-10-17 18:05:12.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b6d8a3c1e5"
+down_revision: Union[str, None] = "c4a8e1f7b2d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Laps imported twice by racing uploads keep their data; only the oldest keeps the hash
+    op.execute(
+        """
+        UPDATE laps SET file_hash = NULL
+        WHERE file_hash IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM laps WHERE file_hash IS NOT NULL GROUP BY team_id, file_hash
+        )
+        """
+    )
+    op.create_index("uq_laps_team_id_file_hash", "laps", ["team_id", "file_hash"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_laps_team_id_file_hash", table_name="laps")
@@ -9,6 +9,7 @@ from app.core.config import settings
 from app.models.team import Team
 from app.models.user import User
 from app.schemas.user import Token, UserCreate, UserLogin, UserResponse
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -40,6 +41,8 @@ def register(user_in: UserCreate, db: Session = Depends(deps.get_db)):
     db.add(user)
     db.commit()
     db.refresh(user)
+    # A previous user of this email may still be cached
+    principal_cache.invalidate([str(user.email)])
     return user
 
 
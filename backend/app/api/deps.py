@@ -1,14 +1,19 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, SessionLocal
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services.principal_cache import principal_cache, principal_fields, principal_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -21,7 +26,27 @@ def get_db() -> Generator:
         db.close()
 
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def commit_unique(db: Session, detail: str) -> None:
+    """Commit, turning a unique constraint violation into 409 Conflict"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail) from None
+
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> User:
+    """
+    User of the request's token.
+
+    Served from the principal cache as a detached User when possible; the
+    users table is only queried on a cache miss.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,7 +61,16 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
     except JWTError:
         raise credentials_exception from None
 
-    user = db.query(User).filter(User.email == token_data.email).first()
+    subject = str(token_data.email)
+    fields = principal_cache.get_local(subject)
+    if fields is None:
+        # Redis is reached from a worker thread, off the event loop
+        fields = await run_in_threadpool(principal_cache.get, subject)
+    if fields is not None:
+        return principal_user(fields)
+
+    user = await db.scalar(select(User).where(User.email == subject))
     if user is None:
         raise credentials_exception
+    await run_in_threadpool(principal_cache.put, subject, principal_fields(user))
     return user
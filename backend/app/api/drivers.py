@@ -1,9 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.pagination import DEFAULT_PAGE_SIZE, PageLimit, SortKey, paginate
 from app.models.driver import Driver
 from app.models.user import User
 from app.schemas.driver import DriverCreate, DriverResponse, DriverUpdate
@@ -21,21 +22,22 @@ def create_driver(
 
     driver = Driver(**driver_in.model_dump())
     db.add(driver)
-    db.commit()
+    deps.commit_unique(db, "A driver with this name already exists in the team")
     db.refresh(driver)
     return driver
 
 
 @router.get("/", response_model=List[DriverResponse])
 def list_drivers(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str | None = None,
+    limit: PageLimit = DEFAULT_PAGE_SIZE,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
-    """List drivers for current user's team"""
-    drivers = db.query(Driver).filter(Driver.team_id == current_user.team_id).offset(skip).limit(limit).all()
-    return drivers
+    """List drivers for current user's team, a page at a time (see app.api.pagination)"""
+    query = db.query(Driver).filter(Driver.team_id == current_user.team_id)
+    return paginate(query, [SortKey(Driver.id)], cursor, limit, response, "drivers")
 
 
 @router.get("/{driver_id}", response_model=DriverResponse)
@@ -68,7 +70,7 @@ def update_driver(
     for field, value in update_data.items():
         setattr(driver, field, value)
 
-    db.commit()
+    deps.commit_unique(db, "A driver with this name already exists in the team")
     db.refresh(driver)
     return driver
 
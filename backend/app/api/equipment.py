@@ -1,9 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.pagination import DEFAULT_PAGE_SIZE, PageLimit, SortKey, paginate
 from app.models.equipment import Engine, Kart
 from app.models.user import User
 from app.schemas.equipment import EngineCreate, EngineResponse, EngineUpdate, KartCreate, KartResponse, KartUpdate
@@ -28,13 +29,14 @@ def create_kart(
 
 @router.get("/karts", response_model=List[KartResponse])
 def list_karts(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str | None = None,
+    limit: PageLimit = DEFAULT_PAGE_SIZE,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
-    karts = db.query(Kart).filter(Kart.team_id == current_user.team_id).offset(skip).limit(limit).all()
-    return karts
+    query = db.query(Kart).filter(Kart.team_id == current_user.team_id)
+    return paginate(query, [SortKey(Kart.id)], cursor, limit, response, "karts")
 
 
 @router.get("/karts/{kart_id}", response_model=KartResponse)
@@ -103,13 +105,14 @@ def create_engine(
 
 @router.get("/engines", response_model=List[EngineResponse])
 def list_engines(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str | None = None,
+    limit: PageLimit = DEFAULT_PAGE_SIZE,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
-    engines = db.query(Engine).filter(Engine.team_id == current_user.team_id).offset(skip).limit(limit).all()
-    return engines
+    query = db.query(Engine).filter(Engine.team_id == current_user.team_id)
+    return paginate(query, [SortKey(Engine.id)], cursor, limit, response, "engines")
 
 
 @router.get("/engines/{engine_id}", response_model=EngineResponse)
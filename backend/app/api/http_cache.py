@@ -0,0 +1,117 @@
+"""
+HTTP caching helpers: strong ETags, conditional GET and response compression.
+
+Endpoints compute an ETag from what determines the response (e.g. a
+lap's file hash and the query parameters) before doing the expensive
+work, answer 304 when If-None-Match matches, and otherwise send the body
+compressed according to Accept-Encoding. The ETag includes the content
+coding, since each coding is a different representation.
+"""
+
+import gzip
+import hashlib
+from typing import Iterable
+
+import zstandard
+from fastapi import Request, Response
+
+# Telemetry never changes once imported
+IMMUTABLE = "private, max-age=31536000, immutable"
+# Mutable resources: browsers may store them but must revalidate
+REVALIDATE = "private, no-cache"
+
+# Bodies below this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+# Preferred first when the client accepts several codings equally
+ENCODINGS = ("zstd", "gzip")
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag over the given parts"""
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:40]}"'
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick zstd or gzip from an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def with_encoding(etag: str, encoding: str | None) -> str:
+    """ETag of the representation sent with the given content coding"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _headers(etag: str | None, cache_control: str, vary: Iterable[str]) -> dict[str, str]:
+    headers = {"Cache-Control": cache_control, "Vary": ", ".join([*vary, "Accept-Encoding"])}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(request: Request, etag: str | None, cache_control: str, vary: Iterable[str] = ()) -> Response | None:
+    """A 304 response when the client already holds this ETag, else None"""
+    if etag is None or not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    return Response(status_code=304, headers=_headers(etag, cache_control, vary))
+
+
+def compress(content: bytes, encoding: str | None) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=GZIP_LEVEL)
+    return content
+
+
+def send(
+    content: bytes,
+    media_type: str,
+    etag: str | None,
+    cache_control: str,
+    encoding: str | None = None,
+    vary: Iterable[str] = (),
+) -> Response:
+    """
+    Response with caching headers, compressed with the given coding.
+
+    The ETag must already name that coding (see with_encoding). Bodies
+    under MIN_COMPRESS_SIZE are sent as they are; the ETag stays valid,
+    since the same body always goes out under it.
+    """
+    headers = _headers(etag, cache_control, vary)
+    if encoding is not None and len(content) >= MIN_COMPRESS_SIZE:
+        content = compress(content, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content, media_type=media_type, headers=headers)
@@ -2,312 +2,493 @@
 Laps API endpoints for uploading and managing telemetry lap data
 """
 
-import hashlib
+import json
+import logging
 import os
-from datetime import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Callable, List
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+import numpy as np
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
 
-from app.api import deps
+from app.api import deps, http_cache
+from app.api.pagination import DEFAULT_PAGE_SIZE, PageLimit, SortKey, paginate
 from app.core.config import settings
-from app.models.driver import Driver
-from app.models.equipment import Kart
 from app.models.lap import Lap
-from app.models.session import Session as RacingSession  # Avoid conflict with db Session
-from app.models.track import Track
 from app.models.user import User
-from app.schemas.lap import LapResponse, LapUploadResponse
-from app.schemas.telemetry import TelemetryDataPoint as TelemetryDataPointSchema
-from app.services.parsers import ParserRegistry
-from app.services.parsers.rf2_parser import RF2Parser  # noqa: F401 - registers parser
+from app.schemas.lap import (
+    MAX_BATCH_LAPS,
+    IngestJobResponse,
+    LapComparisonRequest,
+    LapComparisonResponse,
+    LapComparisonSeries,
+    LapFilters,
+    LapHashCheckRequest,
+    LapHashCheckResponse,
+    LapOrder,
+    LapResponse,
+    LapTelemetryBatchRequest,
+    LapTelemetryBatchResponse,
+    LapUploadResponse,
+)
+from app.schemas.telemetry import TelemetrySample
+from app.services import downsampling, ingest, lap_comparison, session_stats, telemetry_cache, telemetry_formats
+from app.services.downsampling import DownsampleMethod
+from app.services.frame_cache import cache_key as frame_cache_key
+from app.services.frame_cache import frame_cache
+from app.services.ingest_queue import IngestQueue, get_ingest_queue
+from app.services.lap_import import AsyncLapImporter, existing_hashes
+from app.services.parsers import STANDARD_CHANNELS, ParserRegistry, TelemetryFrame
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Upper bound on comparison grid size; the grid step is widened beyond it
+COMPARISON_MAX_POINTS = 20_000
 
-def get_file_hash(file_path: str) -> str:
-    """Calculate SHA256 hash of a file"""
-    sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
-
-
-def find_or_create_driver(db: Session, name: str, team_id: int) -> tuple[Driver, bool]:
-    """Find existing driver or create new one"""
-    driver = db.query(Driver).filter(Driver.name == name, Driver.team_id == team_id).first()
-    if driver:
-        return driver, False
-    driver = Driver(name=name, team_id=team_id)
-    db.add(driver)
-    db.flush()
-    return driver, True
-
-
-def find_or_create_track(db: Session, name: str) -> tuple[Track, bool]:
-    """Find existing track or create new one (tracks are global, not team-specific)"""
-    track = db.query(Track).filter(Track.name == name).first()
-    if track:
-        return track, False
-    track = Track(name=name)
-    db.add(track)
-    db.flush()
-    return track, True
-
-
-def find_or_create_kart(db: Session, name: str, team_id: int) -> tuple[Kart, bool]:
-    """Find existing kart or create new one"""
-    # Kart model uses 'chassis_brand' not 'name'
-    kart = db.query(Kart).filter(Kart.chassis_brand == name, Kart.team_id == team_id).first()
-    if kart:
-        return kart, False
-    kart = Kart(chassis_brand=name, chassis_model=name, team_id=team_id)
-    db.add(kart)
-    db.flush()
-    return kart, True
-
-
-def find_or_create_session(
-    db: Session,
-    team_id: int,
-    driver_id: int,
-    track_id: int,
-    kart_id: int,
-    session_date: datetime,
-) -> tuple[RacingSession, bool]:
+# Documented alternatives to the JSON body of the telemetry endpoints
+BINARY_TELEMETRY_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "content": {
+            telemetry_formats.ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+            telemetry_formats.MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+        }
+    }
+}
+
+# Bump when the encoding of telemetry responses changes, so cached copies are refetched
+TELEMETRY_REPRESENTATION_VERSION = 1
+
+# Lap list orderings; each matches an index for the team, session, driver or kart filters
+LAP_ORDERS: dict[str, list[SortKey]] = {
+    "recent": [SortKey(Lap.recorded_at, descending=True, nullable=True), SortKey(Lap.lap_time_ms), SortKey(Lap.id)],
+    "lap_time": [SortKey(Lap.lap_time_ms), SortKey(Lap.id)],
+    "lap_number": [SortKey(Lap.lap_number), SortKey(Lap.id)],
+}
+
+# Laps decoded concurrently by the batch telemetry endpoint (sidecar reads and NumPy release the GIL)
+BATCH_DECODE_THREADS = 8
+
+
+def load_lap_frame(lap: Lap, channels: list[str] | None = None) -> TelemetryFrame:
     """
-    Find existing session or create new one based on context.
-    Matches by team, driver, track, kart, and date (same day).
+    Load decoded telemetry for a lap, optionally only the given frame channels.
+
+    Serves the memory-mapped sidecar when it is present and matches the
+    lap's file hash and holds the requested channels; otherwise re-parses
+    the file and rebuilds the sidecar with every channel (imports cache only
+    the standard ones). Laps without a file hash have no sidecar, so only
+    their requested channels are decoded.
     """
-    # Filter by date range (start of day to end of day)
-    start_of_day = session_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = session_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    existing_session = (
-        db.query(RacingSession)
-        .filter(
-            RacingSession.team_id == team_id,
-            RacingSession.driver_id == driver_id,
-            RacingSession.track_id == track_id,
-            RacingSession.kart_id == kart_id,
-            RacingSession.session_date >= start_of_day,
-            RacingSession.session_date <= end_of_day,
-            # Prefer sessions created by telemetry import
-            RacingSession.data_source == "telemetry_import",
-        )
-        .first()
-    )
+    if not lap.file_path or not os.path.exists(str(lap.file_path)):
+        raise HTTPException(status_code=404, detail="Telemetry file not found")
 
-    if existing_session:
-        return existing_session, False
-
-    # Create new session
-    new_session = RacingSession(
-        team_id=team_id,
-        driver_id=driver_id,
-        track_id=track_id,
-        kart_id=kart_id,
-        session_date=session_date,
-        session_type="Practice",  # Default, can be updated later
-        data_source="telemetry_import",
-        weather_condition="sunny",  # Default, will be updated from lap data
-        track_condition="dry",
-    )
-    db.add(new_session)
-    db.flush()
-    return new_session, True
+    file_path = Path(str(lap.file_path))
+    file_hash = str(lap.file_hash) if lap.file_hash else None
+    if file_hash:
+        cached = telemetry_cache.read_frame(telemetry_cache.sidecar_path(file_path, file_hash), file_hash, channels)
+        if cached is not None:
+            return cached
+
+    # The format was detected at import time; only sniff files from unknown formats
+    parser = ParserRegistry.get_parser(str(lap.source_format))
+    if not parser:
+        parser = ParserRegistry.detect_parser(file_path)
+
+    if not parser:
+        raise HTTPException(status_code=500, detail=f"No parser available for format: {lap.source_format}")
+
+    try:
+        # Only a frame that rebuilds the sidecar needs every column
+        frame = parser.read_frame(file_path, None if file_hash else channels)
+    except Exception as e:
+        logger.exception("Error parsing telemetry for lap %s", lap.id)
+        raise HTTPException(status_code=500, detail=f"Failed to parse telemetry file: {str(e)}") from e
+
+    if file_hash:
+        telemetry_cache.store_frame(file_path, file_hash, frame)
+        return frame if channels is None else frame.select(channels)
+    return frame
+
+
+def resolve_channels(lap: Lap, requested: str) -> dict[str, str]:
+    """
+    Map a comma-separated ?channels= value to frame channel names.
+
+    Accepts the standard channel names and any raw channel name stored in
+    the lap's telemetry_columns.
+    """
+    names = list(dict.fromkeys(name.strip() for name in requested.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="No channels requested")
+
+    available = {name: name for name in STANDARD_CHANNELS}
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser = ParserRegistry.get_parser(str(lap.source_format))
+        columns = lap.telemetry_columns
+        if columns is None and parser is not None and lap.file_path and os.path.exists(str(lap.file_path)):
+            # Imported before channel names were stored
+            columns = parser.parse(Path(str(lap.file_path))).telemetry_columns
+        if parser is not None and columns:
+            available.update(parser.channel_keys(list(columns)))
+        unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown channels: {', '.join(unknown)}")
+    return {name: available[name] for name in names}
 
 
 @router.post("/upload", response_model=LapUploadResponse)
 async def upload_telemetry_files(
     files: List[UploadFile] = File(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
     Upload one or more telemetry files.
     Auto-detects format and creates entities if needed.
     """
-    uploaded_laps: list[Lap] = []
-    errors: list[str] = []
-    created_drivers: set[str] = set()
-    created_tracks: set[str] = set()
-    created_karts: set[str] = set()
-    touched_session_ids: set[int] = set()
-
-    # Ensure upload directory exists
-    upload_dir = os.path.join(settings.UPLOAD_DIR, str(current_user.team_id), "telemetry")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    for file in files:
-        try:
-            # Save file temporarily
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            safe_filename = f"{timestamp}_{file.filename}"
-            file_path = os.path.join(upload_dir, safe_filename)
-
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-
-            # Detect parser
-            from pathlib import Path
-
-            parser = ParserRegistry.detect_parser(Path(file_path))
-            if not parser:
-                errors.append(f"{file.filename}: Unknown format")
-                os.remove(file_path)
-                continue
-
-            # Parse file
-            parsed = parser.parse(Path(file_path))
-
-            # Check for duplicate by hash
-            file_hash = get_file_hash(file_path)
-            existing = db.query(Lap).filter(Lap.file_hash == file_hash).first()
-            if existing:
-                errors.append(f"{file.filename}: Duplicate file (already imported)")
-                os.remove(file_path)
-                continue
-
-            # Find or create entities
-            driver, driver_created = find_or_create_driver(db, parsed.metadata.driver_name, int(current_user.team_id))
-            if driver_created:
-                created_drivers.add(parsed.metadata.driver_name)
-
-            track, track_created = find_or_create_track(db, parsed.metadata.track_name)
-            if track_created:
-                created_tracks.add(parsed.metadata.track_name)
-
-            kart, kart_created = find_or_create_kart(db, parsed.metadata.car_name, int(current_user.team_id))
-            if kart_created:
-                created_karts.add(parsed.metadata.car_name)
-
-            # Find or create session
-            session, _ = find_or_create_session(
-                db,
-                int(current_user.team_id),
-                int(driver.id),  # type: ignore
-                int(track.id),  # type: ignore
-                int(kart.id),  # type: ignore
-                parsed.metadata.session_date,
-            )
-            touched_session_ids.add(int(session.id))  # type: ignore
-
-            # Update session weather if available (first valid one wins)
-            if parsed.lap_summary.weather and session.weather_condition == "sunny":
-                session.weather_condition = str(parsed.lap_summary.weather)  # type: ignore
-
-            # Create lap record
-            lap = Lap(
-                team_id=current_user.team_id,
-                original_filename=file.filename or "unknown",
-                file_path=file_path,
-                file_hash=file_hash,
-                source_format=parsed.metadata.source_format,
-                driver_name=parsed.metadata.driver_name,
-                track_name=parsed.metadata.track_name,
-                car_name=parsed.metadata.car_name,
-                event_type=parsed.metadata.event_type,
-                lap_number=parsed.lap_summary.lap_number,
-                lap_time_ms=parsed.lap_summary.lap_time_ms,
-                sector1_ms=parsed.lap_summary.sector1_ms,
-                sector2_ms=parsed.lap_summary.sector2_ms,
-                sector3_ms=parsed.lap_summary.sector3_ms,
-                sector4_ms=parsed.lap_summary.sector4_ms,
-                valid=parsed.lap_summary.valid,
-                weather=parsed.lap_summary.weather,
-                track_temp_c=parsed.lap_summary.track_temp_c,
-                air_temp_c=parsed.lap_summary.air_temp_c,
-                tire_compound=parsed.lap_summary.tire_compound,
-                driver_id=int(driver.id),  # type: ignore
-                track_id=int(track.id),  # type: ignore
-                kart_id=int(kart.id),  # type: ignore
-                recorded_at=parsed.metadata.session_date,
-                has_detailed_telemetry=parsed.has_detailed_telemetry,
-                session_id=int(session.id),  # type: ignore
-            )
-            db.add(lap)
-            uploaded_laps.append(lap)
+    importer = AsyncLapImporter(db, int(current_user.team_id))
+    return await importer.run([(file.file, file.filename, file.size) for file in files])
 
-        except Exception as e:
-            errors.append(f"{file.filename}: {str(e)}")
 
-    db.commit()
+@router.post("/check-hashes", response_model=LapHashCheckResponse)
+def check_hashes(
+    request: LapHashCheckRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Report which files the team already has, by SHA256 of their contents.
+    Lets clients hash files locally and upload only the missing ones.
+    """
+    existing = existing_hashes(db, int(current_user.team_id), request.hashes)
+    return LapHashCheckResponse(
+        existing=sorted(existing),
+        missing=[h for h in dict.fromkeys(request.hashes) if h not in existing],
+    )
 
-    # Update statistics for touched sessions
-    for session_id in touched_session_ids:
-        session_obj = db.query(RacingSession).filter(RacingSession.id == session_id).first()
-        if session_obj:
-            # Re-query laps to get aggregate stats
-            stats = (
-                db.query(
-                    func.count(Lap.id).label("total_laps"),
-                    func.min(Lap.lap_time_ms).label("best_lap"),
-                    func.avg(Lap.lap_time_ms).label("avg_lap"),
-                )
-                .filter(Lap.session_id == session_id)
-                .filter(Lap.valid.is_(True))  # Only count valid laps for time stats
-                .first()
-            )
 
-            # Get total count including invalid
-            total_count = db.query(func.count(Lap.id)).filter(Lap.session_id == session_id).scalar()
+@router.post("/jobs", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_telemetry_files(
+    files: List[UploadFile] = File(...),
+    queue: IngestQueue = Depends(get_ingest_queue),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Store telemetry files and queue them for background import.
+    Poll GET /jobs/{job_id} for per-file progress.
+    """
+    job_id = uuid.uuid4().hex
+    spool_dir = Path(settings.UPLOAD_DIR) / str(current_user.team_id) / "incoming" / job_id
+
+    def spool() -> dict[str, Any]:
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        job_files: list[dict[str, Any]] = []
+        for index, file in enumerate(files):
+            filename = file.filename or "unknown"
+            spool_path = spool_dir / f"{index:04d}_{Path(filename).name}"
+            entry: dict[str, Any] = {"filename": filename, "path": str(spool_path), "status": "pending"}
+            try:
+                if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+                    raise ingest.UploadTooLargeError(settings.MAX_UPLOAD_SIZE)
+                ingest.store_file(file.file, spool_path, max_size=settings.MAX_UPLOAD_SIZE)
+            except Exception as e:
+                entry.update(status="error", error=str(e), path=None)
+            job_files.append(entry)
+        return queue.enqueue(job_id, int(current_user.team_id), int(current_user.id), job_files)  # type: ignore[arg-type]
+
+    # Disk writes and the Redis round trip stay off the event loop
+    job = await run_in_threadpool(spool)
+    return IngestJobResponse.from_job(job)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def get_ingest_job(
+    job_id: str,
+    queue: IngestQueue = Depends(get_ingest_queue),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """Get status and per-file progress of a background import job"""
+    job = queue.get_job(job_id)
+    if not job or job["team_id"] != current_user.team_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestJobResponse.from_job(job)
 
-            if stats:
-                session_obj.total_laps = total_count
-                session_obj.best_lap_time_ms = stats.best_lap
-                session_obj.average_lap_time_ms = int(stats.avg_lap) if stats.avg_lap else None  # type: ignore
 
-            db.add(session_obj)
+def lap_telemetry_frame(
+    lap: Lap, channels: str | None = None, max_points: int | None = None, method: DownsampleMethod = "lttb"
+) -> tuple[TelemetryFrame, dict[str, str]]:
+    """
+    Telemetry for a lap: the selected channels, optionally downsampled.
 
-    db.commit()
+    Returns the frame and the mapping of requested names to its channels.
+    """
+    if channels is None:
+        selected = {name: name for name in STANDARD_CHANNELS}
+    else:
+        selected = resolve_channels(lap, channels)
+    return cached_lap_frame(lap, list(selected.values()), max_points, method), selected
+
+
+def cached_lap_frame(
+    lap: Lap, keys: list[str], max_points: int | None = None, method: DownsampleMethod = "lttb"
+) -> TelemetryFrame:
+    """Frame channels of a lap, optionally downsampled, through the decoded telemetry cache"""
 
-    # Refresh to get IDs
-    for lap in uploaded_laps:
-        db.refresh(lap)
-
-    return LapUploadResponse(
-        uploaded=len(uploaded_laps),
-        laps=[LapResponse.model_validate(lap) for lap in uploaded_laps],
-        errors=errors,
-        created_drivers=list(created_drivers),
-        created_tracks=list(created_tracks),
-        created_karts=list(created_karts),
+    def load() -> TelemetryFrame:
+        if max_points is None:
+            return load_lap_frame(lap, keys)
+        # Downsampling runs along distance even when it is not returned
+        frame = load_lap_frame(lap, list(dict.fromkeys([*keys, downsampling.DEFAULT_X_CHANNEL])))
+        return downsampling.downsample(frame, max_points, method, channels=keys)
+
+    if not lap.file_hash:
+        return load()
+    return frame_cache.get_or_load(frame_cache_key(str(lap.file_hash), keys, max_points, method), load)
+
+
+def telemetry_records(frame: TelemetryFrame, selected: dict[str, str]) -> list[dict]:
+    return frame.to_records(list(selected.values()), labels=list(selected))
+
+
+def _load_telemetry_batch(
+    db: Session,
+    current_user: User,
+    lap_ids: list[int],
+    channels: str | None,
+    max_points: int | None,
+    method: DownsampleMethod,
+) -> tuple[dict[int, Lap], Callable[[], tuple[dict[int, tuple[TelemetryFrame, dict[str, str]]], dict[int, str]]]]:
+    """
+    Authorize the laps of a batch request with a single query.
+
+    Returns the laps and a function decoding them in parallel, so callers
+    can answer conditional requests before any telemetry is read.
+    """
+    query = db.query(Lap).filter(Lap.id.in_(lap_ids), Lap.team_id == current_user.team_id)
+    laps: dict[int, Lap] = {int(lap.id): lap for lap in query}  # type: ignore
+    missing = [lap_id for lap_id in lap_ids if lap_id not in laps]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Laps not found: {', '.join(map(str, missing))}")
+
+    def load(lap_id: int) -> tuple[TelemetryFrame, dict[str, str]]:
+        return lap_telemetry_frame(laps[lap_id], channels, max_points, method)
+
+    def decode() -> tuple[dict[int, tuple[TelemetryFrame, dict[str, str]]], dict[int, str]]:
+        frames: dict[int, tuple[TelemetryFrame, dict[str, str]]] = {}
+        errors: dict[int, str] = {}
+        with ThreadPoolExecutor(max_workers=min(len(lap_ids), BATCH_DECODE_THREADS)) as pool:
+            futures = {lap_id: pool.submit(load, lap_id) for lap_id in lap_ids}
+            for lap_id, future in futures.items():
+                try:
+                    frames[lap_id] = future.result()
+                except HTTPException as e:
+                    if e.status_code == 400:
+                        # Bad channel names apply to the whole request
+                        raise
+                    errors[lap_id] = str(e.detail)
+        return frames, errors
+
+    return laps, decode
+
+
+def _telemetry_batch_response(
+    http_request: Request,
+    laps: dict[int, Lap],
+    decode: Callable[[], tuple[dict[int, tuple[TelemetryFrame, dict[str, str]]], dict[int, str]]],
+    params: tuple[Any, ...],
+    accept: str | None,
+) -> Response:
+    media_type = telemetry_formats.negotiate(accept)
+    encoding = http_cache.negotiate_encoding(http_request.headers.get("accept-encoding"))
+
+    # Cacheable only while every lap is identified by its file hash
+    etag = None
+    if all(lap.file_hash for lap in laps.values()):
+        etag = http_cache.with_encoding(
+            http_cache.make_etag(
+                TELEMETRY_REPRESENTATION_VERSION,
+                *[(lap_id, lap.file_hash) for lap_id, lap in laps.items()],
+                *params,
+                media_type,
+            ),
+            encoding,
+        )
+        cached = http_cache.not_modified(http_request, etag, http_cache.IMMUTABLE, vary=("Accept",))
+        if cached is not None:
+            return cached
+
+    frames, errors = decode()
+    if errors:
+        # Failures may be transient (e.g. a file restored later)
+        etag = None
+    cache_control = http_cache.IMMUTABLE if etag is not None else http_cache.REVALIDATE
+
+    if media_type != telemetry_formats.JSON:
+        content = telemetry_formats.encode_batch(frames, errors, media_type)
+    else:
+        body = LapTelemetryBatchResponse(
+            laps={lap_id: telemetry_records(*loaded) for lap_id, loaded in frames.items()}, errors=errors
+        )
+        content = body.model_dump_json().encode("utf-8")
+    return http_cache.send(content, media_type, etag, cache_control, encoding, vary=("Accept",))
+
+
+@router.get("/telemetry:batch", response_model=LapTelemetryBatchResponse, responses=BINARY_TELEMETRY_RESPONSES)
+def get_laps_telemetry_batch(
+    request: Request,
+    lap_ids: str = Query(..., description=f"Comma-separated lap ids (at most {MAX_BATCH_LAPS})"),
+    channels: str | None = Query(None, description="Comma-separated channels, as for a single lap"),
+    max_points: int | None = Query(None, ge=3, description="Downsample each lap to at most this many samples"),
+    method: DownsampleMethod = Query("lttb", description="Downsampling method: lttb or minmax (keeps peaks)"),
+    accept: str | None = Header(None),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Get telemetry for several laps in one request, keyed by lap id.
+    Cacheable form of POST /telemetry:batch: strong ETag over the laps' file hashes.
+    """
+    try:
+        ids = list(dict.fromkeys(int(lap_id) for lap_id in lap_ids.split(",") if lap_id.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="lap_ids must be comma-separated integers") from None
+    if not 1 <= len(ids) <= MAX_BATCH_LAPS:
+        raise HTTPException(status_code=400, detail=f"lap_ids must list between 1 and {MAX_BATCH_LAPS} laps")
+
+    laps, decode = _load_telemetry_batch(db, current_user, ids, channels, max_points, method)
+    return _telemetry_batch_response(request, laps, decode, (channels, max_points, method), accept)
+
+
+@router.post("/telemetry:batch", response_model=LapTelemetryBatchResponse, responses=BINARY_TELEMETRY_RESPONSES)
+def post_laps_telemetry_batch(
+    request: LapTelemetryBatchRequest,
+    http_request: Request,
+    accept: str | None = Header(None),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Get telemetry for several laps in one request, keyed by lap id.
+    Laps are authorized with a single query and decoded in parallel.
+    """
+    lap_ids = list(dict.fromkeys(request.lap_ids))
+    channels = ",".join(request.channels) if request.channels is not None else None
+    laps, decode = _load_telemetry_batch(db, current_user, lap_ids, channels, request.max_points, request.method)
+    return _telemetry_batch_response(http_request, laps, decode, (channels, request.max_points, request.method), accept)
+
+
+@router.post("/compare", response_model=LapComparisonResponse)
+def compare_laps(
+    request: LapComparisonRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Resample laps onto a shared distance grid.
+    Returns aligned channel arrays and cumulative delta time against the reference lap.
+    """
+    lap_ids = list(dict.fromkeys(request.lap_ids))
+    reference_id = request.reference_lap_id if request.reference_lap_id is not None else lap_ids[0]
+    if reference_id not in lap_ids:
+        raise HTTPException(status_code=400, detail="reference_lap_id must be one of lap_ids")
+
+    query = db.query(Lap).filter(Lap.id.in_(lap_ids), Lap.team_id == current_user.team_id)
+    laps: dict[int, Lap] = {int(lap.id): lap for lap in query}  # type: ignore
+    missing = [lap_id for lap_id in lap_ids if lap_id not in laps]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Laps not found: {', '.join(map(str, missing))}")
+
+    frames = []
+    for lap_id in lap_ids:
+        lap = laps[lap_id]
+        selected = resolve_channels(lap, ",".join(request.channels))
+        keys = list(dict.fromkeys([*selected.values(), lap_comparison.DISTANCE_CHANNEL, lap_comparison.TIME_CHANNEL]))
+        frame = cached_lap_frame(lap, keys)
+        # Present every lap under the requested names
+        frames.append(TelemetryFrame({**frame.channels, **{label: frame[key] for label, key in selected.items()}}))
+
+    channels = list(dict.fromkeys(request.channels))
+    comparison = lap_comparison.compare_laps(
+        frames,
+        channels,
+        reference=lap_ids.index(reference_id),
+        step_m=request.step_m,
+        max_points=COMPARISON_MAX_POINTS,
+    )
+
+    def as_list(values: np.ndarray) -> list[float | None]:
+        return [None if v != v else v for v in values.tolist()]
+
+    return LapComparisonResponse(
+        reference_lap_id=reference_id,
+        distance_m=comparison.distance_m.tolist(),
+        laps=[
+            LapComparisonSeries(
+                lap_id=lap_id,
+                channels={name: as_list(values) for name, values in lap_channels.items()},
+                delta_s=as_list(delta),
+            )
+            for lap_id, lap_channels, delta in zip(lap_ids, comparison.channels, comparison.delta_s, strict=True)
+        ],
     )
 
 
 @router.get("/", response_model=List[LapResponse])
 def list_laps(
-    skip: int = 0,
-    limit: int = 100,
-    driver_name: str | None = None,
-    track_name: str | None = None,
-    valid_only: bool = False,
+    response: Response,
+    cursor: str | None = None,
+    limit: PageLimit = DEFAULT_PAGE_SIZE,
+    order: LapOrder = "recent",
+    filters: LapFilters = Depends(),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
-    """List laps for current user's team with optional filters"""
+    """List laps for current user's team with optional filters, in the given order, a page at a time"""
+    if (
+        filters.min_lap_time_ms is not None
+        and filters.max_lap_time_ms is not None
+        and filters.min_lap_time_ms > filters.max_lap_time_ms
+    ):
+        raise HTTPException(status_code=400, detail="min_lap_time_ms is greater than max_lap_time_ms")
+
     query = db.query(Lap).filter(Lap.team_id == current_user.team_id)
 
-    if driver_name:
-        query = query.filter(Lap.driver_name.ilike(f"%{driver_name}%"))
-    if track_name:
-        query = query.filter(Lap.track_name.ilike(f"%{track_name}%"))
-    if valid_only:
+    if filters.session_id is not None:
+        query = query.filter(Lap.session_id == filters.session_id)
+    if filters.driver_id is not None:
+        query = query.filter(Lap.driver_id == filters.driver_id)
+    if filters.kart_id is not None:
+        query = query.filter(Lap.kart_id == filters.kart_id)
+    if filters.driver_name:
+        query = query.filter(Lap.driver_name.ilike(f"%{filters.driver_name}%"))
+    if filters.track_name:
+        query = query.filter(Lap.track_name.ilike(f"%{filters.track_name}%"))
+    if filters.car_name:
+        query = query.filter(Lap.car_name == filters.car_name)
+    if filters.event_type:
+        query = query.filter(Lap.event_type == filters.event_type)
+    if filters.valid_only:
         query = query.filter(Lap.valid == True)  # noqa: E712
+    if filters.min_lap_time_ms is not None:
+        query = query.filter(Lap.lap_time_ms >= filters.min_lap_time_ms)
+    if filters.max_lap_time_ms is not None:
+        query = query.filter(Lap.lap_time_ms <= filters.max_lap_time_ms)
 
-    query = query.order_by(Lap.recorded_at.desc(), Lap.lap_time_ms.asc())
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, LAP_ORDERS[order], cursor, limit, response, f"laps:{order}")
 
 
 @router.get("/{lap_id}", response_model=LapResponse)
 def get_lap(
     lap_id: int,
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
@@ -315,41 +496,68 @@ def get_lap(
     lap = db.query(Lap).filter(Lap.id == lap_id, Lap.team_id == current_user.team_id).first()
     if not lap:
         raise HTTPException(status_code=404, detail="Lap not found")
-    return lap
+
+    # Lap metadata can be edited, so it is revalidated against an ETag of the body
+    content = LapResponse.model_validate(lap).model_dump_json().encode("utf-8")
+    encoding = None
+    if len(content) >= http_cache.MIN_COMPRESS_SIZE:
+        encoding = http_cache.negotiate_encoding(request.headers.get("accept-encoding"))
+    etag = http_cache.with_encoding(http_cache.make_etag(content), encoding)
+    cached = http_cache.not_modified(request, etag, http_cache.REVALIDATE)
+    if cached is not None:
+        return cached
+    return http_cache.send(content, telemetry_formats.JSON, etag, http_cache.REVALIDATE, encoding)
 
 
-@router.get("/{lap_id}/telemetry", response_model=List[TelemetryDataPointSchema])
+@router.get("/{lap_id}/telemetry", response_model=List[TelemetrySample], responses=BINARY_TELEMETRY_RESPONSES)
 def get_lap_telemetry(
     lap_id: int,
+    request: Request,
+    channels: str | None = Query(
+        None,
+        description="Comma-separated channels to return: standard names (speed_kmh, rpm, ...) "
+        "or any name from the lap's telemetry_columns. Defaults to the standard channels.",
+    ),
+    max_points: int | None = Query(
+        None, ge=3, description="Downsample to at most this many samples, keeping the shape of the returned channels"
+    ),
+    method: DownsampleMethod = Query("lttb", description="Downsampling method: lttb or minmax (keeps peaks)"),
+    accept: str | None = Header(None),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    """Stream telemetry data for a specific lap"""
+    """
+    Get telemetry samples for a specific lap.
+    JSON rows by default; Arrow IPC or columnar MessagePack when requested via Accept.
+    Telemetry never changes after import, so responses carry a strong ETag
+    derived from the file hash and are cacheable indefinitely.
+    """
     lap = db.query(Lap).filter(Lap.id == lap_id, Lap.team_id == current_user.team_id).first()
     if not lap:
         raise HTTPException(status_code=404, detail="Lap not found")
 
-    if not lap.file_path or not os.path.exists(lap.file_path):
-        raise HTTPException(status_code=404, detail="Telemetry file not found")
-
-    # Detect parser
-    file_path = Path(lap.file_path)
-    parser = ParserRegistry.detect_parser(file_path)
-    if not parser:
-        # Fallback to source_format
-        parser = ParserRegistry.get_parser(str(lap.source_format))
-
-    if not parser:
-        raise HTTPException(status_code=500, detail=f"No parser available for format: {lap.source_format}")
+    media_type = telemetry_formats.negotiate(accept)
+    encoding = http_cache.negotiate_encoding(request.headers.get("accept-encoding"))
+    etag = None
+    cache_control = http_cache.REVALIDATE
+    if lap.file_hash:
+        etag = http_cache.with_encoding(
+            http_cache.make_etag(
+                TELEMETRY_REPRESENTATION_VERSION, lap.file_hash, channels, max_points, method, media_type
+            ),
+            encoding,
+        )
+        cache_control = http_cache.IMMUTABLE
+        cached = http_cache.not_modified(request, etag, cache_control, vary=("Accept",))
+        if cached is not None:
+            return cached
 
-    try:
-        # Stream data
-        # Note: For very large files, we might want to implement downsampling here
-        data_points = list(parser.stream_telemetry(file_path))
-        return data_points
-    except Exception as e:
-        print(f"Error parsing telemetry: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to parse telemetry file: {str(e)}") from e
+    frame, selected = lap_telemetry_frame(lap, channels, max_points, method)
+    if media_type != telemetry_formats.JSON:
+        content = telemetry_formats.encode_frame(frame, selected, media_type)
+    else:
+        content = json.dumps(telemetry_records(frame, selected), separators=(",", ":")).encode("utf-8")
+    return http_cache.send(content, media_type, etag, cache_control, encoding, vary=("Accept",))
 
 
 @router.delete("/{lap_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -363,10 +571,15 @@ def delete_lap(
     if not lap:
         raise HTTPException(status_code=404, detail="Lap not found")
 
-    # Delete file if exists
+    # Delete file and its decoded cache if they exist
     if lap.file_path and os.path.exists(lap.file_path):
         os.remove(lap.file_path)
+    if lap.file_path:
+        telemetry_cache.remove_frame(str(lap.file_path), lap.file_hash)  # type: ignore[arg-type]
+    if lap.file_hash:
+        frame_cache.discard(str(lap.file_hash))
 
+    session_stats.remove_lap(db, lap)
     db.delete(lap)
     db.commit()
     return None
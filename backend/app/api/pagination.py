@@ -0,0 +1,124 @@
+"""
+Keyset pagination for list endpoints.
+
+Pages are ordered by a fixed list of sort keys ending in the primary key.
+Each page starts after the last row of the previous one instead of at an
+offset, so a page costs one index range scan however deep it is. The
+position travels as an opaque cursor, the sort key values of the last
+row, returned in the X-Next-Cursor header (absent on the last page) and
+passed back as ?cursor=.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, false, or_, true
+from sqlalchemy.orm import Query as OrmQuery
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+
+PageLimit = Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)]
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """
+    One column of a page ordering.
+
+    NULLs of nullable columns sort as if larger than any value (last
+    ascending, first descending), which is PostgreSQL's default and so
+    matches plain indexes.
+    """
+
+    column: Any
+    descending: bool = False
+    nullable: bool = False
+
+    def order_by(self) -> Any:
+        order = self.column.desc() if self.descending else self.column.asc()
+        if self.nullable:
+            order = order.nulls_first() if self.descending else order.nulls_last()
+        return order
+
+    def equals(self, value: Any) -> Any:
+        return self.column.is_(None) if value is None else self.column == value
+
+    def after(self, value: Any) -> Any:
+        """Rows strictly after value in this key's order"""
+        if value is None:
+            # NULL is largest: nothing follows it ascending, every value follows it descending
+            return self.column.is_not(None) if self.descending else false()
+        if self.descending:
+            return self.column < value
+        return or_(self.column > value, self.column.is_(None)) if self.nullable else self.column > value
+
+    def bound(self, value: Any) -> Any:
+        """Index range condition implied by after(); lets the database seek instead of filtering"""
+        if value is None:
+            return true()
+        if self.descending:
+            return self.column <= value
+        return true() if self.nullable else self.column >= value
+
+
+def _encode_value(value: Any) -> Any:
+    return {"dt": value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _decode_value(value: Any) -> Any:
+    return datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+
+
+def encode_cursor(name: str, values: Sequence[Any]) -> str:
+    """Opaque cursor for the position after a row with these sort key values"""
+    payload = json.dumps([name, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, name: str, length: int) -> list[Any]:
+    """Sort key values of a cursor made by encode_cursor for the same ordering; 400 otherwise"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_name, values = payload
+        if cursor_name != name or not isinstance(values, list) or len(values) != length:
+            raise ValueError(cursor)
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def after_condition(keys: Sequence[SortKey], values: Sequence[Any]) -> Any:
+    """Rows after the given sort key values: (k0 > v0) OR (k0 = v0 AND k1 > v1) OR ..."""
+    branches = [
+        and_(*(key.equals(value) for key, value in zip(keys[:i], values[:i], strict=True)), keys[i].after(values[i]))
+        for i in range(len(keys))
+    ]
+    return and_(keys[0].bound(values[0]), or_(*branches))
+
+
+def paginate(
+    query: OrmQuery, keys: Sequence[SortKey], cursor: str | None, limit: int, response: Response, name: str
+) -> list[Any]:
+    """
+    One page of query in the order of keys, starting after cursor.
+
+    Rows are fetched in chunks of PAGE_FETCH_SIZE; when more rows follow,
+    the cursor of the next page is set on the response.
+    """
+    if cursor:
+        query = query.filter(after_condition(keys, decode_cursor(cursor, name, len(keys))))
+    query = query.order_by(*(key.order_by() for key in keys)).limit(limit + 1)
+    rows = list(query.yield_per(settings.PAGE_FETCH_SIZE))
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(name, [getattr(last, key.column.key) for key in keys])
+    return rows
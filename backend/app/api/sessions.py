@@ -1,18 +1,54 @@
 import os
 from datetime import datetime
+from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.api import deps
+from app.api.pagination import DEFAULT_PAGE_SIZE, PageLimit, SortKey, paginate
 from app.models.session import Session as RacingSession
+from app.models.session import TelemetryData
 from app.models.user import User
-from app.schemas.session import SessionCreate, SessionResponse, SessionUpdate, TelemetryAnalysis
+from app.schemas.session import (
+    SessionCreate,
+    SessionResponse,
+    SessionStatsRepairResponse,
+    SessionUpdate,
+    TelemetryAnalysis,
+)
+from app.services import session_stats
+from app.services.ingest import UploadTooLargeError, store_file
 from app.services.telemetry_analyzer import TelemetryAnalyzer
 
 router = APIRouter()
 
+SESSION_ORDER = [SortKey(RacingSession.session_date, descending=True), SortKey(RacingSession.id, descending=True)]
+
+
+def save_analysis(db: Session | AsyncSession, session: RacingSession, file_path: str, analysis: dict) -> None:
+    """
+    Persist a session's telemetry analysis in its TelemetryData row.
+
+    Replaces any earlier analysis, so uploading new telemetry invalidates it.
+    The session's telemetry_data must be loaded.
+    """
+    telemetry_data = session.telemetry_data or TelemetryData(session=session)
+    telemetry_data.source = session.data_source
+    telemetry_data.raw_file_path = file_path  # type: ignore[assignment]
+    telemetry_data.parsed_data = {"analyzer_version": TelemetryAnalyzer.VERSION, "analysis": analysis}  # type: ignore[assignment]
+    db.add(telemetry_data)
+
+
+def store_analysis(db: Session, session: RacingSession, file_path: str, filename: str) -> dict:
+    """Analyze a session's telemetry file and persist the result"""
+    analysis = TelemetryAnalyzer().analyze_file(file_path, filename)
+    save_analysis(db, session, file_path, analysis)
+    return analysis
+
 
 @router.post("/", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 def create_session(
@@ -32,8 +68,9 @@ def create_session(
 
 @router.get("/", response_model=List[SessionResponse])
 def list_sessions(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str | None = None,
+    limit: PageLimit = DEFAULT_PAGE_SIZE,
     driver_id: int | None = None,
     track_id: int | None = None,
     kart_id: int | None = None,
@@ -43,7 +80,7 @@ def list_sessions(
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ):
-    """List sessions for current user's team with optional filters"""
+    """List sessions for current user's team with optional filters, newest first, a page at a time"""
     query = db.query(RacingSession).filter(RacingSession.team_id == current_user.team_id)
 
     if driver_id:
@@ -59,8 +96,21 @@ def list_sessions(
     if date_to:
         query = query.filter(RacingSession.session_date <= date_to)
 
-    sessions = query.order_by(RacingSession.session_date.desc()).offset(skip).limit(limit).all()
-    return sessions
+    return paginate(query, SESSION_ORDER, cursor, limit, response, "sessions")
+
+
+@router.post("/recompute-stats", response_model=SessionStatsRepairResponse)
+def recompute_session_stats(
+    session_id: int | None = None,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """Rebuild lap totals from the laps, for one session or all of the team's sessions"""
+    updated = session_stats.recompute_session_stats(db, int(current_user.team_id), session_id)  # type: ignore[arg-type]
+    db.commit()
+    if session_id is not None and not updated:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return SessionStatsRepairResponse(updated=updated)
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
@@ -120,11 +170,11 @@ def delete_session(
 async def upload_telemetry(
     session_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """Upload telemetry file and analyze it"""
-    session = db.query(RacingSession).filter(RacingSession.id == session_id).first()
+    session = await db.get(RacingSession, session_id, options=[selectinload(RacingSession.telemetry_data)])
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -135,29 +185,33 @@ async def upload_telemetry(
     from app.core.config import settings
 
     upload_dir = settings.UPLOAD_DIR
-    os.makedirs(upload_dir, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"session_{session_id}_{timestamp}_{file.filename}"
     file_path = os.path.join(upload_dir, filename)
 
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=str(UploadTooLargeError(settings.MAX_UPLOAD_SIZE)))
+
+    def store_and_analyze() -> dict:
+        os.makedirs(upload_dir, exist_ok=True)
+        store_file(file.file, Path(file_path), max_size=settings.MAX_UPLOAD_SIZE)
+        return TelemetryAnalyzer().analyze_file(file_path, file.filename or "unknown")
+
+    # Disk writes and the pandas analysis run in a worker thread, off the event loop
+    try:
+        analysis = await run_in_threadpool(store_and_analyze)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
 
     # Update session with file path
     session.telemetry_file_path = str(file_path)  # type: ignore[assignment]
 
-    # Analyze telemetry
-    analyzer = TelemetryAnalyzer()
-    analysis = analyzer.analyze_file(file_path, file.filename or "unknown")
+    # Analyze once; GET /analysis serves the stored result. The session's lap totals
+    # stay derived from its Lap rows (see session_stats), not from this file.
+    save_analysis(db, session, file_path, analysis)
 
-    # Update session with analysis results
-    session.best_lap_time_ms = analysis["best_lap_time_ms"]
-    session.average_lap_time_ms = analysis["average_lap_time_ms"]
-    session.total_laps = analysis["total_laps"]
-
-    db.commit()
+    await db.commit()
 
     return TelemetryAnalysis(session_id=session_id, **analysis)
 
@@ -166,20 +220,37 @@ async def upload_telemetry(
 def get_session_analysis(
     session_id: int, db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)
 ):
-    """Get telemetry analysis for a session"""
-    session = db.query(RacingSession).filter(RacingSession.id == session_id).first()
-    if not session:
+    """Get the stored telemetry analysis for a session"""
+    row = (
+        db.query(
+            RacingSession.team_id,
+            RacingSession.telemetry_file_path,
+            TelemetryData.raw_file_path,
+            TelemetryData.parsed_data,
+        )
+        .outerjoin(TelemetryData, TelemetryData.session_id == RacingSession.id)
+        .filter(RacingSession.id == session_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if session.team_id != current_user.team_id:
+    team_id, telemetry_file_path, analyzed_path, parsed_data = row
+    if team_id != current_user.team_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    if not session.telemetry_file_path:
+    if not telemetry_file_path:
         raise HTTPException(status_code=404, detail="No telemetry data available")
 
-    # Re-analyze the file
-    analyzer = TelemetryAnalyzer()
-    file_path_str = str(session.telemetry_file_path)
-    analysis = analyzer.analyze_file(file_path_str, os.path.basename(file_path_str))
+    if (
+        parsed_data
+        and parsed_data.get("analyzer_version") == TelemetryAnalyzer.VERSION
+        and analyzed_path == telemetry_file_path
+    ):
+        return TelemetryAnalysis(session_id=session_id, **parsed_data["analysis"])
 
+    # Analyzed before this was stored, by an older analyzer, or the file was replaced: analyze once more and keep it
+    session = db.query(RacingSession).filter(RacingSession.id == session_id).one()
+    analysis = store_analysis(db, session, telemetry_file_path, os.path.basename(telemetry_file_path))
+    db.commit()
     return TelemetryAnalysis(session_id=session_id, **analysis)
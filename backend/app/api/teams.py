@@ -7,10 +7,16 @@ from app.api import deps
 from app.models.team import Team
 from app.models.user import User
 from app.schemas.team import TeamResponse, TeamUpdate
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
 
+def team_user_emails(db: Session, team_id: int) -> list[str]:
+    """Token subjects of a team's members, for principal cache invalidation"""
+    return [email for (email,) in db.query(User.email).filter(User.team_id == team_id)]
+
+
 @router.get("/", response_model=List[TeamResponse])
 def list_teams(
     skip: int = 0,
@@ -52,6 +58,7 @@ def update_team(
 
     db.commit()
     db.refresh(team)
+    principal_cache.invalidate(team_user_emails(db, team_id))
     return team
 
 
@@ -65,6 +72,9 @@ def delete_team(team_id: int, db: Session = Depends(deps.get_db), current_user:
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
 
+    emails = team_user_emails(db, team_id)
     db.delete(team)
     db.commit()
+    # Members are left without a team
+    principal_cache.invalidate(emails)
     return None
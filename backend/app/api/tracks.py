@@ -18,7 +18,7 @@ def create_track(
     """Create a new track (available to all users)"""
     track = Track(**track_in.model_dump())
     db.add(track)
-    db.commit()
+    deps.commit_unique(db, "A track with this name already exists")
     db.refresh(track)
     return track
 
@@ -58,7 +58,7 @@ def update_track(
     for field, value in update_data.items():
         setattr(track, field, value)
 
-    db.commit()
+    deps.commit_unique(db, "A track with this name already exists")
     db.refresh(track)
     return track
 
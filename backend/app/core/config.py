@@ -1,4 +1,5 @@
 import json
+import os
 from typing import List, Union
 
 from pydantic import field_validator
@@ -12,6 +13,15 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
 
+    # Connection pools (app.core.db_pool), per engine and API process; the sync and async engines each have one
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000  # 0 disables; PostgreSQL only
+    DB_PGBOUNCER: bool = False  # Behind PgBouncer in transaction mode: no app-side pool or prepared statements
+
     # Redis
     REDIS_URL: str
 
@@ -38,6 +48,24 @@ class Settings(BaseSettings):
     # Uploads
     UPLOAD_DIR: str = "/app/uploads"
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
+    PARSE_WORKERS: int = min(4, os.cpu_count() or 1)  # Processes decoding multi-file uploads; 1 parses inline
+
+    # Decoded telemetry cache (app.services.frame_cache)
+    FRAME_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Per API process
+    FRAME_CACHE_REDIS: bool = True
+    FRAME_CACHE_REDIS_TTL: int = 24 * 3600
+    FRAME_CACHE_REDIS_TIMEOUT: float = 0.1  # Seconds
+    FRAME_CACHE_REDIS_MAX_ENTRY_BYTES: int = 16 * 1024 * 1024
+
+    # Authenticated user cache (app.services.principal_cache)
+    PRINCIPAL_CACHE_TTL: int = 30  # Seconds; also bounds how long other workers may serve a changed user
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000  # Per API process
+    PRINCIPAL_CACHE_REDIS: bool = True
+    PRINCIPAL_CACHE_REDIS_TIMEOUT: float = 0.05  # Seconds
+
+    # List endpoints (app.api.pagination)
+    MAX_PAGE_SIZE: int = 500
+    PAGE_FETCH_SIZE: int = 100  # Rows loaded per round trip while building a page
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,153 @@
+"""
+Database Connection Pools
+
+Engine options built from Settings, and pools that count what they do:
+
+  checkouts           connections handed out
+  timeouts            checkouts that gave up after DB_POOL_TIMEOUT
+  wait_seconds_total  time spent waiting for a connection (or connecting)
+  wait_seconds_max    longest single wait
+  size, checked_out,  live state of a queue pool; overflow above zero means
+  overflow            connections beyond DB_POOL_SIZE are open
+
+With DB_PGBOUNCER the application keeps no pool of its own (PgBouncer
+pools server connections in transaction mode), asyncpg stops caching
+prepared statements, and the statement timeout is set per transaction
+with SET LOCAL, since PgBouncer rejects it as a startup option.
+"""
+
+import threading
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolMetrics:
+    """Checkout counters of one pool, kept across pool re-creation"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class MeteredPoolMixin:
+    """Times every checkout of the pool it is mixed into"""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, timed_out=False)
+        return connection
+
+    def recreate(self) -> Any:
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class MeteredNullPool(MeteredPoolMixin, NullPool):
+    pass
+
+
+def pool_stats(pool: Pool) -> dict[str, Any]:
+    """Counters and live state of an engine's pool"""
+    stats: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, MeteredPoolMixin):
+        stats.update(pool.metrics.as_dict())
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+    return stats
+
+
+def engine_options(url: str, is_async: bool = False) -> dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for a database URL"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        # SQLite (tests, local runs): the default queue pool of a database file, counted
+        if parsed.database in (None, "", ":memory:"):
+            return {}
+        return {"poolclass": MeteredAsyncAdaptedQueuePool if is_async else MeteredQueuePool}
+
+    options: dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args: dict[str, Any] = {}
+    if settings.DB_PGBOUNCER:
+        options["poolclass"] = MeteredNullPool
+        if is_async:
+            # Server-side prepared statements do not survive PgBouncer moving the session between servers
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+            )
+    else:
+        options.update(
+            poolclass=MeteredAsyncAdaptedQueuePool if is_async else MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            if is_async:
+                connect_args["server_settings"] = {"statement_timeout": timeout}
+            else:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def set_transaction_timeout(engine: Engine) -> None:
+    """With PgBouncer, apply the statement timeout at the start of every transaction"""
+    if not (settings.DB_PGBOUNCER and settings.DB_STATEMENT_TIMEOUT_MS) or engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "begin")
+    def _statement_timeout(conn: Any) -> None:
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
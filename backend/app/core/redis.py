@@ -0,0 +1,11 @@
+from functools import lru_cache
+
+import redis
+
+from app.core.config import settings
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Shared Redis client; connections are opened lazily on first command"""
+    return redis.Redis.from_url(settings.REDIS_URL)
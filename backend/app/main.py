@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import auth, drivers, equipment, laps, sessions, teams, tracks
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.core.db_pool import pool_stats
+from app.services.frame_cache import frame_cache
+from app.services.lap_import import shutdown_parse_pool
+from app.services.principal_cache import principal_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_parse_pool()
+    await async_engine.dispose()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Set all CORS enabled origins
 if settings.CORS_ORIGINS:
@@ -14,6 +30,7 @@ if settings.CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 
@@ -31,6 +48,16 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Counters of this API process"""
+    return {
+        "frame_cache": frame_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "db_pool": {"sync": pool_stats(engine.pool), "async": pool_stats(async_engine.pool)},
+    }
+
+
 @app.get("/")
 def root():
     return {"message": "Welcome to KarTune API"}
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, Date, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Column, Date, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,7 @@ from app.core.database import Base
 
 class Driver(Base):
     __tablename__ = "drivers"
+    __table_args__ = (UniqueConstraint("team_id", "name", name="uq_drivers_team_id_name"),)
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,8 @@ from app.core.database import Base
 
 class Kart(Base):
     __tablename__ = "karts"
+    # Only karts created by lap imports carry an import name; a team may own several karts of one brand
+    __table_args__ = (Index("uq_karts_team_id_import_name", "team_id", "import_name", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
@@ -16,6 +18,7 @@ class Kart(Base):
     year = Column(Integer)
     category = Column(String)  # Mini, OK, KZ2, etc.
     notes = Column(Text)
+    import_name = Column(String)  # Car name in imported telemetry that this kart was created for
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
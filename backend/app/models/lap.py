@@ -4,7 +4,21 @@ Lap model for storing individual lap data and telemetry file references
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -14,6 +28,31 @@ class Lap(Base):
     """Individual lap with telemetry file reference and conditions"""
 
     __tablename__ = "laps"
+    __table_args__ = (
+        # Next best lap of a session when its best lap is deleted (app.services.session_stats)
+        Index("ix_laps_session_valid_time", "session_id", "valid", "lap_time_ms"),
+        # Duplicate uploads and hash pre-checks (app.services.lap_import.existing_hashes)
+        Index("uq_laps_team_id_file_hash", "team_id", "file_hash", unique=True),
+        # Lap list orderings (app.api.laps.LAP_ORDERS), for the whole team or filtered by session, driver or kart
+        Index("ix_laps_team_recorded_time", "team_id", text("recorded_at DESC"), "lap_time_ms"),
+        Index("ix_laps_team_lap_time", "team_id", "lap_time_ms", "id"),
+        Index("ix_laps_session_lap_number", "session_id", "lap_number", "id"),
+        Index("ix_laps_driver_recorded", "driver_id", text("recorded_at DESC")),
+        Index("ix_laps_kart_recorded", "kart_id", text("recorded_at DESC")),
+        # Substring filters of the lap list (ILIKE '%...%'); trigram indexes exist on PostgreSQL only
+        Index(
+            "ix_laps_driver_name_trgm",
+            "driver_name",
+            postgresql_using="gin",
+            postgresql_ops={"driver_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_laps_track_name_trgm",
+            "track_name",
+            postgresql_using="gin",
+            postgresql_ops={"track_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id"), nullable=True)
@@ -21,7 +60,7 @@ class Lap(Base):
     # File storage
     original_filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)  # Path to stored CSV
-    file_hash = Column(String(64), nullable=True)  # SHA256 for deduplication
+    file_hash = Column(String(64), nullable=True)  # SHA256, unique per team for deduplication
     source_format = Column(String(50), default="RF2")  # RF2, Alfano, Micron, etc.
 
     # Extracted metadata
@@ -58,6 +97,7 @@ class Lap(Base):
 
     # Telemetry flags
     has_detailed_telemetry = Column(Boolean, default=True)
+    telemetry_columns = Column(JSON, nullable=True)  # Channel names from the file header
 
     # Relationships
     session = relationship("Session", back_populates="laps")
@@ -65,3 +105,9 @@ class Lap(Base):
     track = relationship("Track", backref="laps")
     kart = relationship("Kart", backref="laps")
     team = relationship("Team", backref="laps")
+
+
+# The trigram indexes need pg_trgm
+event.listen(
+    Lap.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
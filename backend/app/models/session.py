@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,13 @@ from app.core.database import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Session list, newest first, optionally for one driver, track or kart
+        Index("ix_sessions_team_date", "team_id", "session_date"),
+        Index("ix_sessions_team_driver_date", "team_id", "driver_id", "session_date"),
+        Index("ix_sessions_team_track_date", "team_id", "track_id", "session_date"),
+        Index("ix_sessions_team_kart_date", "team_id", "kart_id", "session_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
@@ -37,6 +44,9 @@ class Session(Base):
     best_lap_time_ms = Column(Integer)
     average_lap_time_ms = Column(Integer)
     total_laps = Column(Integer)
+    # Running totals behind the lap stats above (app.services.session_stats)
+    valid_lap_count = Column(Integer, nullable=False, default=0, server_default="0")
+    valid_lap_time_sum_ms = Column(BigInteger, nullable=False, default=0, server_default="0")
     position = Column(Integer)
 
     # Notes & Files
@@ -52,7 +62,9 @@ class Session(Base):
     kart = relationship("Kart", backref="sessions")
     engine = relationship("Engine", backref="sessions")
     track = relationship("Track", backref="sessions")
-    telemetry_data = relationship("TelemetryData", back_populates="session", uselist=False)
+    telemetry_data = relationship(
+        "TelemetryData", back_populates="session", uselist=False, cascade="all, delete-orphan"
+    )
     laps = relationship("Lap", back_populates="session", cascade="all, delete-orphan")
 
 
@@ -63,7 +75,7 @@ class TelemetryData(Base):
     session_id = Column(Integer, ForeignKey("sessions.id"), unique=True, nullable=False)
     source = Column(String)  # alfano/micron5/micron6/kartsim
     raw_file_path = Column(String)
-    parsed_data = Column(JSON)
+    parsed_data = Column(JSON)  # {"analyzer_version": int, "analysis": TelemetryAnalyzer result}
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     session = relationship("Session", back_populates="telemetry_data")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import Column, DateTime, Integer, String, Text, UniqueConstraint
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -6,6 +6,7 @@ from app.core.database import Base
 
 class Track(Base):
     __tablename__ = "tracks"
+    __table_args__ = (UniqueConstraint("name", name="uq_tracks_name"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
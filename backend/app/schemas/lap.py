@@ -1,8 +1,9 @@
 """Pydantic schemas for Lap model"""
 
 from datetime import datetime
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, StringConstraints
 
 
 class LapBase(BaseModel):
@@ -47,6 +48,7 @@ class LapResponse(LapBase):
     recorded_at: datetime | None
     imported_at: datetime
     has_detailed_telemetry: bool
+    telemetry_columns: list[str] | None = None
     driver_id: int | None
     track_id: int | None
     kart_id: int | None
@@ -65,15 +67,125 @@ class LapUploadResponse(BaseModel):
     created_drivers: list[str] = []
     created_tracks: list[str] = []
     created_karts: list[str] = []
+    timings_ms: dict[str, float] = {}  # Total time per ingest stage across all files
+
+
+MAX_HASH_CHECK = 1000
+
+
+class LapHashCheckRequest(BaseModel):
+    """SHA256 digests of files the client is about to upload"""
+
+    hashes: list[Annotated[str, StringConstraints(pattern=r"^[0-9a-fA-F]{64}$", to_lower=True)]] = Field(
+        ..., max_length=MAX_HASH_CHECK
+    )
+
+
+class LapHashCheckResponse(BaseModel):
+    """Which of the checked digests the team has already imported"""
+
+    existing: list[str]
+    missing: list[str]  # In request order; only these files need uploading
 
 
 class LapFilters(BaseModel):
     """Filters for querying laps"""
 
-    driver_name: str | None = None
-    track_name: str | None = None
+    session_id: int | None = None
+    driver_id: int | None = None
+    kart_id: int | None = None
+    driver_name: str | None = None  # Substring, case-insensitive
+    track_name: str | None = None  # Substring, case-insensitive
     car_name: str | None = None
     event_type: str | None = None
     valid_only: bool = False
-    min_lap_time_ms: int | None = None
-    max_lap_time_ms: int | None = None
+    min_lap_time_ms: int | None = Field(None, ge=0)
+    max_lap_time_ms: int | None = Field(None, ge=0)
+
+
+# recent: newest first; lap_time: fastest first; lap_number: in driving order
+LapOrder = Literal["recent", "lap_time", "lap_number"]
+
+
+MAX_BATCH_LAPS = 20
+
+
+class LapTelemetryBatchRequest(BaseModel):
+    """Telemetry for several laps in one request"""
+
+    lap_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_LAPS)
+    channels: list[str] | None = None  # Defaults to the standard channels
+    max_points: int | None = Field(None, ge=3)
+    method: Literal["lttb", "minmax"] = "lttb"
+
+
+class LapTelemetryBatchResponse(BaseModel):
+    """Telemetry rows keyed by lap id"""
+
+    laps: dict[int, list[dict[str, Any]]] = {}
+    errors: dict[int, str] = {}  # Laps whose telemetry could not be loaded
+
+
+class LapComparisonRequest(BaseModel):
+    """Laps to align on a common distance grid"""
+
+    lap_ids: list[int] = Field(..., min_length=1, max_length=10)
+    reference_lap_id: int | None = None  # Defaults to the first lap
+    channels: list[str] = ["speed_kmh", "throttle_pct", "brake_pct", "steering_pct", "gear", "rpm"]
+    step_m: float = Field(1.0, gt=0)
+
+
+class LapComparisonSeries(BaseModel):
+    """One lap resampled onto the comparison grid"""
+
+    lap_id: int
+    channels: dict[str, list[float | None]]
+    delta_s: list[float | None]  # Cumulative time vs the reference lap (positive = slower)
+
+
+class LapComparisonResponse(BaseModel):
+    """Laps aligned by distance"""
+
+    reference_lap_id: int
+    distance_m: list[float]
+    laps: list[LapComparisonSeries]
+
+
+class IngestJobFile(BaseModel):
+    """Progress of one file in a background import job"""
+
+    filename: str
+    status: str  # pending, done, error
+    error: str | None = None
+    lap_id: int | None = None
+
+
+class IngestJobResponse(BaseModel):
+    """Status of a background import job"""
+
+    id: str
+    status: str  # queued, running, completed, failed
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    total_files: int
+    processed_files: int
+    files: list[IngestJobFile]
+    error: str | None = None
+    result: LapUploadResponse | None = None
+
+    @classmethod
+    def from_job(cls, job: dict[str, Any]) -> "IngestJobResponse":
+        files = [IngestJobFile.model_validate(f) for f in job["files"]]
+        return cls(
+            id=job["id"],
+            status=job["status"],
+            created_at=job["created_at"],
+            started_at=job.get("started_at"),
+            finished_at=job.get("finished_at"),
+            total_files=len(files),
+            processed_files=sum(f.status != "pending" for f in files),
+            files=files,
+            error=job.get("error"),
+            result=job.get("result"),
+        )
@@ -94,3 +94,9 @@ class TelemetryAnalysis(BaseModel):
     lap_times: list[int]  # All lap times in milliseconds
     consistency_score: float  # 0-100, higher is better
     improvement_trend: str  # "improving", "stable", "declining"
+
+
+class SessionStatsRepairResponse(BaseModel):
+    """Result of recomputing session lap totals"""
+
+    updated: int  # Sessions whose totals were recomputed
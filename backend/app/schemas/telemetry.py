@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -19,3 +19,8 @@ class TelemetryDataPoint(BaseModel):
     rpm: float
     g_lat: Optional[float] = None
     g_long: Optional[float] = None
+
+
+# One telemetry sample keyed by channel name. The lap telemetry endpoint returns
+# the TelemetryDataPoint fields by default, or exactly the ?channels= requested.
+TelemetrySample = Dict[str, Any]
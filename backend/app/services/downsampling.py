@@ -0,0 +1,130 @@
+"""
+Telemetry Downsampling
+
+Reduces a telemetry frame to a bounded number of samples for charting
+while keeping its visual shape. Every channel of the result shares one
+set of sample indices, so rows stay aligned across channels.
+
+Methods:
+  lttb    Largest-Triangle-Three-Buckets. Vectorized variant: each bucket
+          is anchored on the average of the previous bucket rather than the
+          point selected there, so all buckets are scored in one pass.
+          Channels are scaled to their range and their areas summed.
+  minmax  Minimum and maximum of every channel per bucket, which keeps
+          peaks such as braking spikes exactly.
+"""
+
+from typing import Literal
+
+import numpy as np
+
+from app.services.parsers import TelemetryFrame
+
+DownsampleMethod = Literal["lttb", "minmax"]
+
+DEFAULT_X_CHANNEL = "distance_m"
+
+
+def _bucket_starts(start: int, stop: int, buckets: int) -> np.ndarray:
+    """Start offsets of `buckets` near-equal buckets covering [start, stop)"""
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)[:-1]
+
+
+def _first_max_per_bucket(scores: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Index of the first maximum of scores within each bucket"""
+    maxima = np.maximum.reduceat(scores, starts)
+    lengths = np.diff(np.append(starts, len(scores)))
+    hits = np.flatnonzero(scores == np.repeat(maxima, lengths))
+    bucket_of_hit = np.searchsorted(starts, hits, side="right") - 1
+    _, first = np.unique(bucket_of_hit, return_index=True)
+    return hits[first]
+
+
+def _scaled(values: np.ndarray) -> np.ndarray:
+    """Channel scaled to its range; NaN counts as 0 so missing samples never win a bucket"""
+    values = np.nan_to_num(values.astype(np.float64), nan=0.0)
+    span = values.max() - values.min() if len(values) else 0.0
+    return values / span if span > 0 else np.zeros_like(values)
+
+
+def lttb_indices(x: np.ndarray, ys: list[np.ndarray], max_points: int) -> np.ndarray:
+    """Sample indices chosen by LTTB over the given channels"""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    starts = _bucket_starts(1, n - 1, buckets)
+    interior = np.arange(1, n - 1)
+    local_starts = starts - 1
+    lengths = np.diff(np.append(local_starts, len(interior)))
+    bucket_ids = np.repeat(np.arange(buckets), lengths)
+
+    # Anchor a: previous bucket average (first point for bucket 0); c: next bucket average (last point at the end)
+    x = np.nan_to_num(x.astype(np.float64), nan=0.0)
+    px = x[interior]
+    bucket_x = np.add.reduceat(px, local_starts) / lengths
+    ax = np.concatenate(([x[0]], bucket_x[:-1]))[bucket_ids]
+    cx = np.concatenate((bucket_x[1:], [x[-1]]))[bucket_ids]
+
+    area = np.zeros(len(interior))
+    for y in [_scaled(y) for y in ys] or [np.zeros(n)]:
+        py = y[interior]
+        bucket_y = np.add.reduceat(py, local_starts) / lengths
+        ay = np.concatenate(([y[0]], bucket_y[:-1]))[bucket_ids]
+        cy = np.concatenate((bucket_y[1:], [y[-1]]))[bucket_ids]
+        area += np.abs((ax - cx) * (py - ay) - (ax - px) * (cy - ay))
+
+    chosen = interior[_first_max_per_bucket(area, local_starts)]
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def minmax_indices(ys: list[np.ndarray], max_points: int) -> np.ndarray:
+    """Sample indices of each channel's minimum and maximum per bucket"""
+    n = len(ys[0]) if ys else 0
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Two samples per channel per bucket, plus the end points
+    buckets = max(1, (max_points - 2) // (2 * len(ys)))
+    starts = _bucket_starts(0, n, buckets)
+    chosen = [np.array([0, n - 1])]
+    for y in ys:
+        values = np.nan_to_num(y.astype(np.float64), nan=0.0)
+        chosen.append(_first_max_per_bucket(values, starts))
+        chosen.append(_first_max_per_bucket(-values, starts))
+    indices = np.unique(np.concatenate(chosen))
+    if len(indices) > max_points:
+        # More channels than the budget allows two samples each: thin evenly
+        indices = indices[np.linspace(0, len(indices) - 1, max_points).astype(np.int64)]
+    return indices
+
+
+def downsample(
+    frame: TelemetryFrame,
+    max_points: int,
+    method: DownsampleMethod = "lttb",
+    channels: list[str] | None = None,
+    x_channel: str = DEFAULT_X_CHANNEL,
+) -> TelemetryFrame:
+    """
+    Reduce a frame to at most max_points samples.
+
+    Args:
+        frame: Telemetry to reduce; returned as is when already small enough
+        max_points: Upper bound on the number of samples (at least 3)
+        method: "lttb" or "minmax"
+        channels: Channels whose shape should be preserved (default: all but x)
+        x_channel: Horizontal axis for LTTB; the sample index when missing
+    """
+    if len(frame) <= max_points:
+        return frame
+
+    names = [name for name in (channels or frame.channel_names) if name != x_channel] or [x_channel]
+    ys = [frame[name] for name in names if name in frame]
+    if method == "minmax":
+        indices = minmax_indices(ys, max_points)
+    else:
+        x = frame[x_channel] if x_channel in frame else np.arange(len(frame), dtype=np.float64)
+        indices = lttb_indices(x, ys, max_points)
+    return frame.take(indices)
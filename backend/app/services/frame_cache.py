@@ -0,0 +1,226 @@
+"""
+Decoded Telemetry Cache
+
+Two tiers in front of the sidecar files and parsers:
+
+  memory  per-process LRU of decoded frames, bounded by the bytes of
+          their channel arrays rather than by entry count
+  redis   shared between API workers, frames serialized as raw arrays
+          with a short header and expiring after a TTL
+
+Entries are keyed by file hash, frame channels and downsampling
+parameters, so a cached frame can never be stale: the same key always
+describes the same data. Redis is optional; when it is unreachable the
+cache fails open to loading the frame and retries Redis after a pause.
+"""
+
+import hashlib
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+import redis
+
+from app.core.config import settings
+from app.services.parsers import TelemetryFrame
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "kartune:frame:"
+FORMAT_VERSION = 1
+
+# Seconds to skip Redis after a failure, so an outage costs one timeout per pause
+REDIS_RETRY_SECONDS = 30.0
+
+_LENGTH = struct.Struct("<I")
+
+CacheKey = tuple[str, tuple[str, ...], int | None, str | None]
+
+
+def cache_key(
+    file_hash: str, channels: list[str], max_points: int | None = None, method: str | None = None
+) -> CacheKey:
+    """Key for a frame of the given channels, optionally downsampled"""
+    return (file_hash, tuple(channels), max_points, method if max_points is not None else None)
+
+
+def dumps(frame: TelemetryFrame) -> bytes:
+    """Serialize a frame as a JSON header followed by the raw channel arrays"""
+    arrays = {name: np.ascontiguousarray(values) for name, values in frame.channels.items()}
+    header = {
+        "version": FORMAT_VERSION,
+        "rows": len(frame),
+        "channels": [[name, values.dtype.str] for name, values in arrays.items()],
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    return b"".join([_LENGTH.pack(len(header_bytes)), header_bytes, *(values.tobytes() for values in arrays.values())])
+
+
+def loads(data: bytes) -> TelemetryFrame | None:
+    """Inverse of dumps; None for data from another format version or corrupt data"""
+    try:
+        (header_length,) = _LENGTH.unpack_from(data)
+        header = json.loads(data[_LENGTH.size : _LENGTH.size + header_length])
+        if header.get("version") != FORMAT_VERSION:
+            return None
+        rows = int(header["rows"])
+        offset = _LENGTH.size + header_length
+        arrays = {}
+        for name, dtype_str in header["channels"]:
+            dtype = np.dtype(dtype_str)
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=rows, offset=offset)
+            offset += rows * dtype.itemsize
+        return TelemetryFrame(arrays)
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
+
+
+class FrameCache:
+    """Byte-bounded in-process LRU of telemetry frames with an optional shared Redis tier"""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        redis_client: Any | None = None,
+        redis_ttl: int = 3600,
+        redis_max_entry_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl
+        self.redis_max_entry_bytes = redis_max_entry_bytes
+        self._entries: OrderedDict[CacheKey, TelemetryFrame] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+        self._counters = dict.fromkeys(["hits", "misses", "evictions", "redis_hits", "redis_misses", "redis_errors"], 0)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key: CacheKey) -> TelemetryFrame | None:
+        """Frame from memory, then Redis (promoting it to memory); None on a miss"""
+        with self._lock:
+            frame = self._entries.get(key)
+            if frame is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return frame
+
+        frame = self._redis_get(key)
+        if frame is not None:
+            self._count("redis_hits")
+            self._put_memory(key, frame)
+            return frame
+        self._count("misses")
+        return None
+
+    def put(self, key: CacheKey, frame: TelemetryFrame) -> None:
+        """Store a frame in both tiers"""
+        self._put_memory(key, frame)
+        self._redis_set(key, frame)
+
+    def get_or_load(self, key: CacheKey, load: Callable[[], TelemetryFrame]) -> TelemetryFrame:
+        """Cached frame for key, calling load and caching its result on a miss"""
+        frame = self.get(key)
+        if frame is None:
+            frame = load()
+            self.put(key, frame)
+        return frame
+
+    def discard(self, file_hash: str) -> None:
+        """Drop a file's frames from memory (Redis entries expire on their own)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_hash]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def clear(self) -> None:
+        """Empty the memory tier and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counters = dict.fromkeys(self._counters, 0)
+            self._redis_retry_at = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and size of this process's cache"""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "redis_enabled": self.redis is not None,
+            }
+
+    def _put_memory(self, key: CacheKey, frame: TelemetryFrame) -> None:
+        size = frame.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = frame
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._counters["evictions"] += 1
+
+    @staticmethod
+    def _redis_key(key: CacheKey) -> str:
+        file_hash, channels, max_points, method = key
+        params = hashlib.sha256(json.dumps([channels, max_points, method]).encode("utf-8")).hexdigest()[:32]
+        return f"{KEY_PREFIX}{file_hash}:{params}"
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning("Telemetry cache Redis tier unavailable, skipping it for %.0fs: %s", REDIS_RETRY_SECONDS, e)
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        self._count("redis_errors")
+
+    def _redis_get(self, key: CacheKey) -> TelemetryFrame | None:
+        if not self._redis_available():
+            return None
+        try:
+            data = self.redis.get(self._redis_key(key))  # type: ignore[union-attr]
+        except (redis.RedisError, OSError) as e:
+            self._redis_failed(e)
+            return None
+        if data is None:
+            self._count("redis_misses")
+            return None
+        return loads(data)
+
+    def _redis_set(self, key: CacheKey, frame: TelemetryFrame) -> None:
+        if not self._redis_available() or frame.nbytes > self.redis_max_entry_bytes:
+            return
+        try:
+            self.redis.set(self._redis_key(key), dumps(frame), ex=self.redis_ttl)  # type: ignore[union-attr]
+        except (redis.RedisError, OSError) as e:
+            self._redis_failed(e)
+
+
+def _redis_client() -> redis.Redis | None:
+    if not settings.FRAME_CACHE_REDIS:
+        return None
+    # Short timeouts: a slow Redis must not cost more than re-reading the frame
+    timeout = settings.FRAME_CACHE_REDIS_TIMEOUT
+    return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+
+frame_cache = FrameCache(
+    settings.FRAME_CACHE_MAX_BYTES,
+    redis_client=_redis_client(),
+    redis_ttl=settings.FRAME_CACHE_REDIS_TTL,
+    redis_max_entry_bytes=settings.FRAME_CACHE_REDIS_MAX_ENTRY_BYTES,
+)
@@ -0,0 +1,275 @@
+"""
+Telemetry Ingest Pipeline
+
+Streams an uploaded file exactly once: the bytes are written to disk and
+hashed while the parser decodes them, and format detection plus metadata
+come from the leading block that was already read. Parsers decode the
+standard channels in batches of bounded size that are spooled next to the
+telemetry cache and assembled into its sidecar at the end, so memory per
+upload does not grow with the file. Other channels are decoded on first
+request.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator
+
+from app.services import telemetry_cache
+from app.services.parsers import STANDARD_CHANNELS, ParsedTelemetry, ParserRegistry, TelemetryParser
+
+logger = logging.getLogger(__name__)
+
+HEADER_BYTES = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# Channels cached at import; the first request for any other channel decodes the file again and caches them all
+CACHED_CHANNELS = STANDARD_CHANNELS
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a stream exceeds the allowed upload size"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File too large (max {max_size // (1024 * 1024)} MB)")
+        self.max_size = max_size
+
+
+@dataclass
+class IngestResult:
+    """Outcome of ingesting one telemetry file"""
+
+    file_path: Path
+    file_hash: str
+    size: int
+    parser: TelemetryParser | None = None
+    parsed: ParsedTelemetry | None = None
+    duplicate: bool = False
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per stage
+
+
+class _TeeReader(io.RawIOBase):
+    """
+    Raw stream over prefix + source that copies every byte read into a sink and a hash.
+
+    Raises UploadTooLargeError as soon as more than max_size bytes are read.
+    """
+
+    def __init__(self, prefix: bytes, source: BinaryIO, sink: BinaryIO, digest: Any, max_size: int | None = None):
+        self._prefix = memoryview(prefix)
+        self._source = source
+        self._sink = sink
+        self._digest = digest
+        self._max_size = max_size
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        if self._prefix:
+            n = min(len(view), len(self._prefix))
+            view[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+        else:
+            data = self._source.read(len(view))
+            n = len(data)
+            view[:n] = data
+        if self._max_size is not None and self.size + n > self._max_size:
+            raise UploadTooLargeError(self._max_size)
+        if n:
+            self._sink.write(view[:n])
+            self._digest.update(view[:n])
+            self.size += n
+        return n
+
+    def drain(self) -> None:
+        """Consume the rest of the source"""
+        buffer = bytearray(CHUNK_SIZE)
+        while self.readinto(buffer):
+            pass
+
+
+@contextmanager
+def _stage(timings: dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def store_file(source: BinaryIO, dest_path: Path, max_size: int | None = None) -> tuple[int, str]:
+    """
+    Copy a stream to disk in bounded chunks, hashing as it goes.
+
+    Returns:
+        (size in bytes, SHA256 hex digest). The partial file is removed if
+        the stream exceeds max_size.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(dest_path, "wb") as sink:
+            tee = _TeeReader(b"", source, sink, digest, max_size)
+            tee.drain()
+    except BaseException:
+        if dest_path.exists():
+            os.remove(dest_path)
+        raise
+    return tee.size, digest.hexdigest()
+
+
+def ingest_file(
+    source: BinaryIO,
+    dest_path: Path,
+    is_duplicate: Callable[[str], bool] | None = None,
+    max_size: int | None = None,
+) -> IngestResult:
+    """
+    Store, hash, detect, parse and cache a telemetry file in a single read.
+
+    Args:
+        source: Binary stream of the uploaded file
+        dest_path: Where the raw file is stored
+        is_duplicate: Called with the SHA256 once known; True skips the cache write
+        max_size: Abort with UploadTooLargeError once more bytes than this are read
+
+    Returns:
+        IngestResult; parser is None when the format is not recognised.
+        The stored file is removed again if ingest raises.
+    """
+    timings: dict[str, float] = {}
+    digest = hashlib.sha256()
+    parsed: ParsedTelemetry | None = None
+    writer: telemetry_cache.FrameWriter | None = None
+
+    try:
+        with _stage(timings, "sniff"):
+            header = source.read(HEADER_BYTES)
+            parser = ParserRegistry.detect_header(header, dest_path.suffix)
+
+        with open(dest_path, "wb") as sink:
+            tee = _TeeReader(header, source, sink, digest, max_size)
+            if parser is not None:
+                with _stage(timings, "metadata"):
+                    parsed = parser.parse_header(header, dest_path)
+                if parsed.has_detailed_telemetry:
+                    with _stage(timings, "decode"):
+                        writer = telemetry_cache.FrameWriter(telemetry_cache.sidecar_dir(dest_path))
+                        try:
+                            for batch in parser.iter_frame_batches(io.BufferedReader(tee, CHUNK_SIZE), CACHED_CHANNELS):
+                                writer.append(batch)
+                        except ValueError:
+                            # Needs a seekable copy; decoded again from disk below
+                            writer.discard()
+                            writer = None
+            with _stage(timings, "write"):
+                tee.drain()
+        size = tee.size
+
+        if parser is None:
+            # Parsers without header detection get the stored file
+            with _stage(timings, "sniff"):
+                parser = ParserRegistry.detect_parser(dest_path)
+            if parser is not None:
+                with _stage(timings, "metadata"):
+                    parsed = parser.parse(dest_path)
+        if parser is not None and parsed is not None and parsed.has_detailed_telemetry and writer is None:
+            with _stage(timings, "decode"):
+                writer = _decode_stored(parser, dest_path)
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        if dest_path.exists():
+            os.remove(dest_path)
+        raise
+
+    result = IngestResult(
+        file_path=dest_path,
+        file_hash=digest.hexdigest(),
+        size=size,
+        parser=parser,
+        parsed=parsed,
+        timings=timings,
+    )
+    if parser is None:
+        return result
+
+    if is_duplicate is not None and is_duplicate(result.file_hash):
+        if writer is not None:
+            writer.discard()
+        result.duplicate = True
+        return result
+
+    if writer is not None:
+        with _stage(timings, "cache"):
+            writer.commit(dest_path, result.file_hash)
+
+    logger.debug(
+        "Ingested %s (%d bytes): %s",
+        dest_path.name,
+        size,
+        ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items()),
+    )
+    return result
+
+
+def _decode_stored(parser: TelemetryParser, file_path: Path) -> telemetry_cache.FrameWriter:
+    """Decode a stored file batch by batch into a sidecar writer, ready to commit"""
+    writer = telemetry_cache.FrameWriter(telemetry_cache.sidecar_dir(file_path))
+    try:
+        if type(parser).can_parse_header is TelemetryParser.can_parse_header:
+            # Parsers without stream decoding only read whole files
+            writer.append(parser.read_frame(file_path, CACHED_CHANNELS))
+        else:
+            with open(file_path, "rb") as f:
+                for batch in parser.iter_frame_batches(f, CACHED_CHANNELS):
+                    writer.append(batch)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer
+
+
+def parse_stored_file(file_path: Path, file_hash: str) -> IngestResult:
+    """
+    Detect, parse and cache a file that is already on disk.
+
+    Used when files are stored first and decoded elsewhere (e.g. in a
+    process pool); the parsed frame goes straight to the binary cache so
+    only metadata travels back to the caller. The file is removed if
+    parsing raises.
+    """
+    timings: dict[str, float] = {}
+    try:
+        with _stage(timings, "sniff"):
+            with open(file_path, "rb") as f:
+                header = f.read(HEADER_BYTES)
+            parser = ParserRegistry.detect_header(header, file_path.suffix)
+            from_header = parser is not None
+            if parser is None:
+                parser = ParserRegistry.detect_parser(file_path)
+        result = IngestResult(
+            file_path=file_path, file_hash=file_hash, size=file_path.stat().st_size, parser=parser, timings=timings
+        )
+        if parser is None:
+            return result
+
+        with _stage(timings, "metadata"):
+            result.parsed = parser.parse_header(header, file_path) if from_header else parser.parse(file_path)
+        if result.parsed.has_detailed_telemetry:
+            with _stage(timings, "decode"):
+                writer = _decode_stored(parser, file_path)
+            with _stage(timings, "cache"):
+                writer.commit(file_path, file_hash)
+    except BaseException:
+        if file_path.exists():
+            os.remove(file_path)
+        raise
+    return result
@@ -0,0 +1,213 @@
+"""
+Background Ingest Queue
+
+Jobs are JSON documents stored in Redis under kartune:ingest:job:<id>,
+with job ids pushed onto the kartune:ingest:queue list. The API enqueues
+jobs after storing the raw files; workers (app.worker) take them and
+record per-file progress back into the job document.
+
+A worker takes a job by moving its id onto kartune:ingest:queue:processing
+(BLMOVE) and removes it from there when the job finishes, so a job whose
+worker dies is not lost: once it has not been saved for
+STALLED_JOB_SECONDS, requeue_stalled() puts it back on the queue and
+another worker resumes its pending files.
+
+Job document:
+  id, status (queued/running/completed/failed), team_id, user_id,
+  created_at, started_at, updated_at, finished_at, error,
+  files: [{filename, path, status (pending/done/error), error, lap_id}],
+  result: LapUploadResponse fields once completed
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.redis import get_redis
+
+QUEUE_KEY = "kartune:ingest:queue"
+JOB_KEY_PREFIX = "kartune:ingest:job:"
+JOB_TTL_SECONDS = 7 * 24 * 3600
+# A running job not saved for this long is presumed to belong to a dead worker
+STALLED_JOB_SECONDS = 15 * 60
+
+
+class InMemoryRedis:
+    """Thread-safe stand-in for the few Redis commands the queue uses (tests, single-process dev)"""
+
+    def __init__(self) -> None:
+        self._values: dict[str, bytes] = {}
+        self._lists: defaultdict[str, deque[bytes]] = defaultdict(deque)
+        self._changed = threading.Condition()
+
+    @staticmethod
+    def _encode(value: str | bytes) -> bytes:
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+    def get(self, name: str) -> bytes | None:
+        with self._changed:
+            return self._values.get(name)
+
+    def set(self, name: str, value: str | bytes, ex: int | None = None) -> bool:
+        with self._changed:
+            self._values[name] = self._encode(value)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._changed:
+            return sum(self._values.pop(name, None) is not None for name in names)
+
+    def rpush(self, name: str, *values: str | bytes) -> int:
+        with self._changed:
+            self._lists[name].extend(self._encode(v) for v in values)
+            self._changed.notify_all()
+            return len(self._lists[name])
+
+    def blpop(self, keys: str | list[str], timeout: float = 0) -> tuple[bytes, bytes] | None:
+        names = [keys] if isinstance(keys, str) else list(keys)
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._changed:
+            while True:
+                for name in names:
+                    if self._lists[name]:
+                        return name.encode("utf-8"), self._lists[name].popleft()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def blmove(
+        self, first_list: str, second_list: str, timeout: float, src: str = "LEFT", dest: str = "RIGHT"
+    ) -> bytes | None:
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._changed:
+            while True:
+                source = self._lists[first_list]
+                if source:
+                    value = source.popleft() if src == "LEFT" else source.pop()
+                    if dest == "RIGHT":
+                        self._lists[second_list].append(value)
+                    else:
+                        self._lists[second_list].appendleft(value)
+                    return value
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def lrem(self, name: str, count: int, value: str | bytes) -> int:
+        value = self._encode(value)
+        with self._changed:
+            items = self._lists[name]
+            removed = 0
+            for _ in range(count if count > 0 else len(items)):
+                try:
+                    items.remove(value)
+                except ValueError:
+                    break
+                removed += 1
+            return removed
+
+    def lrange(self, name: str, start: int, end: int) -> list[bytes]:
+        with self._changed:
+            items = list(self._lists[name])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class IngestQueue:
+    """Enqueue, fetch and update background ingest jobs"""
+
+    def __init__(self, client: Any, queue_key: str = QUEUE_KEY):
+        self.client = client
+        self.queue_key = queue_key
+        self.processing_key = f"{queue_key}:processing"
+
+    def enqueue(self, job_id: str, team_id: int, user_id: int, files: list[dict[str, Any]]) -> dict[str, Any]:
+        """Store a new job and push it onto the queue"""
+        job: dict[str, Any] = {
+            "id": job_id,
+            "status": "queued",
+            "team_id": team_id,
+            "user_id": user_id,
+            "created_at": _now(),
+            "started_at": None,
+            "updated_at": None,
+            "finished_at": None,
+            "error": None,
+            "files": [{"error": None, "lap_id": None, **f} for f in files],
+            "result": None,
+        }
+        self.save_job(job)
+        self.client.rpush(self.queue_key, job_id)
+        return job
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        raw = self.client.get(JOB_KEY_PREFIX + job_id)
+        return json.loads(raw) if raw else None
+
+    def save_job(self, job: dict[str, Any]) -> None:
+        job["updated_at"] = _now()
+        self.client.set(JOB_KEY_PREFIX + job["id"], json.dumps(job), ex=JOB_TTL_SECONDS)
+
+    def next_job(self, timeout: float = 5) -> dict[str, Any] | None:
+        """Block until a queued job is available (or timeout), move it to processing and mark it running"""
+        moved = self.client.blmove(self.queue_key, self.processing_key, timeout, "LEFT", "RIGHT")
+        if moved is None:
+            return None
+        job_id = moved.decode("utf-8") if isinstance(moved, bytes) else moved
+        job = self.get_job(job_id)
+        if job is None:
+            # Expired before a worker got to it
+            self.client.lrem(self.processing_key, 1, job_id)
+            return None
+        job["status"] = "running"
+        job["started_at"] = _now()
+        self.save_job(job)
+        return job
+
+    def finish_job(self, job: dict[str, Any], result: dict[str, Any] | None = None, error: str | None = None) -> None:
+        """Record the outcome of a job and acknowledge it"""
+        job["status"] = "failed" if error else "completed"
+        job["finished_at"] = _now()
+        job["result"] = result
+        job["error"] = error
+        self.save_job(job)
+        self.client.lrem(self.processing_key, 1, job["id"])
+
+    def requeue_stalled(self, stalled_seconds: float = STALLED_JOB_SECONDS) -> list[str]:
+        """
+        Put running jobs not saved for stalled_seconds back on the queue.
+
+        Ids of finished or expired jobs left in processing are dropped.
+        Returns the requeued job ids.
+        """
+        now = datetime.now(timezone.utc)
+        requeued = []
+        for raw in self.client.lrange(self.processing_key, 0, -1):
+            job_id = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            job = self.get_job(job_id)
+            status = job["status"] if job is not None else None
+            if status == "queued":
+                # Just taken; next_job is about to mark it running
+                continue
+            if status == "running":
+                saved_at = datetime.fromisoformat(job["updated_at"] or job["started_at"])  # type: ignore[index]
+                if (now - saved_at).total_seconds() < stalled_seconds:
+                    continue
+            # Stalled, finished or expired; removing it first means only one caller requeues the job
+            if self.client.lrem(self.processing_key, 1, job_id) and status == "running":
+                self.client.rpush(self.queue_key, job_id)
+                requeued.append(job_id)
+        return requeued
+
+
+def get_ingest_queue() -> IngestQueue:
+    """FastAPI dependency for the Redis-backed ingest queue"""
+    return IngestQueue(get_redis())
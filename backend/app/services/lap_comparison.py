@@ -0,0 +1,117 @@
+"""
+Lap Comparison Service
+
+Aligns laps on a common distance grid so their channels can be compared
+point by point, and computes the cumulative time delta of each lap
+against a reference lap.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.parsers import TelemetryFrame
+
+DISTANCE_CHANNEL = "distance_m"
+TIME_CHANNEL = "time_s"
+
+# Channels holding discrete states; resampled by holding the previous sample
+STEP_CHANNELS = {"gear"}
+
+
+@dataclass
+class LapComparison:
+    """Laps resampled onto one distance grid"""
+
+    distance_m: np.ndarray
+    reference: int  # Position of the reference lap in channels/delta_s
+    channels: list[dict[str, np.ndarray]]  # Per lap, channel -> values on the grid
+    delta_s: list[np.ndarray]  # Per lap, time lost (+) or gained (-) against the reference
+
+
+def _monotonic_distance(frame: TelemetryFrame) -> np.ndarray:
+    # Sensor noise can make distance step backwards; never let it decrease
+    return np.maximum.accumulate(np.nan_to_num(frame[DISTANCE_CHANNEL].astype(np.float64), nan=0.0))
+
+
+def distance_grid(frames: list[TelemetryFrame], step_m: float, max_points: int | None = None) -> np.ndarray:
+    """
+    Grid over the distance covered by every lap.
+
+    The step is widened when the grid would exceed max_points.
+    """
+    starts, ends = [], []
+    for frame in frames:
+        distance = _monotonic_distance(frame)
+        if len(distance) == 0:
+            return np.empty(0)
+        starts.append(distance[0])
+        ends.append(distance[-1])
+    start, end = max(starts), min(ends)
+    if end <= start:
+        return np.array([start])
+    if max_points is not None and (end - start) / step_m + 1 > max_points:
+        step_m = (end - start) / (max_points - 1)
+    count = int(np.floor((end - start) / step_m + 1e-9)) + 1
+    return start + np.arange(count) * step_m
+
+
+def resample(frame: TelemetryFrame, grid: np.ndarray, channels: list[str]) -> dict[str, np.ndarray]:
+    """
+    Linearly interpolate channels of a frame onto a distance grid.
+
+    The bracketing samples and weights are found once per lap and applied
+    to all channels together.
+    """
+    distance = _monotonic_distance(frame)
+    n = len(distance)
+    if n < 2:
+        return {name: np.full(len(grid), frame[name][0] if n else np.nan) for name in channels}
+
+    right = np.clip(np.searchsorted(distance, grid, side="left"), 1, n - 1)
+    left = right - 1
+    span = distance[right] - distance[left]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(span > 0, (grid - distance[left]) / span, 0.0)
+    weight = np.clip(weight, 0.0, 1.0)
+
+    values = np.vstack([frame[name].astype(np.float64) for name in channels]) if channels else np.empty((0, n))
+    interpolated = values[:, left] * (1.0 - weight) + values[:, right] * weight
+    stepped = np.where(weight >= 1.0, values[:, right], values[:, left])
+
+    return {
+        name: np.ascontiguousarray(stepped[i] if name in STEP_CHANNELS else interpolated[i])
+        for i, name in enumerate(channels)
+    }
+
+
+def compare_laps(
+    frames: list[TelemetryFrame],
+    channels: list[str],
+    reference: int = 0,
+    step_m: float = 1.0,
+    max_points: int | None = None,
+) -> LapComparison:
+    """
+    Resample laps onto a shared distance grid and compute delta time.
+
+    Args:
+        frames: Telemetry per lap; each needs distance_m and time_s
+        channels: Channels to resample for every lap
+        reference: Position of the reference lap in frames
+        step_m: Grid spacing in metres
+        max_points: Upper bound on grid size (the step is widened to fit)
+    """
+    grid = distance_grid(frames, step_m, max_points)
+    resampled = [resample(frame, grid, list(dict.fromkeys([*channels, TIME_CHANNEL]))) for frame in frames]
+
+    # Elapsed time since the start of the common grid, so laps starting at different distances still line up
+    elapsed = [lap[TIME_CHANNEL] - lap[TIME_CHANNEL][0] if len(grid) else lap[TIME_CHANNEL] for lap in resampled]
+    delta = [lap_elapsed - elapsed[reference] for lap_elapsed in elapsed]
+
+    return LapComparison(
+        distance_m=grid,
+        reference=reference,
+        channels=[{name: lap[name] for name in channels} for lap in resampled],
+        delta_s=delta,
+    )
@@ -0,0 +1,506 @@
+"""
+Lap Import Service
+
+Turns telemetry files into Lap rows for a team: runs the ingest pipeline,
+finds or creates drivers, tracks, karts and sessions, and adds the laps
+to the session statistics. Shared by the upload endpoint and the ingest worker.
+
+LapImporter works on a sync Session. AsyncLapImporter serves async endpoints:
+files are stored, hashed and parsed in a worker thread, and every database
+step is sent back to the event loop to run on an AsyncSession.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Sequence, TypeVar
+
+from anyio import from_thread, to_thread
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import upsert_insert
+from app.models.driver import Driver
+from app.models.equipment import Kart
+from app.models.lap import Lap
+from app.models.session import Session as RacingSession  # Avoid conflict with db Session
+from app.models.track import Track
+from app.schemas.lap import LapResponse, LapUploadResponse
+from app.services import ingest, session_stats, telemetry_cache
+
+T = TypeVar("T")
+
+DUPLICATE_FILE = "Duplicate file (already imported)"
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Shared process pool for decoding uploaded files, created on first use"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn: forking a threaded server process can copy held locks into the children
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def replace_broken_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Drop a pool whose worker died so the next get_parse_pool() starts a fresh one.
+
+    Does nothing to a pool another caller already replaced, and cancels no
+    futures: those of other batches fail on their own or keep running.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parse pool at application shutdown"""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_stored_file(file_path: Path, file_hash: str) -> ingest.IngestResult:
+    # Runs in a pool process; importing this module there registers the parsers
+    return ingest.parse_stored_file(file_path, file_hash)
+
+
+def existing_hashes(db: Session, team_id: int, hashes: Iterable[str]) -> set[str]:
+    """Which of these SHA256 digests the team has already imported, in one (team_id, file_hash) index lookup"""
+    hashes = set(hashes)
+    if not hashes:
+        return set()
+    return set(db.scalars(select(Lap.file_hash).where(Lap.team_id == team_id, Lap.file_hash.in_(hashes))))
+
+
+def lap_exists(db: Session, team_id: int, file_hash: str) -> bool:
+    """Check whether the team already imported a file with this SHA256"""
+    return bool(existing_hashes(db, team_id, [file_hash]))
+
+
+def _upsert_names(db: Session, model: Any, name_column: str, rows: list[dict[str, Any]], key: list[str]) -> set[str]:
+    """
+    Insert rows unless their key already exists, in one statement.
+
+    Returns the names that were actually inserted; rows that lost a race
+    to a concurrent import are skipped by ON CONFLICT DO NOTHING.
+    """
+    if not rows:
+        return set()
+    statement = upsert_insert(db, model).values(rows).on_conflict_do_nothing(index_elements=key)
+    return set(db.scalars(statement.returning(getattr(model, name_column))))
+
+
+def resolve_drivers(db: Session, team_id: int, names: set[str]) -> tuple[dict[str, int], set[str]]:
+    """Driver ids by name for a team, creating missing drivers; also returns the created names"""
+    created = _upsert_names(
+        db, Driver, "name", [{"team_id": team_id, "name": name} for name in sorted(names)], ["team_id", "name"]
+    )
+    rows = db.query(Driver.name, Driver.id).filter(Driver.team_id == team_id, Driver.name.in_(names))
+    return dict(rows.tuples()), created
+
+
+def resolve_tracks(db: Session, names: set[str]) -> tuple[dict[str, int], set[str]]:
+    """Track ids by name, creating missing tracks (tracks are global, not team-specific)"""
+    created = _upsert_names(db, Track, "name", [{"name": name} for name in sorted(names)], ["name"])
+    rows = db.query(Track.name, Track.id).filter(Track.name.in_(names))
+    return dict(rows.tuples()), created
+
+
+def resolve_karts(db: Session, team_id: int, names: set[str]) -> tuple[dict[str, int], set[str]]:
+    """Kart ids by telemetry car name for a team, creating missing karts"""
+    # Matched on import_name, so karts the team added itself are never merged or blocked
+    created = _upsert_names(
+        db,
+        Kart,
+        "import_name",
+        [
+            {"team_id": team_id, "chassis_brand": name, "chassis_model": name, "import_name": name}
+            for name in sorted(names)
+        ],
+        ["team_id", "import_name"],
+    )
+    rows = db.query(Kart.import_name, Kart.id).filter(Kart.team_id == team_id, Kart.import_name.in_(names))
+    return dict(rows.tuples()), created
+
+
+SessionKey = tuple[int, int, int, date]  # driver_id, track_id, kart_id, day
+
+
+def session_key(lap: Lap) -> SessionKey:
+    return (int(lap.driver_id), int(lap.track_id), int(lap.kart_id), lap.recorded_at.date())  # type: ignore
+
+
+def resolve_sessions(db: Session, team_id: int, laps: Sequence[Lap]) -> dict[SessionKey, int]:
+    """
+    Session ids for laps with resolved driver, track and kart ids, creating missing sessions.
+
+    Laps join the imported session of the same team, driver, track and kart
+    on the same day. Existing candidates are fetched with one query and new
+    sessions inserted with one statement. The first lap weather other than
+    the "sunny" default is applied to its session.
+    """
+    # Weather to apply per session key; "" keeps the default
+    weather: dict[SessionKey, str] = {}
+    first_recorded: dict[SessionKey, datetime] = {}
+    for lap in laps:
+        key = session_key(lap)
+        first_recorded.setdefault(key, lap.recorded_at)  # type: ignore[arg-type]
+        if not weather.get(key):
+            weather[key] = str(lap.weather) if lap.weather and lap.weather != "sunny" else ""
+
+    days = [key[3] for key in weather]
+    first_day = datetime.combine(min(days), datetime.min.time())
+    last_day = datetime.combine(max(days), datetime.max.time())
+    candidates = (
+        db.query(
+            RacingSession.id,
+            RacingSession.driver_id,
+            RacingSession.track_id,
+            RacingSession.kart_id,
+            RacingSession.session_date,
+            RacingSession.weather_condition,
+        )
+        .filter(
+            RacingSession.team_id == team_id,
+            RacingSession.driver_id.in_({key[0] for key in weather}),
+            RacingSession.track_id.in_({key[1] for key in weather}),
+            RacingSession.kart_id.in_({key[2] for key in weather}),
+            RacingSession.session_date >= first_day,
+            RacingSession.session_date <= last_day,
+            # Prefer sessions created by telemetry import
+            RacingSession.data_source == "telemetry_import",
+        )
+        .order_by(RacingSession.id)
+    )
+
+    sessions: dict[SessionKey, int] = {}
+    for session_id, driver_id, track_id, kart_id, session_date, condition in candidates:
+        key = (driver_id, track_id, kart_id, session_date.date())
+        if key in weather and key not in sessions:
+            sessions[key] = session_id
+            if condition == "sunny" and weather[key]:
+                db.execute(
+                    update(RacingSession)
+                    .where(RacingSession.id == session_id, RacingSession.weather_condition == "sunny")
+                    .values(weather_condition=weather[key])
+                )
+
+    missing = [key for key in weather if key not in sessions]
+    if missing:
+        rows = [
+            {
+                "team_id": team_id,
+                "driver_id": key[0],
+                "track_id": key[1],
+                "kart_id": key[2],
+                "session_date": first_recorded[key],
+                "session_type": "Practice",  # Default, can be updated later
+                "data_source": "telemetry_import",
+                "weather_condition": weather[key] or "sunny",  # Default, updated from lap data
+                "track_condition": "dry",
+            }
+            for key in missing
+        ]
+        # One statement on PostgreSQL; SQLite inserts row by row to keep RETURNING in order
+        ids = db.scalars(insert(RacingSession).returning(RacingSession.id, sort_by_parameter_order=True), rows)
+        sessions.update(zip(missing, ids, strict=True))
+    return sessions
+
+
+class LapImporter:
+    """
+    Imports a batch of telemetry files for one team.
+
+    Call import_file() per file or import_files() per batch, then finish() once to resolve
+    entities in bulk, commit the laps and build the upload response.
+    """
+
+    def __init__(self, db: Session, team_id: int):
+        self.db = db
+        self.team_id = team_id
+        self.laps: list[Lap] = []
+        self.errors: list[str] = []
+        self.created_drivers: set[str] = set()
+        self.created_tracks: set[str] = set()
+        self.created_karts: set[str] = set()
+        self.seen_hashes: set[str] = set()
+        self.timings: dict[str, float] = {}
+        self.upload_dir = os.path.join(settings.UPLOAD_DIR, str(team_id), "telemetry")
+
+    def _run_db(self, work: Callable[[Session], T]) -> T:
+        """Run a database step on the importer's session"""
+        return work(self.db)
+
+    def _new_file_path(self, filename: str | None) -> str:
+        os.makedirs(self.upload_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.upload_dir, f"{timestamp}_{filename}")
+
+    def _is_duplicate(self, file_hash: str) -> bool:
+        """True for a file already imported by the team or earlier in this batch"""
+        if file_hash in self.seen_hashes:
+            return True
+        self.seen_hashes.add(file_hash)
+        return self._run_db(lambda db: lap_exists(db, self.team_id, file_hash))
+
+    def _add_timings(self, timings: dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def import_file(self, source: BinaryIO, filename: str | None, size: int | None = None) -> Lap | None:
+        """
+        Ingest one file and stage its Lap row.
+
+        Returns the staged Lap, or None with the reason appended to errors.
+        """
+        try:
+            file_path = self._new_file_path(filename)
+
+            if size is not None and size > settings.MAX_UPLOAD_SIZE:
+                raise ingest.UploadTooLargeError(settings.MAX_UPLOAD_SIZE)
+
+            # Store, hash, parse and cache in a single bounded pass over the upload
+            result = ingest.ingest_file(
+                source,
+                Path(file_path),
+                is_duplicate=self._is_duplicate,
+                max_size=settings.MAX_UPLOAD_SIZE,
+            )
+            self._add_timings(result.timings)
+            return self._stage_lap(filename, result)
+
+        except Exception as e:
+            self.errors.append(f"{filename}: {str(e)}")
+            return None
+
+    def import_files(self, uploads: Sequence[tuple[BinaryIO, str | None, int | None]]) -> list[Lap | None]:
+        """
+        Ingest a batch of (source, filename, size) uploads.
+
+        Files are stored and hashed here, then decoded in parallel on the
+        parse pool; entity resolution and Lap rows follow in upload order,
+        so errors read exactly as with import_file().
+        """
+        workers = min(settings.PARSE_WORKERS, len(uploads))
+        if workers <= 1:
+            return [self.import_file(source, filename, size) for source, filename, size in uploads]
+
+        pool = get_parse_pool()
+        pending: list[tuple[str | None, Future[ingest.IngestResult] | ingest.IngestResult | Exception]] = []
+        # Pool and stored path of each parse, to replace the pool and remove the file if a worker dies
+        submitted: dict[Future[ingest.IngestResult], tuple[ProcessPoolExecutor, Path]] = {}
+        for source, filename, size in uploads:
+            file_path = Path(self._new_file_path(filename))
+            try:
+                if size is not None and size > settings.MAX_UPLOAD_SIZE:
+                    raise ingest.UploadTooLargeError(settings.MAX_UPLOAD_SIZE)
+                start = time.perf_counter()
+                stored_size, file_hash = ingest.store_file(source, file_path, max_size=settings.MAX_UPLOAD_SIZE)
+                self._add_timings({"write": time.perf_counter() - start})
+            except Exception as e:
+                pending.append((filename, e))
+                continue
+
+            if self._is_duplicate(file_hash):
+                # Already imported, so the format is known; skip decoding it again
+                pending.append(
+                    (filename, ingest.IngestResult(file_path, file_hash, stored_size, parser=None, duplicate=True))
+                )
+            else:
+                try:
+                    future = pool.submit(_parse_stored_file, file_path, file_hash)
+                except BrokenProcessPool:
+                    # Broken by an earlier batch; this file goes to a fresh pool
+                    replace_broken_parse_pool(pool)
+                    pool = get_parse_pool()
+                    future = pool.submit(_parse_stored_file, file_path, file_hash)
+                submitted[future] = (pool, file_path)
+                pending.append((filename, future))
+
+        laps: list[Lap | None] = []
+        for filename, outcome in pending:
+            try:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                result = outcome.result() if isinstance(outcome, Future) else outcome
+                self._add_timings(result.timings)
+                laps.append(self._stage_lap(filename, result))
+            except BrokenProcessPool as e:
+                broken_pool, file_path = submitted[outcome]  # type: ignore[index]
+                replace_broken_parse_pool(broken_pool)
+                # The worker died before it could remove the stored file itself
+                if file_path.exists():
+                    os.remove(file_path)
+                self.errors.append(f"{filename}: {str(e)}")
+                laps.append(None)
+            except Exception as e:
+                self.errors.append(f"{filename}: {str(e)}")
+                laps.append(None)
+        return laps
+
+    def _stage_lap(self, filename: str | None, result: ingest.IngestResult) -> Lap | None:
+        """Stage the Lap row for an ingested file; its entities are resolved in finish()"""
+        file_path = str(result.file_path)
+        if result.duplicate:
+            self.errors.append(f"{filename}: {DUPLICATE_FILE}")
+            os.remove(file_path)
+            return None
+
+        if not result.parser or not result.parsed:
+            self.errors.append(f"{filename}: Unknown format")
+            os.remove(file_path)
+            return None
+
+        parsed = result.parsed
+
+        lap = Lap(
+            team_id=self.team_id,
+            original_filename=filename or "unknown",
+            file_path=file_path,
+            file_hash=result.file_hash,
+            source_format=parsed.metadata.source_format,
+            driver_name=parsed.metadata.driver_name,
+            track_name=parsed.metadata.track_name,
+            car_name=parsed.metadata.car_name,
+            event_type=parsed.metadata.event_type,
+            lap_number=parsed.lap_summary.lap_number,
+            lap_time_ms=parsed.lap_summary.lap_time_ms,
+            sector1_ms=parsed.lap_summary.sector1_ms,
+            sector2_ms=parsed.lap_summary.sector2_ms,
+            sector3_ms=parsed.lap_summary.sector3_ms,
+            sector4_ms=parsed.lap_summary.sector4_ms,
+            valid=parsed.lap_summary.valid,
+            weather=parsed.lap_summary.weather,
+            track_temp_c=parsed.lap_summary.track_temp_c,
+            air_temp_c=parsed.lap_summary.air_temp_c,
+            tire_compound=parsed.lap_summary.tire_compound,
+            recorded_at=parsed.metadata.session_date,
+            imported_at=datetime.utcnow(),
+            has_detailed_telemetry=parsed.has_detailed_telemetry,
+            telemetry_columns=parsed.telemetry_columns or None,
+        )
+        self.laps.append(lap)
+        return lap
+
+    def _resolve_entities(self, db: Session) -> None:
+        """Resolve drivers, tracks, karts and sessions of the staged laps with a few bulk statements"""
+        drivers, created = resolve_drivers(db, self.team_id, {str(lap.driver_name) for lap in self.laps})
+        self.created_drivers |= created
+        tracks, created = resolve_tracks(db, {str(lap.track_name) for lap in self.laps})
+        self.created_tracks |= created
+        karts, created = resolve_karts(db, self.team_id, {str(lap.car_name) for lap in self.laps})
+        self.created_karts |= created
+
+        for lap in self.laps:
+            lap.driver_id = drivers[str(lap.driver_name)]  # type: ignore[assignment]
+            lap.track_id = tracks[str(lap.track_name)]  # type: ignore[assignment]
+            lap.kart_id = karts[str(lap.car_name)]  # type: ignore[assignment]
+
+        sessions = resolve_sessions(db, self.team_id, self.laps)
+        for lap in self.laps:
+            lap.session_id = sessions[session_key(lap)]  # type: ignore[assignment]
+
+    def _insert_laps(self, db: Session) -> list[Lap]:
+        """
+        Insert all staged laps with one statement and record their ids.
+
+        A file imported concurrently by another upload of the same team hits
+        the (team_id, file_hash) unique index; it is skipped, reported as a
+        duplicate and returned so its files can be removed.
+        """
+        columns = [column.key for column in Lap.__table__.columns if column.key != "id"]
+        rows = [{key: getattr(lap, key) for key in columns} for lap in self.laps]
+        statement = (
+            upsert_insert(db, Lap.__table__)
+            .on_conflict_do_nothing(index_elements=["team_id", "file_hash"])
+            # Matched by the unique stored path: ordered RETURNING would fall back to a statement per row on SQLite
+            .returning(Lap.file_path, Lap.id)
+        )
+        ids = dict(db.execute(statement, rows).tuples().all())
+
+        inserted, skipped = [], []
+        for lap in self.laps:
+            lap_id = ids.get(str(lap.file_path))
+            if lap_id is None:
+                self.errors.append(f"{lap.original_filename}: {DUPLICATE_FILE}")
+                skipped.append(lap)
+                continue
+            lap.id = lap_id  # type: ignore[assignment]
+            inserted.append(lap)
+        self.laps = inserted
+        return skipped
+
+    def _write_laps(self, db: Session) -> list[Lap]:
+        """
+        Resolve entities, insert the staged laps and their sessions' totals in one transaction.
+
+        Returns the laps skipped as concurrent duplicates.
+        """
+        skipped = []
+        if self.laps:
+            self._resolve_entities(db)
+            skipped = self._insert_laps(db)
+            session_stats.add_laps(db, self.laps)
+        db.commit()
+        return skipped
+
+    def finish(self) -> LapUploadResponse:
+        """Write the staged laps and summarise the import"""
+        for lap in self._run_db(self._write_laps):
+            os.remove(str(lap.file_path))
+            telemetry_cache.remove_frame(str(lap.file_path), str(lap.file_hash))
+
+        return LapUploadResponse(
+            uploaded=len(self.laps),
+            laps=[LapResponse.model_validate(lap) for lap in self.laps],
+            errors=self.errors,
+            created_drivers=list(self.created_drivers),
+            created_tracks=list(self.created_tracks),
+            created_karts=list(self.created_karts),
+            timings_ms={stage: round(seconds * 1000, 3) for stage, seconds in self.timings.items()},
+        )
+
+
+class AsyncLapImporter(LapImporter):
+    """
+    LapImporter for async endpoints.
+
+    run() ingests the batch in a worker thread; each database step hops back
+    to the event loop and runs on the AsyncSession, so neither file I/O,
+    parsing nor queries block the loop.
+    """
+
+    def __init__(self, db: AsyncSession, team_id: int):
+        super().__init__(db.sync_session, team_id)
+        self.async_db = db
+
+    def _run_db(self, work: Callable[[Session], T]) -> T:
+        # Called from the worker thread started by run()
+        return from_thread.run(self.async_db.run_sync, work)
+
+    def _import_and_finish(self, uploads: Sequence[tuple[BinaryIO, str | None, int | None]]) -> LapUploadResponse:
+        self.import_files(uploads)
+        return self.finish()
+
+    async def run(self, uploads: Sequence[tuple[BinaryIO, str | None, int | None]]) -> LapUploadResponse:
+        """Import a batch of (source, filename, size) uploads and commit it"""
+        return await to_thread.run_sync(self._import_and_finish, uploads)
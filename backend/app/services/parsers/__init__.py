@@ -5,11 +5,18 @@ Base classes and interfaces for parsing telemetry data from various sources.
 Supports: rF2/KartSim (now), Alfano/Micron (future)
 """
 
+import logging
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from importlib import import_module
+from importlib.metadata import entry_points
 from pathlib import Path
-from typing import Iterator
+from typing import BinaryIO, Iterable, Iterator, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -59,6 +66,91 @@ class TelemetryDataPoint:
     g_long: float | None = None
 
 
+# Channels of TelemetryDataPoint, in field order
+STANDARD_CHANNELS: tuple[str, ...] = tuple(f.name for f in fields(TelemetryDataPoint))
+
+
+@dataclass
+class TelemetryFrame:
+    """
+    Columnar telemetry: one NumPy array per channel, all of the same length.
+
+    Optional channels that are missing in a sample hold NaN.
+    """
+
+    channels: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        for values in self.channels.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.channels[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.channels
+
+    @property
+    def channel_names(self) -> list[str]:
+        return list(self.channels)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.channels.values())
+
+    def select(self, names: Iterable[str]) -> "TelemetryFrame":
+        """Return a frame holding only the given channels (arrays are shared, not copied)"""
+        return TelemetryFrame({name: self.channels[name] for name in names})
+
+    def iter_points(self) -> Iterator[TelemetryDataPoint]:
+        """Yield TelemetryDataPoint rows; requires all standard channels"""
+        columns = []
+        for name in STANDARD_CHANNELS:
+            values = self.channels[name]
+            if name == "gear":
+                columns.append(values.astype(np.int64).tolist())
+            elif name in ("g_lat", "g_long"):
+                # NaN marks a missing optional value
+                columns.append([None if v != v else v for v in values.tolist()])
+            else:
+                columns.append(values.tolist())
+        for row in zip(*columns, strict=True):
+            yield TelemetryDataPoint(*row)
+
+    def take(self, indices: np.ndarray) -> "TelemetryFrame":
+        """Return a frame holding the samples at the given indices"""
+        return TelemetryFrame({name: values[indices] for name, values in self.channels.items()})
+
+    def to_records(self, names: Sequence[str] | None = None, labels: Sequence[str] | None = None) -> list[dict]:
+        """
+        Row-oriented dicts of the given channels (all channels by default).
+
+        Keys are taken from labels when given. gear becomes int and NaN becomes None.
+        """
+        names = list(self.channels) if names is None else list(names)
+        labels = names if labels is None else list(labels)
+        columns = []
+        for name in names:
+            values = self.channels[name]
+            if name == "gear":
+                columns.append(values.astype(np.int64).tolist())
+            elif np.isnan(values).any():
+                columns.append([None if v != v else v for v in values.tolist()])
+            else:
+                columns.append(values.tolist())
+        return [dict(zip(labels, row, strict=True)) for row in zip(*columns, strict=True)]
+
+    @classmethod
+    def from_points(cls, points: Iterable[TelemetryDataPoint]) -> "TelemetryFrame":
+        """Build a frame from row-oriented data points"""
+        rows = [tuple(getattr(p, name) for name in STANDARD_CHANNELS) for p in points]
+        if not rows:
+            return cls({name: np.empty(0, dtype=np.float64) for name in STANDARD_CHANNELS})
+        table = np.array(rows, dtype=np.float64)  # None becomes NaN
+        return cls({name: np.ascontiguousarray(table[:, i]) for i, name in enumerate(STANDARD_CHANNELS)})
+
+
 @dataclass
 class ParsedTelemetry:
     """Complete parsed telemetry file result"""
@@ -100,34 +192,189 @@ class TelemetryParser(ABC):
         """Stream telemetry data points for memory-efficient processing"""
         pass
 
+    def can_parse_header(self, header: bytes) -> bool:
+        """
+        Check the format from the leading bytes of a file.
+
+        Parsers returning True must also implement parse_header() and
+        read_frame_stream(). The default defers to path-based can_parse().
+        """
+        return False
+
+    def parse_header(self, header: bytes, file_path: Path) -> ParsedTelemetry:
+        """Parse metadata and lap summary from the leading bytes of a file"""
+        raise NotImplementedError(f"{self.format_name} parser has no header parsing")
+
+    def read_frame_stream(self, stream: BinaryIO, channels: Sequence[str] | None = None) -> TelemetryFrame:
+        """Decode telemetry, optionally only the given frame channels, from a stream at the start of the file"""
+        raise NotImplementedError(f"{self.format_name} parser has no stream decoding")
+
+    def iter_frame_batches(self, stream: BinaryIO, channels: Sequence[str] | None = None) -> Iterator[TelemetryFrame]:
+        """
+        Decode a stream at the start of the file as consecutive frames, optionally only the given channels.
+
+        The default yields the whole read_frame_stream() frame at once;
+        parsers should override it to decode in batches of bounded size, so
+        ingest memory does not grow with the file.
+        """
+        yield self.read_frame_stream(stream, channels)
+
+    def channel_keys(self, telemetry_columns: list[str]) -> dict[str, str]:
+        """Map the raw channel names in a file header to channel names in decoded frames"""
+        return {name: name for name in telemetry_columns if name}
+
+    def read_frame(self, file_path: Path, channels: Sequence[str] | None = None) -> TelemetryFrame:
+        """
+        Read all telemetry samples into a columnar frame, optionally only the given channels.
+
+        The default implementation collects stream_telemetry(); parsers should
+        override it with a vectorized decode of just the requested columns.
+        """
+        frame = TelemetryFrame.from_points(self.stream_telemetry(file_path))
+        return frame if channels is None else frame.select(channels)
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    """
+    Lazily loaded parser registration.
+
+    target is an "module:ClassName" import path; the module is only imported
+    when a file is dispatched to the parser. magic lists byte prefixes that
+    every file of the format starts with (files without them are never
+    offered to the parser); extensions only order the candidates.
+    """
+
+    format_name: str
+    target: str
+    magic: tuple[bytes, ...] = ()
+    extensions: tuple[str, ...] = ()
+
+
+# Parsers shipped with KarTune. Third-party parsers register a ParserSpec
+# (or a TelemetryParser subclass) under the "kartune.parsers" entry point group.
+BUILTIN_PARSERS = [
+    ParserSpec("RF2", "app.services.parsers.rf2_parser:RF2Parser", magic=(b"player,",), extensions=(".csv",)),
+]
+ENTRY_POINT_GROUP = "kartune.parsers"
+HEADER_SIZE = 64 * 1024
+
 
 class ParserRegistry:
-    """Registry of available telemetry parsers"""
+    """
+    Registry of available telemetry parsers.
+
+    Detection reads one header buffer per file and only offers it to the
+    parsers whose magic bytes match, ordered by file extension; parsers
+    without magic bytes are tried last.
+    """
 
-    _parsers: list[TelemetryParser] = []
+    _specs: dict[str, ParserSpec] = {}
+    _parsers: dict[str, TelemetryParser] = {}
+    _magic_index: list[tuple[bytes, str]] | None = None
+    _entry_points_loaded = False
 
     @classmethod
     def register(cls, parser: TelemetryParser) -> None:
-        """Register a new parser"""
-        cls._parsers.append(parser)
+        """Register an already instantiated parser"""
+        cls._parsers[parser.format_name] = parser
+        cls._magic_index = None
+
+    @classmethod
+    def register_spec(cls, spec: ParserSpec) -> None:
+        """Register a parser to be imported on first use"""
+        cls._specs[spec.format_name] = spec
+        cls._magic_index = None
+
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        for spec in BUILTIN_PARSERS:
+            cls._specs.setdefault(spec.format_name, spec)
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                target = entry_point.load()
+            except Exception:
+                logger.exception("Could not load telemetry parser entry point %s", entry_point.name)
+                continue
+            if isinstance(target, ParserSpec):
+                cls._specs.setdefault(target.format_name, target)
+            elif isinstance(target, type) and issubclass(target, TelemetryParser):
+                parser = target()
+                cls._parsers.setdefault(parser.format_name, parser)
+            else:
+                logger.warning("Ignoring telemetry parser entry point %s: %r", entry_point.name, target)
+        cls._magic_index = None
+
+    @classmethod
+    def _formats(cls) -> list[str]:
+        cls._load_entry_points()
+        return list(dict.fromkeys([*cls._parsers, *cls._specs]))
+
+    @classmethod
+    def candidates(cls, header: bytes, extension: str = "") -> list[str]:
+        """Format names that may match a file, most likely first"""
+        formats = cls._formats()
+        if cls._magic_index is None:
+            # Longest prefixes first so specific magic wins over generic magic
+            cls._magic_index = sorted(
+                ((magic, spec.format_name) for spec in cls._specs.values() for magic in spec.magic),
+                key=lambda item: -len(item[0]),
+            )
+
+        by_magic = list(dict.fromkeys(name for magic, name in cls._magic_index if header.startswith(magic)))
+        without_magic = [name for name in formats if not (spec := cls._specs.get(name)) or not spec.magic]
+        extension = extension.lower()
+        without_magic.sort(key=lambda name: not ((spec := cls._specs.get(name)) and extension in spec.extensions))
+        return by_magic + without_magic
+
+    @classmethod
+    def detect_header(cls, header: bytes, extension: str = "") -> TelemetryParser | None:
+        """Detect a parser from the leading bytes of a file, without touching the file"""
+        for format_name in cls.candidates(header, extension):
+            parser = cls.get_parser(format_name)
+            if parser is not None and parser.can_parse_header(header):
+                return parser
+        return None
 
     @classmethod
     def detect_parser(cls, file_path: Path) -> TelemetryParser | None:
         """Auto-detect the appropriate parser for a file"""
-        for parser in cls._parsers:
-            if parser.can_parse(file_path):
-                return parser
+        try:
+            with open(file_path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+        except OSError:
+            return None
+        parser = cls.detect_header(header, file_path.suffix)
+        if parser is not None:
+            return parser
+
+        # Parsers without header detection need the file itself
+        for format_name in cls.candidates(header, file_path.suffix):
+            parser = cls.get_parser(format_name)
+            if parser is not None and type(parser).can_parse_header is TelemetryParser.can_parse_header:
+                if parser.can_parse(file_path):
+                    return parser
         return None
 
     @classmethod
     def get_parser(cls, format_name: str) -> TelemetryParser | None:
-        """Get a specific parser by format name"""
-        for parser in cls._parsers:
-            if parser.format_name == format_name:
-                return parser
-        return None
+        """Get a specific parser by format name, importing it on first use"""
+        parser = cls._parsers.get(format_name)
+        if parser is not None:
+            return parser
+        cls._load_entry_points()
+        spec = cls._specs.get(format_name)
+        if spec is None:
+            return None
+        module_name, _, class_name = spec.target.partition(":")
+        parser_class = getattr(import_module(module_name), class_name)
+        parser = cls._parsers.setdefault(format_name, parser_class())
+        return parser
 
     @classmethod
     def available_formats(cls) -> list[str]:
         """List all registered format names"""
-        return [p.format_name for p in cls._parsers]
+        return cls._formats()
@@ -14,20 +14,71 @@ File structure:
   Line 9+: Telemetry data samples
 """
 
-import csv
+import io
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator
+from typing import BinaryIO, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 from . import (
+    STANDARD_CHANNELS,
     LapMetadata,
     LapSummary,
     ParsedTelemetry,
-    ParserRegistry,
     TelemetryDataPoint,
+    TelemetryFrame,
     TelemetryParser,
 )
 
+HEADER_LINES = 8
+
+# Position of each standard channel within a telemetry sample row
+CHANNEL_COLUMNS: dict[str, int] = {
+    "distance_m": 0,
+    "time_s": 2,
+    "speed_kmh": 5,
+    "throttle_pct": 7,
+    "brake_pct": 8,
+    "steering_pct": 9,
+    "gear": 11,
+    "rpm": 6,
+    "g_lat": 25,
+    "g_long": 26,
+}
+OPTIONAL_CHANNELS = {"g_lat", "g_long"}
+
+# Rows shorter than this were never valid samples
+MIN_SAMPLE_COLUMNS = 12
+
+# Sample text decoded per batch by iter_frame_batches
+BATCH_BYTES = 4 * 1024 * 1024
+
+
+def frame_keys(header_names: list[str], width: int) -> list[str]:
+    """
+    Frame channel name for each sample column.
+
+    Standard columns use the standard channel name; other columns use their
+    header name, or column_<index> when the name is blank or repeated.
+    """
+    standard = {index: name for name, index in CHANNEL_COLUMNS.items()}
+    keys: list[str] = []
+    seen = set(CHANNEL_COLUMNS)
+    for index in range(width):
+        if index in standard:
+            keys.append(standard[index])
+            continue
+        name = header_names[index].strip() if index < len(header_names) else ""
+        if not name or name in seen:
+            name = f"column_{index}"
+        seen.add(name)
+        keys.append(name)
+    return keys
+
 
 class RF2Parser(TelemetryParser):
     """Parser for rFactor 2 / KartSim telemetry files"""
@@ -39,19 +90,41 @@ class RF2Parser(TelemetryParser):
     def can_parse(self, file_path: Path) -> bool:
         """Check if file is RF2 format by examining first line"""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                first_line = f.readline().strip()
-                # RF2 format starts with: player,v8,DriverName,0,SessionID
-                parts = first_line.split(",")
-                return len(parts) >= 3 and parts[0] == "player"
+            with open(file_path, "rb") as f:
+                return self.can_parse_header(f.readline())
         except Exception:
             return False
 
+    def can_parse_header(self, header: bytes) -> bool:
+        """Check if the leading bytes of a file look like RF2"""
+        try:
+            first_line = header.split(b"\n", 1)[0].decode("utf-8").strip()
+        except UnicodeDecodeError:
+            return False
+        # RF2 format starts with: player,v8,DriverName,0,SessionID
+        parts = first_line.split(",")
+        return len(parts) >= 3 and parts[0] == "player"
+
     def parse_metadata(self, file_path: Path) -> LapMetadata:
         """Extract metadata without full parse"""
         with open(file_path, "r", encoding="utf-8") as f:
             lines = [f.readline().strip() for _ in range(6)]
+        return self._metadata_from_lines(lines)
+
+    def parse(self, file_path: Path) -> ParsedTelemetry:
+        """Full parse of RF2 telemetry file"""
+        with open(file_path, "r", encoding="utf-8") as f:
+            lines = [f.readline().strip() for _ in range(HEADER_LINES)]
+        return self._parsed_from_lines(lines, file_path)
 
+    def parse_header(self, header: bytes, file_path: Path) -> ParsedTelemetry:
+        """Parse metadata and lap summary from the leading bytes of a file"""
+        raw_lines = header.split(b"\n", HEADER_LINES)[:HEADER_LINES]
+        lines = [line.decode("utf-8").strip() for line in raw_lines]
+        lines += [""] * (HEADER_LINES - len(lines))
+        return self._parsed_from_lines(lines, file_path)
+
+    def _metadata_from_lines(self, lines: list[str]) -> LapMetadata:
         # Line 1: player,v8,DriverName,0,SessionID
         meta_parts = lines[0].split(",")
         driver_name = meta_parts[2] if len(meta_parts) > 2 else "Unknown"
@@ -81,12 +154,8 @@ class RF2Parser(TelemetryParser):
             source_format=self.format_name,
         )
 
-    def parse(self, file_path: Path) -> ParsedTelemetry:
-        """Full parse of RF2 telemetry file"""
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = [f.readline().strip() for _ in range(8)]
-
-        metadata = self.parse_metadata(file_path)
+    def _parsed_from_lines(self, lines: list[str], file_path: Path) -> ParsedTelemetry:
+        metadata = self._metadata_from_lines(lines)
 
         # Line 3: Lap summary
         lap_parts = lines[2].split(",")
@@ -133,33 +202,177 @@ class RF2Parser(TelemetryParser):
         )
 
     def stream_telemetry(self, file_path: Path) -> Iterator[TelemetryDataPoint]:
-        """Stream telemetry data points from file"""
-        with open(file_path, "r", encoding="utf-8") as f:
-            # Skip header lines (first 8 lines)
-            for _ in range(8):
-                f.readline()
-
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 10:
-                    continue
-
-                try:
-                    yield TelemetryDataPoint(
-                        distance_m=float(row[0]) if row[0] else 0.0,
-                        time_s=float(row[2]) if row[2] else 0.0,
-                        speed_kmh=float(row[5]) if row[5] else 0.0,
-                        throttle_pct=float(row[7]) if row[7] else 0.0,
-                        brake_pct=float(row[8]) if row[8] else 0.0,
-                        steering_pct=float(row[9]) if row[9] else 0.0,
-                        gear=int(float(row[11])) if row[11] else 0,
-                        rpm=float(row[6]) if row[6] else 0.0,
-                        g_lat=float(row[25]) if len(row) > 25 and row[25] else None,
-                        g_long=float(row[26]) if len(row) > 26 and row[26] else None,
-                    )
-                except (ValueError, IndexError):
-                    continue
-
-
-# Register the parser
-ParserRegistry.register(RF2Parser())
+        """Stream telemetry data points from file (compatibility shim over read_frame)"""
+        yield from self.read_frame(file_path, STANDARD_CHANNELS).iter_points()
+
+    def read_frame(self, file_path: Path, channels: Sequence[str] | None = None) -> TelemetryFrame:
+        """Decode telemetry samples, optionally only the given channels, in one vectorized CSV pass"""
+        with open(file_path, "rb") as f:
+            return self.read_frame_stream(f, channels)
+
+    def channel_keys(self, telemetry_columns: list[str]) -> dict[str, str]:
+        """Map raw header names to frame channels; the standard columns map to their standard names"""
+        keys = frame_keys(telemetry_columns, len(telemetry_columns))
+        mapping: dict[str, str] = {}
+        for name, key in zip(telemetry_columns, keys, strict=False):
+            name = name.strip()
+            if name:
+                mapping.setdefault(name, key)
+        return mapping
+
+    def read_frame_stream(self, stream: BinaryIO, channels: Sequence[str] | None = None) -> TelemetryFrame:
+        """
+        Decode telemetry from a binary stream positioned at the start of the file.
+
+        Without channels every sample column is decoded: the standard
+        channels under their standard names, the rest under their header
+        names (see frame_keys). With channels only those columns and the
+        standard ones (which decide which rows are samples) are decoded.
+        Non-seekable streams are read exactly once; if they contain
+        non-numeric samples or irregular rows a ValueError is raised so the
+        caller can retry from a seekable copy.
+        """
+        keys, standard = self._read_header(stream)
+        columns = self._columns(keys, standard, channels)
+        samples_start = stream.tell() if stream.seekable() else None
+
+        try:
+            table = self._read_samples(stream, len(keys), columns)
+        except ValueError:
+            if samples_start is None:
+                raise
+            stream.seek(samples_start)
+            table = self._read_irregular(stream, len(keys), columns, sorted(standard))
+
+        frame = self._decode(table, keys, columns, standard)
+        return frame if channels is None else frame.select(channels)
+
+    def iter_frame_batches(self, stream: BinaryIO, channels: Sequence[str] | None = None) -> Iterator[TelemetryFrame]:
+        """
+        Decode samples in batches of about BATCH_BYTES of sample text, optionally only the given channels.
+
+        Each batch holds whole lines and is decoded on its own, with the
+        per-row rules only when the Arrow reader rejects it, so memory stays
+        bounded by the batch size and non-seekable streams are read once.
+        """
+        keys, standard = self._read_header(stream)
+        columns = self._columns(keys, standard, channels)
+        empty = True
+        for block in _line_blocks(stream, BATCH_BYTES):
+            try:
+                table = self._read_samples(io.BytesIO(block), len(keys), columns)
+            except ValueError:
+                table = self._read_irregular(io.BytesIO(block), len(keys), columns, sorted(standard))
+            frame = self._decode(table, keys, columns, standard)
+            if len(frame):
+                empty = False
+                yield frame if channels is None else frame.select(channels)
+        if empty:
+            frame = self._decode(pd.DataFrame(columns=columns, dtype=np.float64), keys, columns, standard)
+            yield frame if channels is None else frame.select(channels)
+
+    @staticmethod
+    def _columns(keys: list[str], standard: dict[int, str], channels: Sequence[str] | None) -> list[int]:
+        """Sample columns to decode: the wanted ones and the standard ones, which decide which rows are samples"""
+        wanted = None if channels is None else set(channels)
+        return [index for index, key in enumerate(keys) if index in standard or wanted is None or key in wanted]
+
+    @staticmethod
+    def _read_header(stream: BinaryIO) -> tuple[list[str], dict[int, str]]:
+        """Consume the header lines; returns the frame key of each sample column and the standard columns"""
+        header = [stream.readline() for _ in range(HEADER_LINES)]
+        names = header[-1].decode("utf-8", errors="replace").strip().split(",")
+        width = max(len(names), MIN_SAMPLE_COLUMNS)
+        standard = {index: name for name, index in CHANNEL_COLUMNS.items() if index < width}
+        return frame_keys(names, width), standard
+
+    @staticmethod
+    def _decode(table: pd.DataFrame, keys: list[str], columns: list[int], standard: dict[int, str]) -> TelemetryFrame:
+        """Frame of the sample rows of a decoded table"""
+        required = [index for index, name in standard.items() if name not in OPTIONAL_CHANNELS]
+        table = table[table[required].notna().any(axis=1)]
+
+        decoded: dict[str, np.ndarray] = {}
+        for name in CHANNEL_COLUMNS:
+            if name not in standard.values():
+                values = np.full(len(table), np.nan)
+            else:
+                values = table[CHANNEL_COLUMNS[name]].to_numpy(dtype=np.float64)
+            if name not in OPTIONAL_CHANNELS:
+                values = np.nan_to_num(values, nan=0.0)
+            if name == "gear":
+                values = np.trunc(values)
+            decoded[name] = np.ascontiguousarray(values)
+        for index in columns:
+            if index not in standard:
+                decoded[keys[index]] = np.ascontiguousarray(table[index].to_numpy(dtype=np.float64))
+        return TelemetryFrame(decoded)
+
+    @staticmethod
+    def _read_samples(stream: BinaryIO, width: int, columns: list[int]) -> pd.DataFrame:
+        """
+        Decode the given columns of rows as wide as the header with the Arrow CSV reader.
+
+        Rows shorter than MIN_SAMPLE_COLUMNS are skipped. Raises ValueError
+        for non-numeric values and for other rows of a different width, which
+        only _read_irregular decodes the way a per-row parse would.
+        """
+        names = [str(index) for index in range(width)]
+        include = [names[index] for index in columns]
+
+        def invalid_row(row: pacsv.InvalidRow) -> str:
+            return "skip" if row.actual_columns < MIN_SAMPLE_COLUMNS else "error"
+
+        table = pacsv.read_csv(
+            stream,
+            read_options=pacsv.ReadOptions(column_names=names),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=invalid_row),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=include, column_types=dict.fromkeys(include, pa.float64()), null_values=[""]
+            ),
+        )
+        return pd.DataFrame(
+            {index: table.column(name).to_numpy() for index, name in zip(columns, include, strict=True)},
+            columns=columns,
+            dtype=np.float64,
+        )
+
+    @staticmethod
+    def _read_irregular(stream: BinaryIO, width: int, columns: list[int], used: list[int]) -> pd.DataFrame:
+        """
+        Decode the given columns with per-row rules, for files _read_samples rejects.
+
+        Rows shorter than MIN_SAMPLE_COLUMNS are skipped and longer rows are
+        kept whatever their width. Rows with a non-numeric value in a used
+        column are dropped; other non-numeric values become NaN.
+        """
+        text = stream.read().decode("utf-8", errors="replace")
+        rows = [line for line in text.splitlines() if line.count(",") + 1 >= MIN_SAMPLE_COLUMNS]
+        if not rows:
+            return pd.DataFrame(columns=columns, dtype=np.float64)
+        row_width = max(width, *(line.count(",") + 1 for line in rows))
+        raw = pd.read_csv(
+            io.StringIO("\n".join(rows)),
+            header=None,
+            names=range(row_width),
+            usecols=columns,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+            engine="c",
+        )
+        table = raw.apply(pd.to_numeric, errors="coerce")
+        return table[~(table[used].isna() & raw[used].notna()).any(axis=1)]
+
+
+def _line_blocks(stream: BinaryIO, size: int) -> Iterator[bytes]:
+    """Blocks of about size bytes from a stream, each ending at a line break (the last at end of stream)"""
+    carry = b""
+    while chunk := stream.read(size):
+        block = carry + chunk
+        cut = block.rfind(b"\n") + 1
+        if cut:
+            yield block[:cut]
+        carry = block[cut:]
+    if carry:
+        yield carry
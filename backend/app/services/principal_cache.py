@@ -0,0 +1,192 @@
+"""
+Authenticated User Cache
+
+Every authenticated request resolves its token subject (the user's email)
+to a user. The fields the endpoints read (id, email, full_name, role,
+team_id) are cached for PRINCIPAL_CACHE_TTL seconds in two tiers:
+
+  memory  per-process LRU bounded by entry count
+  redis   shared between API workers, JSON expiring after the same TTL
+
+Endpoints changing a user or team invalidate the affected subjects in
+this process's memory and in Redis; memory entries of other workers
+expire within the TTL. Redis is optional; when it is unreachable the
+cache fails open to the database and retries Redis after a pause.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import redis
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "kartune:principal:"
+FIELDS = ("id", "email", "full_name", "role", "team_id")
+
+# Seconds to skip Redis after a failure, so an outage costs one timeout per pause
+REDIS_RETRY_SECONDS = 30.0
+
+
+def principal_fields(user: User) -> dict[str, Any]:
+    """Cached fields of a user"""
+    return {field: getattr(user, field) for field in FIELDS}
+
+
+def principal_user(fields: dict[str, Any]) -> User:
+    """Detached User carrying cached fields, for endpoints expecting a User"""
+    return User(**fields)
+
+
+class PrincipalCache:
+    """TTL cache of user fields by token subject, in process with an optional shared Redis tier"""
+
+    def __init__(self, ttl: int, max_entries: int, redis_client: Any | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+        self._counters = dict.fromkeys(
+            ["hits", "misses", "invalidations", "redis_hits", "redis_misses", "redis_errors"], 0
+        )
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def get_local(self, subject: str) -> dict[str, Any] | None:
+        """Fields from this process's memory only; never blocks on Redis"""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, fields = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            self._counters["hits"] += 1
+            return fields
+
+    def get(self, subject: str) -> dict[str, Any] | None:
+        """Fields from memory, then Redis (promoting them to memory); None on a miss"""
+        fields = self.get_local(subject)
+        if fields is not None:
+            return fields
+        fields = self._redis_get(subject)
+        if fields is not None:
+            self._count("redis_hits")
+            self._put_memory(subject, fields)
+            return fields
+        self._count("misses")
+        return None
+
+    def put(self, subject: str, fields: dict[str, Any]) -> None:
+        """Store fields in both tiers"""
+        self._put_memory(subject, fields)
+        self._redis_set(subject, fields)
+
+    def invalidate(self, subjects: Iterable[str]) -> None:
+        """Drop subjects from memory and Redis"""
+        subjects = list(subjects)
+        if not subjects:
+            return
+        with self._lock:
+            for subject in subjects:
+                self._entries.pop(subject, None)
+            self._counters["invalidations"] += len(subjects)
+        if self._redis_available():
+            try:
+                self.redis.delete(*(self._redis_key(subject) for subject in subjects))  # type: ignore[union-attr]
+            except (redis.RedisError, OSError) as e:
+                self._redis_failed(e)
+
+    def clear(self) -> None:
+        """Empty the memory tier and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+            self._redis_retry_at = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and size of this process's cache"""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "redis_enabled": self.redis is not None,
+            }
+
+    def _put_memory(self, subject: str, fields: dict[str, Any]) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._entries[subject] = (time.monotonic() + self.ttl, fields)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _redis_key(subject: str) -> str:
+        return KEY_PREFIX + hashlib.sha256(subject.encode("utf-8")).hexdigest()[:32]
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning("User cache Redis tier unavailable, skipping it for %.0fs: %s", REDIS_RETRY_SECONDS, e)
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        self._count("redis_errors")
+
+    def _redis_get(self, subject: str) -> dict[str, Any] | None:
+        if not self._redis_available():
+            return None
+        try:
+            data = self.redis.get(self._redis_key(subject))  # type: ignore[union-attr]
+        except (redis.RedisError, OSError) as e:
+            self._redis_failed(e)
+            return None
+        if data is None:
+            self._count("redis_misses")
+            return None
+        try:
+            fields = json.loads(data)
+        except ValueError:
+            return None
+        # Entries written for another set of fields are misses
+        return fields if isinstance(fields, dict) and set(fields) == set(FIELDS) else None
+
+    def _redis_set(self, subject: str, fields: dict[str, Any]) -> None:
+        if not self._redis_available() or self.ttl <= 0:
+            return
+        try:
+            self.redis.set(self._redis_key(subject), json.dumps(fields), ex=self.ttl)  # type: ignore[union-attr]
+        except (redis.RedisError, OSError) as e:
+            self._redis_failed(e)
+
+
+def _redis_client() -> redis.Redis | None:
+    if not settings.PRINCIPAL_CACHE_REDIS:
+        return None
+    # Short timeouts: a slow Redis must not cost more than the users query it saves
+    timeout = settings.PRINCIPAL_CACHE_REDIS_TIMEOUT
+    return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_TTL,
+    settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    redis_client=_redis_client(),
+)
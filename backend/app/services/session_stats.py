@@ -0,0 +1,151 @@
+"""
+Session Lap Statistics
+
+Sessions keep running totals of their laps so that stats never require
+scanning a session's laps:
+
+  total_laps              all laps
+  valid_lap_count         valid laps
+  valid_lap_time_sum_ms   sum of valid lap times
+  best_lap_time_ms        fastest valid lap
+  average_lap_time_ms     valid_lap_time_sum_ms // valid_lap_count
+
+Imports add a batch of laps with one UPDATE per session; the totals are
+applied relative to the stored values, so concurrent imports into the
+same session do not overwrite each other. Deleting a lap subtracts it;
+only when it was the best lap is the minimum looked up again, through
+the (session_id, valid, lap_time_ms) index. recompute_session_stats
+rebuilds the totals from the laps when they need repair.
+
+A lap counts as valid only when its valid column is TRUE; NULL counts as
+invalid, as in the lap list's valid filter and the session index.
+Totals only ever come from Lap rows; a session telemetry upload keeps its
+analysis in TelemetryData.parsed_data.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.lap import Lap
+from app.models.session import Session as RacingSession
+
+
+@dataclass
+class LapTotals:
+    """Lap counts and times to add to one session"""
+
+    total: int = 0
+    valid: int = 0
+    valid_time_sum_ms: int = 0
+    best_lap_time_ms: int | None = None
+
+    def add(self, lap_time_ms: int, valid: bool) -> None:
+        self.total += 1
+        if valid:
+            self.valid += 1
+            self.valid_time_sum_ms += lap_time_ms
+            if self.best_lap_time_ms is None or lap_time_ms < self.best_lap_time_ms:
+                self.best_lap_time_ms = lap_time_ms
+
+
+def _average(valid_count, valid_sum):
+    return case((valid_count > 0, valid_sum // valid_count), else_=None)
+
+
+def add_laps(db: Session, laps: Iterable[Lap]) -> None:
+    """Add newly staged laps to their sessions' totals, one UPDATE per session"""
+    totals: dict[int, LapTotals] = {}
+    for lap in laps:
+        if lap.session_id is None:
+            continue
+        totals.setdefault(int(lap.session_id), LapTotals()).add(int(lap.lap_time_ms), lap.valid is True)  # type: ignore
+
+    for session_id, added in totals.items():
+        valid_count = func.coalesce(RacingSession.valid_lap_count, 0) + added.valid
+        valid_sum = func.coalesce(RacingSession.valid_lap_time_sum_ms, 0) + added.valid_time_sum_ms
+        values = {
+            RacingSession.total_laps: func.coalesce(RacingSession.total_laps, 0) + added.total,
+            RacingSession.valid_lap_count: valid_count,
+            RacingSession.valid_lap_time_sum_ms: valid_sum,
+            RacingSession.average_lap_time_ms: _average(valid_count, valid_sum),
+        }
+        if added.best_lap_time_ms is not None:
+            best = RacingSession.best_lap_time_ms
+            values[best] = case(
+                (or_(best.is_(None), best > added.best_lap_time_ms), added.best_lap_time_ms), else_=best
+            )
+        db.execute(
+            update(RacingSession).where(RacingSession.id == session_id).values(values),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def remove_lap(db: Session, lap: Lap) -> None:
+    """Subtract a lap that is being deleted from its session's totals"""
+    if lap.session_id is None:
+        return
+    valid = lap.valid is True
+    values = {RacingSession.total_laps: func.coalesce(RacingSession.total_laps, 1) - 1}
+    if valid:
+        valid_count = func.coalesce(RacingSession.valid_lap_count, 1) - 1
+        valid_sum = func.coalesce(RacingSession.valid_lap_time_sum_ms, lap.lap_time_ms) - lap.lap_time_ms
+        next_best = (
+            select(func.min(Lap.lap_time_ms))
+            .where(Lap.session_id == lap.session_id, Lap.valid.is_(True), Lap.id != lap.id)
+            .scalar_subquery()
+        )
+        best = RacingSession.best_lap_time_ms
+        values.update(
+            {
+                RacingSession.valid_lap_count: valid_count,
+                RacingSession.valid_lap_time_sum_ms: valid_sum,
+                RacingSession.average_lap_time_ms: _average(valid_count, valid_sum),
+                # Only the best lap's removal needs another lap's time
+                best: case((or_(best.is_(None), best >= lap.lap_time_ms), next_best), else_=best),
+            }
+        )
+    db.execute(
+        update(RacingSession).where(RacingSession.id == lap.session_id).values(values),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def recompute_session_stats(db: Session, team_id: int, session_id: int | None = None) -> int:
+    """
+    Rebuild lap totals from the laps themselves, for one session or all of a team's sessions.
+
+    Returns the number of sessions updated.
+    """
+
+    def laps_of_session(*conditions):
+        return and_(Lap.session_id == RacingSession.id, *conditions)
+
+    total = select(func.count(Lap.id)).where(laps_of_session()).scalar_subquery()
+    valid_count = select(func.count(Lap.id)).where(laps_of_session(Lap.valid.is_(True))).scalar_subquery()
+    valid_sum = (
+        select(func.coalesce(func.sum(Lap.lap_time_ms), 0))
+        .where(laps_of_session(Lap.valid.is_(True)))
+        .scalar_subquery()
+    )
+    best = select(func.min(Lap.lap_time_ms)).where(laps_of_session(Lap.valid.is_(True))).scalar_subquery()
+
+    statement = (
+        update(RacingSession)
+        .where(RacingSession.team_id == team_id)
+        .values(
+            {
+                RacingSession.total_laps: total,
+                RacingSession.valid_lap_count: valid_count,
+                RacingSession.valid_lap_time_sum_ms: valid_sum,
+                RacingSession.best_lap_time_ms: best,
+                RacingSession.average_lap_time_ms: _average(valid_count, valid_sum),
+            }
+        )
+    )
+    if session_id is not None:
+        statement = statement.where(RacingSession.id == session_id)
+    result = db.execute(statement, execution_options={"synchronize_session": False})
+    return result.rowcount
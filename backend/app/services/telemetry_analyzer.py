@@ -10,14 +10,74 @@ Analyzes telemetry data from various sources (CSV, JSON) and extracts:
 
 import csv
 import json
+import logging
+import math
 import os
-import statistics
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Lap time column candidates, in order of preference
+LAP_TIME_COLUMNS = ("lap_time", "laptime", "time", "lap_time_ms", "lap_time_seconds")
+
+# Rows parsed per pandas chunk; bounds memory regardless of file size
+CSV_CHUNK_ROWS = 1_000_000
+
+
+@dataclass
+class LapTimeStats:
+    """
+    Running best, sum and variance of lap times, updated a chunk at a time.
+
+    Chunks are merged with Chan's parallel variance update, so the result
+    does not depend on how the input was split.
+    """
+
+    count: int = 0
+    best: int | None = None
+    total: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared deviations from the mean
+
+    def update(self, lap_times: np.ndarray) -> None:
+        n = len(lap_times)
+        if n == 0:
+            return
+        chunk_best = int(lap_times.min())
+        chunk_mean = float(lap_times.mean())
+        chunk_m2 = float(((lap_times - chunk_mean) ** 2).sum())
+
+        combined = self.count + n
+        delta = chunk_mean - self.mean
+        self.m2 += chunk_m2 + delta * delta * self.count * n / combined
+        self.mean += delta * n / combined
+        self.count = combined
+        self.total += int(lap_times.sum(dtype=np.int64))
+        self.best = chunk_best if self.best is None else min(self.best, chunk_best)
+
+    @property
+    def stdev(self) -> float:
+        """Sample standard deviation"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+def to_lap_times_ms(values: np.ndarray) -> np.ndarray:
+    """Lap times in ms from raw values; below 1000 means seconds. Non-positive and missing values are dropped"""
+    values = values[np.isfinite(values)]
+    lap_times = np.where(values < 1000, values * 1000, values).astype(np.int64)
+    return lap_times[lap_times > 0]
 
 
 class TelemetryAnalyzer:
     """Analyzes telemetry files and extracts racing metrics"""
 
+    # Bump when results change for the same file; stored analyses from older versions are recomputed
+    VERSION = 2
+
     def analyze_file(self, file_path: str, filename: str) -> Dict[str, Any]:
         """
         Analyze a telemetry file and return metrics
@@ -40,41 +100,42 @@ class TelemetryAnalyzer:
             # For unknown formats, return mock data for MVP
             return self._mock_analysis()
 
+    @staticmethod
+    def _lap_time_column(file_path: str) -> str | None:
+        """First lap time column named in the CSV header"""
+        with open(file_path, "r", newline="") as f:
+            header = next(csv.reader(f), [])
+        return next((col for col in LAP_TIME_COLUMNS if col in header), None)
+
     def _analyze_csv(self, file_path: str) -> Dict[str, Any]:
-        """Analyze CSV telemetry file"""
-        lap_times = []
+        """
+        Analyze CSV telemetry file
 
+        Only the lap time column is parsed, in chunks of CSV_CHUNK_ROWS; the
+        rest of each row is skipped by the C parser. Statistics accumulate per
+        chunk; only the lap times themselves are kept, as int64 arrays, since
+        the response lists them.
+        """
         try:
-            with open(file_path, "r") as f:
-                reader = csv.DictReader(f)
-
-                # Try to find lap time column (common variations)
-                lap_time_cols = ["lap_time", "laptime", "time", "lap_time_ms", "lap_time_seconds"]
-
-                for row in reader:
-                    # Find the lap time column
-                    lap_time = None
-                    for col in lap_time_cols:
-                        if col in row:
-                            try:
-                                # Try to parse as milliseconds or seconds
-                                value = float(row[col])
-                                # If value is less than 1000, assume it's in seconds
-                                lap_time = int(value * 1000) if value < 1000 else int(value)
-                                break
-                            except ValueError:
-                                continue
-
-                    if lap_time and lap_time > 0:
-                        lap_times.append(lap_time)
+            column = self._lap_time_column(file_path)
+            if column is None:
+                return self._mock_analysis()
 
-            if not lap_times:
+            stats = LapTimeStats()
+            chunks = []
+            for chunk in pd.read_csv(file_path, usecols=[column], chunksize=CSV_CHUNK_ROWS, on_bad_lines="skip"):
+                values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64)
+                lap_times = to_lap_times_ms(values)
+                stats.update(lap_times)
+                chunks.append(lap_times)
+
+            if not stats.count:
                 return self._mock_analysis()
 
-            return self._calculate_metrics(lap_times)
+            return self._calculate_metrics(np.concatenate(chunks), stats)
 
         except Exception as e:
-            print(f"Error analyzing CSV: {e}")
+            logger.warning("Error analyzing CSV %s: %s", file_path, e)
             return self._mock_analysis()
 
     def _analyze_json(self, file_path: str) -> Dict[str, Any]:
@@ -110,33 +171,41 @@ class TelemetryAnalyzer:
             return self._calculate_metrics(lap_times)
 
         except Exception as e:
-            print(f"Error analyzing JSON: {e}")
+            logger.warning("Error analyzing JSON %s: %s", file_path, e)
             return self._mock_analysis()
 
-    def _calculate_metrics(self, lap_times: List[int]) -> Dict[str, Any]:
-        """Calculate metrics from lap times"""
-        if not lap_times:
+    def _calculate_metrics(
+        self, lap_times: Sequence[int] | np.ndarray, stats: LapTimeStats | None = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate metrics from lap times
+
+        Args:
+            lap_times: All lap times in ms, in session order
+            stats: Statistics already accumulated over lap_times, if any
+        """
+        laps = np.asarray(lap_times, dtype=np.int64)
+        n = len(laps)
+        if not n:
             return self._mock_analysis()
 
-        best_lap = min(lap_times)
-        avg_lap = int(statistics.mean(lap_times))
+        if stats is None:
+            stats = LapTimeStats()
+            stats.update(laps)
 
         # Calculate consistency score (0-100)
         # Lower standard deviation = higher consistency
-        if len(lap_times) > 1:
-            std_dev = statistics.stdev(lap_times)
+        if n > 1:
             # Normalize to 0-100 scale (assuming std_dev of 5000ms = 0 score)
-            consistency = max(0, min(100, 100 - (std_dev / 50)))
+            consistency = max(0.0, min(100.0, 100 - (stats.stdev / 50)))
         else:
             consistency = 100.0
 
-        # Determine improvement trend
-        if len(lap_times) >= 3:
-            first_third = lap_times[: len(lap_times) // 3]
-            last_third = lap_times[-len(lap_times) // 3 :]
-
-            avg_first = statistics.mean(first_third)
-            avg_last = statistics.mean(last_third)
+        # Determine improvement trend: first third against last third (rounded up)
+        if n >= 3:
+            avg_first = laps[: n // 3].sum() / (n // 3)
+            last = -(-n // 3)
+            avg_last = laps[n - last :].sum() / last
 
             if avg_last < avg_first * 0.98:  # 2% improvement
                 trend = "improving"
@@ -148,10 +217,10 @@ class TelemetryAnalyzer:
             trend = "insufficient_data"
 
         return {
-            "best_lap_time_ms": best_lap,
-            "average_lap_time_ms": avg_lap,
-            "total_laps": len(lap_times),
-            "lap_times": lap_times,
+            "best_lap_time_ms": stats.best,
+            "average_lap_time_ms": stats.total // n,
+            "total_laps": n,
+            "lap_times": laps.tolist(),
             "consistency_score": round(consistency, 2),
             "improvement_trend": trend,
         }
@@ -0,0 +1,269 @@
+"""
+Binary Telemetry Cache
+
+Decoded telemetry is stored next to the uploaded file as a binary sidecar,
+keyed by the file's SHA256 so reads can memory-map the channel arrays
+instead of re-parsing the CSV. Imports cache the standard channels; a read
+asking for a channel the sidecar lacks misses, and the caller rebuilds the
+sidecar with every channel.
+
+Sidecar layout (little endian):
+  8 bytes   magic b"KTFRAME\\0"
+  4 bytes   header length (uint32)
+  N bytes   header JSON: version, file_hash, rows, channels[name, dtype, offset]
+  ...       channel arrays from the first 64-byte boundary after the header,
+            each aligned to 64 bytes; offsets are relative to that boundary
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+import numpy as np
+
+from app.services.parsers import TelemetryFrame
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2  # 2: any decoded channels, not just the standard ones
+MAGIC = b"KTFRAME\0"
+ALIGNMENT = 64
+SIDECAR_DIR = "frames"
+SIDECAR_SUFFIX = ".frame"
+
+_LENGTH = struct.Struct("<I")
+
+
+def sidecar_dir(file_path: str | Path) -> Path:
+    """Directory holding the sidecars of telemetry files stored next to file_path"""
+    return Path(file_path).parent / SIDECAR_DIR
+
+
+def sidecar_path(file_path: str | Path, file_hash: str) -> Path:
+    """Location of the cached frame for a telemetry file"""
+    return sidecar_dir(file_path) / f"{file_hash}{SIDECAR_SUFFIX}"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _data_start(header_length: int) -> int:
+    return _align(len(MAGIC) + _LENGTH.size + header_length)
+
+
+def _layout(dtypes: dict[str, np.dtype], rows: int, file_hash: str) -> tuple[list[dict[str, Any]], bytes, int]:
+    """Channel entries, header bytes and total size of a sidecar"""
+    channels: list[dict[str, Any]] = []
+    offset = 0
+    for name, dtype in dtypes.items():
+        channels.append({"name": name, "dtype": dtype.str, "offset": offset})
+        offset = _align(offset + rows * dtype.itemsize)
+    header = {"version": FORMAT_VERSION, "file_hash": file_hash, "rows": rows, "channels": channels}
+    header_bytes = json.dumps(header).encode("utf-8")
+    return channels, header_bytes, _data_start(len(header_bytes)) + offset
+
+
+def _write_header(f: BinaryIO, header_bytes: bytes) -> None:
+    f.write(MAGIC)
+    f.write(_LENGTH.pack(len(header_bytes)))
+    f.write(header_bytes)
+
+
+def write_frame(path: Path, frame: TelemetryFrame, file_hash: str) -> None:
+    """Write a frame to a sidecar file atomically"""
+    arrays = {name: np.ascontiguousarray(values) for name, values in frame.channels.items()}
+    channels, header_bytes, size = _layout(
+        {name: values.dtype for name, values in arrays.items()}, len(frame), file_hash
+    )
+    data_start = _data_start(len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _write_header(f, header_bytes)
+            for entry, values in zip(channels, arrays.values(), strict=True):
+                f.seek(data_start + entry["offset"])
+                f.write(values.tobytes())
+            f.truncate(size)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+class FrameWriter:
+    """
+    Builds a sidecar from consecutive frame batches, holding at most one batch in memory.
+
+    Batches are appended to a spool file as they arrive; commit() copies
+    each channel's slices into place once the row count is known. Like
+    store_frame(), write failures are logged and leave no sidecar.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.batches = 0
+        self.rows = 0
+        self._dtypes: dict[str, np.dtype] = {}
+        self._slices: list[tuple[int, int]] = []  # spool offset and rows of each batch
+        self._spool: BinaryIO | None = None
+        self._spool_name: str | None = None
+        self._failed = False
+
+    def append(self, frame: TelemetryFrame) -> None:
+        """Spool the next batch; every batch must hold the same channels with the same dtypes"""
+        if self._failed:
+            return
+        arrays = {name: np.ascontiguousarray(values) for name, values in frame.channels.items()}
+        if self.batches == 0:
+            self._dtypes = {name: values.dtype for name, values in arrays.items()}
+        elif {name: values.dtype for name, values in arrays.items()} != self._dtypes:
+            raise ValueError("Frame batch channels differ from the first batch")
+        try:
+            if self._spool is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd, self._spool_name = tempfile.mkstemp(dir=self.directory, suffix=".spool")
+                self._spool = os.fdopen(fd, "w+b")
+            self._slices.append((self._spool.tell(), len(frame)))
+            for values in arrays.values():
+                self._spool.write(values.tobytes())
+        except OSError as e:
+            self._fail(e)
+            return
+        self.batches += 1
+        self.rows += len(frame)
+
+    def commit(self, file_path: str | Path, file_hash: str) -> Path | None:
+        """Write the sidecar for a telemetry file from the spooled batches"""
+        if self._failed or self._spool is None:
+            self.discard()
+            return None
+        path = sidecar_path(file_path, file_hash)
+        channels, header_bytes, size = _layout(self._dtypes, self.rows, file_hash)
+        data_start = _data_start(len(header_bytes))
+        spool = self._spool
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    _write_header(f, header_bytes)
+                    for entry, (name, dtype) in zip(channels, self._dtypes.items(), strict=True):
+                        f.seek(data_start + entry["offset"])
+                        for batch_offset, rows in self._slices:
+                            spool.seek(batch_offset + self._channel_offset(name, rows))
+                            f.write(spool.read(rows * dtype.itemsize))
+                    f.truncate(size)
+                os.replace(tmp_name, path)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+                raise
+        except OSError as e:
+            self._fail(e)
+            return None
+        finally:
+            self.discard()
+        return path
+
+    def discard(self) -> None:
+        """Remove the spool file"""
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._spool_name is not None:
+            if os.path.exists(self._spool_name):
+                os.remove(self._spool_name)
+            self._spool_name = None
+
+    def _channel_offset(self, name: str, rows: int) -> int:
+        """Offset of a channel's slice within a spooled batch of the given rows"""
+        offset = 0
+        for other, dtype in self._dtypes.items():
+            if other == name:
+                return offset
+            offset += rows * dtype.itemsize
+        raise KeyError(name)
+
+    def _fail(self, e: OSError) -> None:
+        logger.warning("Could not write telemetry cache in %s: %s", self.directory, e)
+        self._failed = True
+        self.discard()
+
+
+def read_frame(
+    path: Path, file_hash: str | None = None, channels: Iterable[str] | None = None
+) -> TelemetryFrame | None:
+    """
+    Memory-map a sidecar file, optionally only the given channels.
+
+    Returns None if the sidecar is missing, unreadable, from another format
+    version, written for a different file hash, or lacks a requested channel.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < len(MAGIC) + _LENGTH.size:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    try:
+        if buffer[: len(MAGIC)] != MAGIC:
+            return None
+        (header_length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+        start = len(MAGIC) + _LENGTH.size
+        header = json.loads(bytes(buffer[start : start + header_length]))
+        if header.get("version") != FORMAT_VERSION:
+            return None
+        if file_hash is not None and header.get("file_hash") != file_hash:
+            return None
+
+        rows = int(header["rows"])
+        data_start = _data_start(header_length)
+        entries = {entry["name"]: entry for entry in header["channels"]}
+    except (ValueError, KeyError, TypeError, struct.error):
+        # Truncated or corrupt sidecar; the caller rebuilds it
+        return None
+
+    names = list(entries) if channels is None else list(channels)
+    try:
+        arrays = {}
+        for name in names:
+            entry = entries[name]
+            arrays[name] = np.frombuffer(
+                buffer, dtype=np.dtype(entry["dtype"]), count=rows, offset=data_start + int(entry["offset"])
+            )
+        return TelemetryFrame(arrays)
+    except (ValueError, KeyError, TypeError):
+        # Truncated or corrupt sidecar; the caller rebuilds it
+        return None
+
+
+def store_frame(file_path: str | Path, file_hash: str, frame: TelemetryFrame) -> Path | None:
+    """Write the sidecar for a telemetry file, logging instead of raising on failure"""
+    path = sidecar_path(file_path, file_hash)
+    try:
+        write_frame(path, frame, file_hash)
+    except OSError as e:
+        logger.warning("Could not write telemetry cache %s: %s", path, e)
+        return None
+    return path
+
+
+def remove_frame(file_path: str | Path, file_hash: str | None) -> None:
+    """Delete the sidecar for a telemetry file, if any"""
+    if not file_hash:
+        return
+    try:
+        os.remove(sidecar_path(file_path, file_hash))
+    except FileNotFoundError:
+        pass
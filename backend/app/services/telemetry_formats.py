@@ -0,0 +1,142 @@
+"""
+Telemetry Wire Formats
+
+Content negotiation and binary encoders for telemetry responses. Binary
+formats are written straight from the decoded channel arrays, without
+building per-sample Python objects.
+
+  application/json                      rows of {channel: value} (default)
+  application/vnd.apache.arrow.stream   Arrow IPC stream, one column per channel;
+                                        NaN becomes null, gear is int32
+  application/vnd.msgpack               columnar MessagePack:
+                                        {"length": n, "channels": {name: {"dtype": "<f8", "data": <bin>}}}
+                                        where data holds the raw little-endian array
+
+Batch responses add a lap_id column (Arrow, laps concatenated in request
+order) or nest the columnar maps under {"laps": {id: ...}} (MessagePack).
+Per-lap errors travel in the "errors" schema metadata / map.
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+
+from app.services.parsers import TelemetryFrame
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/vnd.msgpack"
+
+# Accept values mapped to the format served for them
+MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+INTEGER_CHANNELS = {"gear"}
+
+
+def negotiate(accept: str | None) -> str:
+    """Pick the response format for an Accept header; JSON unless a binary format is preferred"""
+    if not accept:
+        return JSON
+    best, best_q = JSON, 0.0
+    for item in accept.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        served = MEDIA_TYPES.get(media_type.lower())
+        # Earlier entries win ties
+        if served is not None and q > best_q:
+            best, best_q = served, q
+    return best
+
+
+def _columns(frame: TelemetryFrame, selected: dict[str, str]) -> dict[str, np.ndarray]:
+    """Output arrays keyed by label; integer channels are narrowed to int32"""
+    columns = {}
+    for label, key in selected.items():
+        values = frame[key]
+        columns[label] = values.astype(np.int32) if key in INTEGER_CHANNELS else np.ascontiguousarray(values)
+    return columns
+
+
+def _arrow_table(columns: dict[str, np.ndarray], lap_id: int | None = None) -> Any:
+    import pyarrow as pa  # Heavy import, only paid by clients asking for Arrow
+
+    arrays, names = [], []
+    if lap_id is not None:
+        length = len(next(iter(columns.values()))) if columns else 0
+        arrays.append(pa.array(np.full(length, lap_id, dtype=np.int64)))
+        names.append("lap_id")
+    for name, values in columns.items():
+        # Zero-copy unless NaN needs turning into nulls
+        has_nan = values.dtype.kind == "f" and bool(np.isnan(values).any())
+        arrays.append(pa.array(values, from_pandas=has_nan))
+        names.append(name)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _arrow_stream(table: Any) -> bytes:
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_columns(columns: dict[str, np.ndarray]) -> dict[str, Any]:
+    channels = {}
+    for name, values in columns.items():
+        values = values.astype(values.dtype.newbyteorder("<"), copy=False)
+        channels[name] = {"dtype": values.dtype.str, "data": values.data.cast("B")}
+    length = len(next(iter(columns.values()))) if columns else 0
+    return {"length": length, "channels": channels}
+
+
+def encode_frame(frame: TelemetryFrame, selected: dict[str, str], media_type: str) -> bytes:
+    """Encode one lap's channels (label -> frame channel) in a binary format"""
+    columns = _columns(frame, selected)
+    if media_type == ARROW_STREAM:
+        return _arrow_stream(_arrow_table(columns))
+    if media_type == MSGPACK:
+        import msgpack
+
+        return msgpack.packb(_msgpack_columns(columns))
+    raise ValueError(f"Unsupported telemetry media type: {media_type}")
+
+
+def encode_batch(
+    frames: dict[int, tuple[TelemetryFrame, dict[str, str]]], errors: dict[int, str], media_type: str
+) -> bytes:
+    """Encode several laps, keyed by lap id, in a binary format"""
+    if media_type == ARROW_STREAM:
+        import pyarrow as pa
+
+        tables = [_arrow_table(_columns(frame, selected), lap_id) for lap_id, (frame, selected) in frames.items()]
+        table = pa.concat_tables(tables) if tables else pa.table({"lap_id": pa.array([], type=pa.int64())})
+        table = table.replace_schema_metadata({"errors": json.dumps({str(k): v for k, v in errors.items()})})
+        return _arrow_stream(table)
+    if media_type == MSGPACK:
+        import msgpack
+
+        return msgpack.packb(
+            {
+                "laps": {
+                    lap_id: _msgpack_columns(_columns(frame, selected)) for lap_id, (frame, selected) in frames.items()
+                },
+                "errors": errors,
+            }
+        )
+    raise ValueError(f"Unsupported telemetry media type: {media_type}")
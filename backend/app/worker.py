@@ -0,0 +1,112 @@
+"""
+Ingest Worker
+
+Takes queued import jobs from Redis and imports their files with the same
+LapImporter the synchronous upload endpoint uses, requeueing jobs of
+workers that died. Run one or more worker processes next to the API:
+
+    python -m app.worker
+"""
+
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.lap import Lap
+from app.services import telemetry_cache
+from app.services.ingest_queue import IngestQueue, get_ingest_queue
+from app.services.lap_import import DUPLICATE_FILE, LapImporter
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scans for jobs left behind by workers that died
+REQUEUE_INTERVAL_SECONDS = 60.0
+
+
+def process_job(queue: IngestQueue, job: dict[str, Any], db_factory: Callable[[], Session] = SessionLocal) -> None:
+    """
+    Import every pending file of a job.
+
+    Rejected files are recorded as they are found. Staged files are marked
+    done, with their lap ids, only once finish() has committed them; if it
+    fails they are marked as errors and their stored copies removed. Spooled
+    uploads are kept until the job ends, so a requeued job can resume.
+    """
+    db = db_factory()
+    staged: dict[int, Lap] = {}
+    committed = False
+    try:
+        importer = LapImporter(db, int(job["team_id"]))
+
+        for index, entry in enumerate(job["files"]):
+            if entry["status"] != "pending":
+                continue
+            try:
+                with open(entry["path"], "rb") as source:
+                    lap = importer.import_file(source, entry["filename"])
+            except OSError as e:
+                lap = None
+                importer.errors.append(f"{entry['filename']}: {e}")
+
+            if lap is None:
+                entry.update(status="error", error=importer.errors[-1])
+            else:
+                staged[index] = lap
+            # Saving after every file is also the heartbeat requeue_stalled() watches
+            queue.save_job(job)
+
+        # Files rejected at upload time are reported alongside import errors
+        upload_errors = [f"{e['filename']}: {e['error']}" for e in job["files"] if e.get("path") is None]
+        result = importer.finish()
+        committed = True
+        result.errors = upload_errors + result.errors
+        for index, lap in staged.items():
+            entry = job["files"][index]
+            if lap.id is None:
+                # Imported by a concurrent upload after it was staged; finish() skipped it
+                entry.update(status="error", error=f"{entry['filename']}: {DUPLICATE_FILE}")
+            else:
+                entry.update(status="done", lap_id=lap.id)
+        queue.finish_job(job, result=result.model_dump(mode="json"))
+    except Exception as e:
+        logger.exception("Ingest job %s failed", job["id"])
+        db.rollback()
+        if not committed:
+            for index, lap in staged.items():
+                entry = job["files"][index]
+                entry.update(status="error", error=f"{entry['filename']}: {e}")
+                if os.path.exists(str(lap.file_path)):
+                    os.remove(str(lap.file_path))
+                telemetry_cache.remove_frame(str(lap.file_path), str(lap.file_hash))
+        queue.finish_job(job, error=str(e))
+    finally:
+        db.close()
+        spool_dirs = {Path(e["path"]).parent for e in job["files"] if e.get("path")}
+        for spool_dir in spool_dirs:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    queue = get_ingest_queue()
+    logger.info("Ingest worker started")
+    next_requeue = 0.0
+    while True:
+        if time.monotonic() >= next_requeue:
+            for job_id in queue.requeue_stalled():
+                logger.warning("Requeued stalled ingest job %s", job_id)
+            next_requeue = time.monotonic() + REQUEUE_INTERVAL_SECONDS
+        job = queue.next_job(timeout=5)
+        if job is not None:
+            logger.info("Processing ingest job %s (%d files)", job["id"], len(job["files"]))
+            process_job(queue, job)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: peak memory of ingesting one large rF2 lap
+
+Writes a synthetic lap of the given size, then ingests it from disk in a
+fresh process and reports how much the peak RSS grew over the imports.
+Memory should stay flat as --rows grows.
+
+Usage (from backend/):
+    python -m benchmarks.ingest_memory [--rows 20000 80000]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.rf2_read_frame import write_lap
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+def ingest_once(source: Path, dest: Path) -> None:
+    """Run in the child: ingest one file and print the peak RSS growth"""
+    from app.services import ingest
+
+    baseline = peak_rss_mb()
+    with open(source, "rb") as f:
+        result = ingest.ingest_file(f, dest)
+    assert result.parser is not None
+    print(f"{peak_rss_mb() - baseline:.0f}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[20000, 80000])
+    arg_parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.child:
+        ingest_once(Path(args.child[0]), Path(args.child[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            source = Path(tmp) / f"lap_{rows}.csv"
+            write_lap(source, rows)
+            dest = Path(tmp) / "stored" / source.name
+            dest.parent.mkdir(exist_ok=True)
+            growth = subprocess.run(
+                [sys.executable, "-m", "benchmarks.ingest_memory", "--child", str(source), str(dest)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+            print(f"{rows:7d} rows, {source.stat().st_size / 1e6:5.1f} MB: peak RSS +{growth} MB")
+
+
+if __name__ == "__main__":
+    main()
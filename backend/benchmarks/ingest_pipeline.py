@@ -0,0 +1,81 @@
+"""
+Benchmark: single-pass ingest vs the previous multi-read upload flow
+
+Ingests a batch of synthetic rF2 laps both ways and reports wall time
+and read/write syscalls (Linux only).
+
+Usage (from backend/):
+    python -m benchmarks.ingest_pipeline [--files 500] [--rows 2000]
+"""
+
+import argparse
+import hashlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import ingest, telemetry_cache
+from app.services.parsers import ParserRegistry
+from benchmarks.rf2_read_frame import write_lap
+
+
+def io_counters() -> dict[str, int]:
+    """Read/write syscalls and bytes for this process (Linux /proc/self/io)"""
+    with open("/proc/self/io") as f:
+        return {key: int(value) for key, value in (line.split(": ") for line in f)}
+
+
+def legacy_ingest(content: bytes, dest: Path) -> None:
+    """The previous flow: write, detect, parse (metadata twice), hash, decode"""
+    with open(dest, "wb") as f:
+        f.write(content)
+    parser = ParserRegistry.detect_parser(dest)
+    assert parser is not None
+    parser.parse(dest)
+    parser.parse_metadata(dest)
+    sha256 = hashlib.sha256()
+    with open(dest, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            sha256.update(chunk)
+    telemetry_cache.store_frame(dest, sha256.hexdigest(), parser.read_frame(dest))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--files", type=int, default=500)
+    arg_parser.add_argument("--rows", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = Path(tmp) / "sample.csv"
+        write_lap(sample, args.rows)
+        content = sample.read_bytes()
+
+        results = {}
+        for name in ("legacy", "single-pass"):
+            out_dir = Path(tmp) / name
+            out_dir.mkdir()
+            before = io_counters()
+            start = time.perf_counter()
+            for i in range(args.files):
+                dest = out_dir / f"lap_{i}.csv"
+                if name == "legacy":
+                    legacy_ingest(content, dest)
+                else:
+                    ingest.ingest_file(io.BytesIO(content), dest)
+            elapsed = time.perf_counter() - start
+            after = io_counters()
+            results[name] = (elapsed, {key: after[key] - before[key] for key in after})
+
+    print(f"{args.files} files x {len(content) / 1e3:.0f} kB")
+    for name, (elapsed, counters) in results.items():
+        print(
+            f"  {name:12s}: {elapsed:7.2f} s  "
+            f"read {counters['rchar'] / 1e6:8.1f} MB in {counters['syscr']:7d} syscalls  "
+            f"write {counters['wchar'] / 1e6:8.1f} MB in {counters['syscw']:6d} syscalls"
+        )
+
+
+if __name__ == "__main__":
+    main()
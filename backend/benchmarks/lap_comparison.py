@@ -0,0 +1,82 @@
+"""
+Benchmark: 5-lap distance-aligned comparison
+
+Builds synthetic 100 Hz laps, caches them as binary sidecars and times the
+work behind POST /api/laps/compare: mapping the sidecars, resampling onto
+a 1 m grid, computing delta time and serializing the response.
+
+Usage (from backend/):
+    python -m benchmarks.lap_comparison [--laps 5] [--seconds 60] [--repeat 5]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.schemas.lap import LapComparisonResponse, LapComparisonSeries
+from app.services import lap_comparison, telemetry_cache
+from app.services.parsers import TelemetryFrame
+
+CHANNELS = ["speed_kmh", "throttle_pct", "brake_pct", "steering_pct", "gear", "rpm"]
+
+
+def make_lap(seconds: float, seed: int) -> TelemetryFrame:
+    rng = np.random.default_rng(seed)
+    time_s = np.arange(0, seconds, 0.01)
+    speed_ms = 20 + 5 * np.sin(time_s / 3 + seed) + rng.normal(0, 0.2, len(time_s))
+    channels = {"distance_m": np.cumsum(speed_ms) * 0.01, "time_s": time_s, "speed_kmh": speed_ms * 3.6}
+    for name in CHANNELS[1:]:
+        channels[name] = rng.uniform(0, 100, len(time_s))
+    channels["gear"] = np.floor(channels["gear"] / 20) + 1
+    return TelemetryFrame(channels)
+
+
+def run(paths: list[Path]) -> str:
+    keys = [*CHANNELS, "distance_m", "time_s"]
+    frames = [telemetry_cache.read_frame(path, channels=keys) for path in paths]
+    comparison = lap_comparison.compare_laps([f for f in frames if f is not None], CHANNELS, step_m=1.0)
+    response = LapComparisonResponse(
+        reference_lap_id=0,
+        distance_m=comparison.distance_m.tolist(),
+        laps=[
+            LapComparisonSeries(
+                lap_id=i,
+                channels={name: values.tolist() for name, values in channels.items()},
+                delta_s=delta.tolist(),
+            )
+            for i, (channels, delta) in enumerate(zip(comparison.channels, comparison.delta_s, strict=True))
+        ],
+    )
+    return response.model_dump_json()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--laps", type=int, default=5)
+    arg_parser.add_argument("--seconds", type=float, default=60.0)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.laps):
+            path = Path(tmp) / f"lap{i}.frame"
+            telemetry_cache.write_frame(path, make_lap(args.seconds, seed=i), file_hash=str(i))
+            paths.append(path)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = run(paths)
+            timings.append(time.perf_counter() - start)
+
+    samples = int(args.seconds * 100)
+    print(f"{args.laps} laps x {samples} samples (100 Hz), {len(CHANNELS)} channels, 1 m grid")
+    print(f"  compare + serialize : {min(timings) * 1000:8.1f} ms  ({len(payload) / 1e6:.2f} MB JSON)")
+
+
+if __name__ == "__main__":
+    main()
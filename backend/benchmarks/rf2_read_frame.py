@@ -0,0 +1,110 @@
+"""
+Benchmark: columnar RF2Parser.read_frame vs the legacy per-row CSV reader
+
+Generates a synthetic 113-column rF2 lap and times the legacy reader
+(which decoded the ten standard columns) against read_frame of the same
+standard channels, as ingest and stream_telemetry do, and of all columns,
+as the first request for a non-standard channel does when it rebuilds the
+sidecar.
+
+Usage (from backend/):
+    python -m benchmarks.rf2_read_frame [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import csv
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.services.parsers import STANDARD_CHANNELS, TelemetryDataPoint
+from app.services.parsers.rf2_parser import HEADER_LINES, RF2Parser
+
+
+def write_lap(path: Path, rows: int, columns: int = 113) -> None:
+    """Write a synthetic rF2 lap with realistic field widths"""
+    rng = random.Random(42)
+    header = [
+        "player,v8,Bench Driver,0,1",
+        "Game,Version,Date,Track,Car,Event,LapTime,S1,S2,S3",
+        "rFactor2,1.1,2025-06-01 10:00:00,Lonato,OK Senior,Practice,52.345,17.1,18.2,17.045",
+        "TrackId,TrackLen,Unused,Unused,Weather,Unused,Tire,Valid,Unused,Unused,Lap",
+        "1,1200,x,y,sunny,z,Soft,true,0,0,3",
+        "SetupName",
+        "Default",
+        ",".join(f"Channel{i}" for i in range(columns)),
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(header) + "\n")
+        for i in range(rows):
+            row = [f"{rng.uniform(-100, 100):.4f}" for _ in range(columns)]
+            row[0] = f"{i * 0.12:.3f}"
+            row[2] = f"{i * 0.01:.3f}"
+            row[11] = str(rng.randint(1, 6))
+            f.write(",".join(row) + "\n")
+
+
+def legacy_stream(file_path: Path) -> list[TelemetryDataPoint]:
+    """The previous row-by-row decoder, kept here as the baseline"""
+    points = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for _ in range(HEADER_LINES):
+            f.readline()
+        for row in csv.reader(f):
+            if len(row) < 10:
+                continue
+            try:
+                points.append(
+                    TelemetryDataPoint(
+                        distance_m=float(row[0]) if row[0] else 0.0,
+                        time_s=float(row[2]) if row[2] else 0.0,
+                        speed_kmh=float(row[5]) if row[5] else 0.0,
+                        throttle_pct=float(row[7]) if row[7] else 0.0,
+                        brake_pct=float(row[8]) if row[8] else 0.0,
+                        steering_pct=float(row[9]) if row[9] else 0.0,
+                        gear=int(float(row[11])) if row[11] else 0,
+                        rpm=float(row[6]) if row[6] else 0.0,
+                        g_lat=float(row[25]) if len(row) > 25 and row[25] else None,
+                        g_long=float(row[26]) if len(row) > 26 and row[26] else None,
+                    )
+                )
+            except (ValueError, IndexError):
+                continue
+    return points
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    parser = RF2Parser()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lap.csv"
+        write_lap(path, args.rows)
+        size_mb = path.stat().st_size / 1e6
+
+        legacy = best_of(args.repeat, lambda: legacy_stream(path))
+        standard = best_of(args.repeat, lambda: parser.read_frame(path, STANDARD_CHANNELS))
+        full = best_of(args.repeat, lambda: parser.read_frame(path))
+
+    print(f"{args.rows} rows, {size_mb:.1f} MB")
+    print(f"  legacy per-row reader      : {legacy * 1000:8.1f} ms  ({args.rows / legacy:,.0f} rows/s)")
+    print(f"  read_frame, standard (10)  : {standard * 1000:8.1f} ms  ({legacy / standard:.1f}x)")
+    print(f"  read_frame, all columns    : {full * 1000:8.1f} ms  ({legacy / full:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: session analysis of a large CSV log
+
+Writes a synthetic session log with a lap time column among wider sample
+columns and times TelemetryAnalyzer on it, reporting peak RSS growth.
+
+Usage (from backend/):
+    python -m benchmarks.session_analysis [--rows 5000000] [--columns 12]
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.telemetry_analyzer import TelemetryAnalyzer
+
+
+def write_log(path: Path, rows: int, columns: int) -> None:
+    rng = np.random.default_rng(0)
+    header = ",".join(["lap_time", *(f"channel_{i}" for i in range(columns - 1))])
+    with open(path, "w") as f:
+        f.write(header + "\n")
+        for start in range(0, rows, 500_000):
+            n = min(500_000, rows - start)
+            block = rng.uniform(0, 100, (n, columns))
+            block[:, 0] = rng.uniform(44.0, 48.0, n)
+            np.savetxt(f, block, fmt="%.3f", delimiter=",")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--columns", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "session.csv"
+        write_log(path, args.rows, args.columns)
+        size_mb = path.stat().st_size / 1e6
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        analysis = TelemetryAnalyzer().analyze_file(str(path), path.name)
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"{args.rows} rows x {args.columns} columns ({size_mb:.0f} MB): {elapsed:.2f} s")
+    print(f"best {analysis['best_lap_time_ms']} ms, {analysis['total_laps']} laps")
+    print(f"peak RSS growth: {(rss_after - rss_before) / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
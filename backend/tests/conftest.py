@@ -3,17 +3,25 @@ import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
 from app.core.config import settings
 from app.core.database import Base
 from app.main import app
+from app.services.frame_cache import frame_cache
+from app.services.ingest_queue import IngestQueue, InMemoryRedis, get_ingest_queue
+from app.services.principal_cache import principal_cache
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Same database for async endpoints; unpooled, as TestClient may run each request on a new event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Override upload directory for tests
@@ -34,7 +42,13 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 
 @pytest.fixture(scope="function")
@@ -44,6 +58,41 @@ def client():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def isolated_frame_cache(monkeypatch):
+    """Empty decoded telemetry cache per test, with an in-memory Redis tier"""
+    monkeypatch.setattr(frame_cache, "redis", InMemoryRedis())
+    frame_cache.clear()
+    yield frame_cache
+    frame_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_principal_cache(monkeypatch):
+    """Empty authenticated user cache per test, as each test recreates the users, with an in-memory Redis tier"""
+    monkeypatch.setattr(principal_cache, "redis", InMemoryRedis())
+    principal_cache.clear()
+    yield principal_cache
+    principal_cache.clear()
+
+
+@pytest.fixture
+def db(client):
+    """Direct database session for inspecting state in tests"""
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def ingest_queue(client):
+    """Ingest queue backed by an in-memory Redis stand-in"""
+    queue = IngestQueue(InMemoryRedis())
+    app.dependency_overrides[get_ingest_queue] = lambda: queue
+    yield queue
+    del app.dependency_overrides[get_ingest_queue]
+
+
 @pytest.fixture
 def test_user(client):
     """Create a test user and return auth token"""
@@ -64,3 +113,44 @@ def test_user(client):
     assert login_response.status_code == 200
     token = login_response.json()["access_token"]
     return {"token": token, "user": response.json()}
+
+
+def build_rf2_csv(
+    samples: int = 50,
+    driver_name: str = "Test Driver",
+    track_name: str = "Test Track",
+    car_name: str = "OK Senior",
+    lap_time_s: float = 52.345,
+    lap_number: int = 3,
+    session_date: str = "2025-06-01 10:00:00",
+    valid: bool = True,
+    columns: int = 113,
+    seed: int = 0,
+) -> str:
+    """Build a synthetic rF2 telemetry CSV with the real file layout"""
+    import random
+
+    rng = random.Random(seed)
+    lines = [
+        f"player,v8,{driver_name},0,{seed}",
+        "Game,Version,Date,Track,Car,Event,LapTime,S1,S2,S3,S4",
+        f"rFactor2,1.1,{session_date},{track_name},{car_name},Practice,{lap_time_s},17.1,18.2,17.045,",
+        "TrackId,TrackLen,Unused,Unused,Weather,Unused,Tire,Valid,Unused,Unused,Lap,a,b,c,d,e,TrackTemp,AirTemp",
+        f"1,1200,x,y,sunny,z,Soft,{str(valid).lower()},0,0,{lap_number},0,0,0,0,0,30.5,22.0",
+        "SetupName",
+        "Default",
+        ",".join(f"Channel{i}" for i in range(columns)),
+    ]
+    for i in range(samples):
+        row = [f"{rng.uniform(0, 100):.3f}" for _ in range(columns)]
+        row[0] = f"{i * 1.5:.3f}"  # distance
+        row[2] = f"{i * 0.05:.3f}"  # time
+        row[11] = str(rng.randint(1, 6))  # gear
+        lines.append(",".join(row))
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def rf2_csv():
+    """Factory for synthetic rF2 telemetry file contents"""
+    return build_rf2_csv
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app.core import db_pool
+from app.core.config import settings
+from app.core.database import async_database_url
+
+
+def test_async_database_url():
+    assert async_database_url("postgresql://u:p@db:5432/kartune") == "postgresql+asyncpg://u:p@db:5432/kartune"
+    assert async_database_url("postgresql+psycopg2://u@db/k") == "postgresql+asyncpg://u@db/k"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_engine_options_for_postgresql(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 12)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    url = "postgresql://u:p@db/kartune"
+
+    options = db_pool.engine_options(url)
+    assert options["poolclass"] is db_pool.MeteredQueuePool
+    assert options["pool_size"] == 12
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    options = db_pool.engine_options(async_database_url(url), is_async=True)
+    assert options["poolclass"] is db_pool.MeteredAsyncAdaptedQueuePool
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    options = db_pool.engine_options(async_database_url(url), is_async=True)
+    assert issubclass(options["poolclass"], NullPool)
+    assert "pool_size" not in options
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    assert "server_settings" not in options["connect_args"]
+
+
+def test_metered_pool_counts_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=db_pool.MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = db_pool.pool_stats(engine.pool)
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+
+    held.close()
+    engine.dispose()
+    engine.connect().close()
+    # Counters survive the pool being re-created
+    assert db_pool.pool_stats(engine.pool)["checkouts"] == 2
+
+
+def test_metrics_reports_pools(client):
+    pools = client.get("/metrics").json()["db_pool"]
+
+    assert pools["sync"]["pool"] == "MeteredQueuePool"
+    assert {"checkouts", "timeouts", "wait_seconds_total", "size", "checked_out", "overflow"} <= set(pools["async"])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.services.downsampling import downsample, lttb_indices, minmax_indices
+from app.services.parsers import TelemetryFrame
+
+
+def make_frame(n: int = 10_000) -> TelemetryFrame:
+    distance = np.arange(n, dtype=np.float64) * 0.5
+    speed = 80 + 30 * np.sin(distance / 200)
+    brake = np.zeros(n)
+    brake[n // 3] = 100.0  # single-sample spike
+    return TelemetryFrame({"distance_m": distance, "speed_kmh": speed, "brake_pct": brake})
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_bounds_and_keeps_shape(method):
+    frame = make_frame()
+
+    reduced = downsample(frame, 500, method)
+
+    assert 3 <= len(reduced) <= 500
+    assert reduced.channel_names == frame.channel_names
+    distance = reduced["distance_m"]
+    assert distance[0] == 0.0 and distance[-1] == frame["distance_m"][-1]
+    assert np.all(np.diff(distance) > 0)
+    # Extremes survive the reduction
+    assert reduced["brake_pct"].max() == 100.0
+    assert reduced["speed_kmh"].max() == pytest.approx(frame["speed_kmh"].max(), rel=1e-3)
+
+
+def test_downsample_small_frame_unchanged():
+    frame = make_frame(100)
+
+    assert downsample(frame, 500) is frame
+
+
+def test_lttb_one_index_per_bucket():
+    x = np.arange(1000, dtype=np.float64)
+    indices = lttb_indices(x, [np.sin(x / 10)], 102)
+
+    assert len(indices) == 102
+    assert len(np.unique(indices)) == 102
+
+
+def test_minmax_handles_nan_channels():
+    values = np.full(1000, np.nan)
+    values[::2] = np.arange(500)
+
+    indices = minmax_indices([values], 50)
+
+    assert len(indices) <= 50
+    assert 998 in indices or 999 in indices
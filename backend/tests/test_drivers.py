@@ -116,3 +116,15 @@ def test_delete_driver(client, test_user):
     # Verify it's deleted
     get_response = client.get(f"/api/drivers/{driver_id}", headers={"Authorization": f"Bearer {test_user['token']}"})
     assert get_response.status_code == 404
+
+
+def test_duplicate_driver_name_conflicts(client, test_user):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    driver = {"name": "Same Name", "team_id": test_user["user"]["team_id"]}
+    assert client.post("/api/drivers/", headers=headers, json=driver).status_code == 201
+
+    response = client.post("/api/drivers/", headers=headers, json=driver)
+    assert response.status_code == 409
+
+    other_id = client.post("/api/drivers/", headers=headers, json={**driver, "name": "Other"}).json()["id"]
+    assert client.put(f"/api/drivers/{other_id}", headers=headers, json={"name": "Same Name"}).status_code == 409
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+import redis
+
+from app.services.frame_cache import FrameCache, cache_key, dumps, loads
+from app.services.ingest_queue import InMemoryRedis
+from app.services.parsers import TelemetryFrame
+
+
+def make_frame(rows: int, value: float = 1.0) -> TelemetryFrame:
+    return TelemetryFrame({"speed_kmh": np.full(rows, value), "gear": np.arange(rows, dtype=np.int8)})
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, name):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+    def set(self, name, value, ex=None):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+
+def test_dumps_round_trip():
+    frame = TelemetryFrame({"speed_kmh": np.array([1.0, np.nan, 3.0]), "gear": np.array([1, 2, 3], dtype=np.int8)})
+    restored = loads(dumps(frame))
+    assert restored.channel_names == ["speed_kmh", "gear"]
+    np.testing.assert_array_equal(restored["speed_kmh"], frame["speed_kmh"])
+    assert restored["gear"].dtype == np.int8
+    assert loads(b"garbage") is None
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    frame_size = make_frame(100).nbytes
+    cache = FrameCache(max_bytes=frame_size * 2)
+    keys = [cache_key(f"hash{i}", ["speed_kmh", "gear"]) for i in range(3)]
+
+    cache.put(keys[0], make_frame(100))
+    cache.put(keys[1], make_frame(100))
+    assert cache.get(keys[0]) is not None  # Now most recently used
+    cache.put(keys[2], make_frame(100))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    assert stats["bytes"] == frame_size * 2
+
+
+def test_oversized_frames_skip_memory():
+    cache = FrameCache(max_bytes=10)
+    cache.put(cache_key("hash", ["speed_kmh"]), make_frame(100))
+    assert cache.stats()["entries"] == 0
+
+
+def test_redis_tier_is_shared_between_processes():
+    shared = InMemoryRedis()
+    key = cache_key("hash", ["speed_kmh", "gear"], max_points=50, method="lttb")
+    FrameCache(max_bytes=1 << 20, redis_client=shared).put(key, make_frame(10, 7.0))
+
+    other = FrameCache(max_bytes=1 << 20, redis_client=shared)
+    frame = other.get(key)
+    assert frame["speed_kmh"].tolist() == [7.0] * 10
+    assert other.get(key) is frame  # Promoted to memory
+    assert other.stats()["redis_hits"] == 1
+    assert other.get(cache_key("hash", ["speed_kmh", "gear"], max_points=60, method="lttb")) is None
+
+
+def test_unavailable_redis_fails_open():
+    broken = BrokenRedis()
+    cache = FrameCache(max_bytes=1 << 20, redis_client=broken)
+    loads_called = []
+
+    def load() -> TelemetryFrame:
+        loads_called.append(True)
+        return make_frame(5)
+
+    key = cache_key("hash", ["speed_kmh"])
+    assert len(cache.get_or_load(key, load)) == 5
+    assert len(cache.get_or_load(cache_key("other", ["speed_kmh"]), load)) == 5
+    assert len(loads_called) == 2
+    # Redis is skipped after the first failure instead of timing out on every request
+    assert broken.calls == 1
+    assert cache.stats()["redis_errors"] == 1
+
+
+@pytest.mark.parametrize("max_points", [None, 50])
+def test_lap_telemetry_served_from_cache(client, test_user, rf2_csv, monkeypatch, isolated_frame_cache, max_points):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    files = {"files": ("lap.csv", rf2_csv(samples=200).encode(), "text/csv")}
+    lap_id = client.post("/api/laps/upload", headers=headers, files=files).json()["laps"][0]["id"]
+    url = f"/api/laps/{lap_id}/telemetry" + (f"?max_points={max_points}" if max_points else "")
+
+    first = client.get(url, headers=headers).json()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("telemetry was loaded again")
+
+    monkeypatch.setattr("app.api.laps.load_lap_frame", fail)
+    assert client.get(url, headers=headers).json() == first
+
+    isolated_frame_cache.clear()  # Memory tier gone, e.g. another worker
+    assert client.get(url, headers=headers).json() == first
+
+    metrics = client.get("/metrics").json()["frame_cache"]
+    assert metrics["redis_hits"] == 1
+    assert metrics["entries"] == 1
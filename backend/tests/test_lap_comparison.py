@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.lap_comparison import compare_laps, distance_grid, resample
+from app.services.parsers import TelemetryFrame
+
+
+def make_lap(speed_ms: float, length_m: float = 1000.0, hz: int = 100, start_m: float = 0.0) -> TelemetryFrame:
+    time = np.arange(0, length_m / speed_ms, 1 / hz)
+    distance = start_m + time * speed_ms
+    return TelemetryFrame(
+        {
+            "distance_m": distance,
+            "time_s": time,
+            "speed_kmh": np.full(len(time), speed_ms * 3.6),
+            "gear": np.floor(distance / 250) + 1,
+        }
+    )
+
+
+def test_resample_interpolates_and_holds_steps():
+    frame = TelemetryFrame(
+        {
+            "distance_m": np.array([0.0, 10.0, 20.0]),
+            "speed_kmh": np.array([0.0, 100.0, 50.0]),
+            "gear": np.array([1.0, 2.0, 3.0]),
+        }
+    )
+
+    values = resample(frame, np.array([0.0, 5.0, 10.0, 15.0, 25.0]), ["speed_kmh", "gear"])
+
+    assert values["speed_kmh"].tolist() == [0.0, 50.0, 100.0, 75.0, 50.0]
+    assert values["gear"].tolist() == [1.0, 1.0, 2.0, 2.0, 3.0]
+
+
+def test_distance_grid_covers_common_range():
+    grid = distance_grid([make_lap(20), make_lap(25, start_m=3.0)], step_m=1.0)
+
+    assert grid[0] == 3.0
+    assert grid[-1] <= 999.95
+    assert np.allclose(np.diff(grid), 1.0)
+    assert len(distance_grid([make_lap(20)], step_m=0.01, max_points=500)) == 500
+
+
+def test_compare_laps_delta_time():
+    slow, fast = make_lap(20), make_lap(25)
+
+    comparison = compare_laps([slow, fast], ["speed_kmh"], reference=0)
+
+    assert comparison.reference == 0
+    assert np.all(comparison.delta_s[0] == 0)
+    # 25 m/s gains 0.01 s per metre over 20 m/s
+    assert comparison.delta_s[1][-1] == pytest.approx(-0.01 * comparison.distance_m[-1], abs=0.02)
+    assert comparison.channels[1]["speed_kmh"][0] == pytest.approx(90.0)
@@ -0,0 +1,764 @@
+import io
+import json
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from app.models.lap import Lap
+from app.services import telemetry_cache
+
+
+def upload_laps(client, token, *contents: str):
+    files = [("files", (f"lap{i}.csv", io.BytesIO(c.encode()), "text/csv")) for i, c in enumerate(contents)]
+    response = client.post("/api/laps/upload", headers={"Authorization": f"Bearer {token}"}, files=files)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_upload_rf2_lap(client, test_user, rf2_csv):
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=20))
+
+    assert data["uploaded"] == 1
+    assert data["errors"] == []
+    lap = data["laps"][0]
+    assert lap["driver_name"] == "Test Driver"
+    assert lap["lap_time_ms"] == 52345
+    assert data["created_drivers"] == ["Test Driver"]
+
+
+def test_get_lap_telemetry_uses_cache(client, test_user, rf2_csv, monkeypatch):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=20))["laps"][0]["id"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("telemetry was re-parsed")
+
+    monkeypatch.setattr("app.services.parsers.rf2_parser.RF2Parser.read_frame", fail)
+    response = client.get(f"/api/laps/{lap_id}/telemetry", headers=headers)
+
+    assert response.status_code == 200
+    points = response.json()
+    assert len(points) == 20
+    assert points[1]["distance_m"] == 1.5
+
+
+def test_get_lap_telemetry_rebuilds_stale_cache(client, db, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=20))["laps"][0]["id"]
+    lap = db.get(Lap, lap_id)
+    path = telemetry_cache.sidecar_path(lap.file_path, lap.file_hash)
+    assert path.exists()
+    path.write_bytes(b"garbage")
+
+    response = client.get(f"/api/laps/{lap_id}/telemetry", headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    assert telemetry_cache.read_frame(path, lap.file_hash) is not None
+
+
+def test_delete_lap_removes_cache(client, db, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=5))["laps"][0]["id"]
+    lap = db.get(Lap, lap_id)
+    path = telemetry_cache.sidecar_path(lap.file_path, lap.file_hash)
+    assert path.exists()
+
+    response = client.delete(f"/api/laps/{lap_id}", headers=headers)
+
+    assert response.status_code == 204
+    assert not path.exists()
+
+
+def test_upload_reports_stage_timings_and_duplicates(client, test_user, rf2_csv):
+    content = rf2_csv(samples=10)
+    data = upload_laps(client, test_user["token"], content, "not,telemetry\n1,2\n")
+
+    assert data["uploaded"] == 1
+    assert data["errors"] == ["lap1.csv: Unknown format"]
+    assert {"sniff", "metadata", "decode", "write", "cache"} <= set(data["timings_ms"])
+
+    again = upload_laps(client, test_user["token"], content)
+    assert again["uploaded"] == 0
+    assert "Duplicate file" in again["errors"][0]
+
+
+def test_upload_rejects_oversized_files(client, test_user, rf2_csv, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1024)
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=50))
+
+    assert data["uploaded"] == 0
+    assert "File too large" in data["errors"][0]
+
+
+def test_background_ingest_job(client, test_user, rf2_csv, ingest_queue):
+    from app.worker import process_job
+    from tests.conftest import TestingSessionLocal
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    files = [
+        ("files", ("a.csv", io.BytesIO(rf2_csv(samples=10, seed=1).encode()), "text/csv")),
+        ("files", ("b.csv", io.BytesIO(b"not,telemetry\n"), "text/csv")),
+    ]
+    response = client.post("/api/laps/jobs", headers=headers, files=files)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert job["total_files"] == 2
+    assert job["processed_files"] == 0
+
+    queued = ingest_queue.next_job(timeout=1)
+    assert queued["id"] == job["id"]
+    process_job(ingest_queue, queued, db_factory=TestingSessionLocal)
+
+    status = client.get(f"/api/laps/jobs/{job['id']}", headers=headers).json()
+    assert status["status"] == "completed"
+    assert status["processed_files"] == 2
+    assert [f["status"] for f in status["files"]] == ["done", "error"]
+    assert status["files"][1]["error"] == "b.csv: Unknown format"
+    assert status["result"]["uploaded"] == 1
+
+    lap_id = status["files"][0]["lap_id"]
+    telemetry = client.get(f"/api/laps/{lap_id}/telemetry", headers=headers)
+    assert len(telemetry.json()) == 10
+
+
+def _enqueue_job(client, test_user, files):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    uploads = [("files", (name, io.BytesIO(content.encode()), "text/csv")) for name, content in files]
+    response = client.post("/api/laps/jobs", headers=headers, files=uploads)
+    assert response.status_code == 202
+    return response.json()["id"], headers
+
+
+def test_ingest_job_reports_duplicates_skipped_on_insert(client, test_user, rf2_csv, ingest_queue, monkeypatch):
+    from app.services import lap_import
+    from app.worker import process_job
+    from tests.conftest import TestingSessionLocal
+
+    content = rf2_csv(samples=10, seed=1)
+    upload_laps(client, test_user["token"], content)
+    job_id, headers = _enqueue_job(client, test_user, [("a.csv", content)])
+    # As if the other upload committed after this job checked the hash
+    monkeypatch.setattr(lap_import, "lap_exists", lambda db, team_id, file_hash: False)
+
+    process_job(ingest_queue, ingest_queue.next_job(timeout=1), db_factory=TestingSessionLocal)
+
+    status = client.get(f"/api/laps/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "completed"
+    assert status["files"][0]["status"] == "error"
+    assert status["files"][0]["error"] == "a.csv: Duplicate file (already imported)"
+    assert status["files"][0]["lap_id"] is None
+    assert status["result"]["uploaded"] == 0
+
+
+def test_ingest_job_failing_on_commit_marks_staged_files(client, test_user, rf2_csv, ingest_queue, monkeypatch):
+    from app.services.lap_import import LapImporter
+    from app.worker import process_job
+    from tests.conftest import TestingSessionLocal
+
+    job_id, headers = _enqueue_job(client, test_user, [("a.csv", rf2_csv(samples=10, seed=1))])
+
+    stored = []
+
+    def fail(self):
+        stored.extend(str(lap.file_path) for lap in self.laps)
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(LapImporter, "finish", fail)
+    process_job(ingest_queue, ingest_queue.next_job(timeout=1), db_factory=TestingSessionLocal)
+
+    status = client.get(f"/api/laps/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "failed"
+    assert status["files"][0] == {
+        "filename": "a.csv",
+        "status": "error",
+        "error": "a.csv: database went away",
+        "lap_id": None,
+    }
+    assert stored and not any(os.path.exists(path) for path in stored)
+
+
+def test_ingest_job_of_dead_worker_is_requeued(client, test_user, rf2_csv, ingest_queue):
+    from app.worker import process_job
+    from tests.conftest import TestingSessionLocal
+
+    job_id, headers = _enqueue_job(client, test_user, [("a.csv", rf2_csv(samples=10, seed=1))])
+    taken = ingest_queue.next_job(timeout=1)
+    assert taken["id"] == job_id
+    # The worker dies here: the job stays in processing, not on the queue
+    assert ingest_queue.next_job(timeout=0.01) is None
+    assert ingest_queue.requeue_stalled() == []
+
+    assert ingest_queue.requeue_stalled(stalled_seconds=0) == [job_id]
+    process_job(ingest_queue, ingest_queue.next_job(timeout=1), db_factory=TestingSessionLocal)
+
+    status = client.get(f"/api/laps/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "completed"
+    assert status["files"][0]["status"] == "done"
+    assert ingest_queue.client.lrange(ingest_queue.processing_key, 0, -1) == []
+
+
+def test_ingest_job_is_team_scoped(client, test_user, ingest_queue):
+    job = ingest_queue.enqueue("other-team-job", team_id=999, user_id=1, files=[])
+
+    response = client.get(f"/api/laps/jobs/{job['id']}", headers={"Authorization": f"Bearer {test_user['token']}"})
+
+    assert response.status_code == 404
+
+
+def test_parallel_upload_matches_inline_errors(client, test_user, rf2_csv, monkeypatch):
+    from app.core.config import settings
+    from app.services import lap_import
+
+    good, other = rf2_csv(samples=10, seed=1), rf2_csv(samples=12, seed=2, lap_number=4)
+    unknown = "not,telemetry\n1,2\n"
+
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 2)
+    try:
+        data = upload_laps(client, test_user["token"], good, unknown, other, good)
+    finally:
+        lap_import.shutdown_parse_pool()
+
+    assert data["uploaded"] == 2
+    assert data["errors"] == ["lap1.csv: Unknown format", "lap3.csv: Duplicate file (already imported)"]
+    assert [lap["original_filename"] for lap in data["laps"]] == ["lap0.csv", "lap2.csv"]
+    assert {"sniff", "metadata", "decode", "write", "cache"} <= set(data["timings_ms"])
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    telemetry = client.get(f"/api/laps/{data['laps'][1]['id']}/telemetry", headers=headers)
+    assert len(telemetry.json()) == 12
+
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 1)
+    again = upload_laps(client, test_user["token"], good, unknown)
+    assert again["errors"] == ["lap0.csv: Duplicate file (already imported)", "lap1.csv: Unknown format"]
+
+
+class BrokenPool:
+    def __init__(self):
+        self.shutdowns = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append(cancel_futures)
+
+
+def test_broken_parse_pool_is_replaced_alone(client, test_user, rf2_csv, monkeypatch):
+    from app.core.config import settings
+    from app.services import lap_import
+
+    broken = BrokenPool()
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 2)
+    monkeypatch.setattr(lap_import, "_parse_pool", broken)
+    stored_before = set(os.listdir(settings.UPLOAD_DIR))
+
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=10, seed=1), rf2_csv(samples=12, seed=2))
+
+    assert data["uploaded"] == 0
+    assert [error.split(":")[0] for error in data["errors"]] == ["lap0.csv", "lap1.csv"]
+    assert set(os.listdir(settings.UPLOAD_DIR)) == stored_before
+    assert lap_import._parse_pool is None
+    assert broken.shutdowns and not any(broken.shutdowns)
+
+    # A pool another caller already swapped in stays untouched
+    current = BrokenPool()
+    monkeypatch.setattr(lap_import, "_parse_pool", current)
+    lap_import.replace_broken_parse_pool(broken)
+    assert lap_import._parse_pool is current
+    assert current.shutdowns == []
+
+
+def test_get_lap_telemetry_channel_projection(client, db, test_user, rf2_csv, monkeypatch):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=8))["laps"][0]["id"]
+    assert len(db.get(Lap, lap_id).telemetry_columns) == 113
+
+    url = f"/api/laps/{lap_id}/telemetry?channels=speed_kmh,Channel40,Channel5"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("telemetry was re-parsed")
+
+    # The import cached only the standard channels
+    monkeypatch.setattr("app.services.parsers.rf2_parser.RF2Parser.read_frame", fail)
+    assert client.get(f"/api/laps/{lap_id}/telemetry?channels=speed_kmh,Channel5", headers=headers).status_code == 200
+    assert client.get(url, headers=headers).status_code == 500
+    monkeypatch.undo()
+
+    # The first request for another channel rebuilds the sidecar with all of them
+    first = client.get(url, headers=headers).json()
+    monkeypatch.setattr("app.services.parsers.rf2_parser.RF2Parser.read_frame", fail)
+    response = client.get(url, headers=headers)
+
+    assert response.status_code == 200
+    rows = response.json()
+    assert rows == first
+    assert len(rows) == 8
+    assert list(rows[0]) == ["speed_kmh", "Channel40", "Channel5"]
+    # Raw header names of standard columns resolve to the same data
+    assert all(row["Channel5"] == row["speed_kmh"] for row in rows)
+
+
+def test_get_lap_telemetry_unknown_channel(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=8))["laps"][0]["id"]
+
+    response = client.get(f"/api/laps/{lap_id}/telemetry?channels=speed_kmh,Nope", headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown channels: Nope"
+
+
+def test_get_lap_telemetry_downsampled(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=400))["laps"][0]["id"]
+
+    for method in ("lttb", "minmax"):
+        response = client.get(
+            f"/api/laps/{lap_id}/telemetry?channels=speed_kmh&max_points=50&method={method}", headers=headers
+        )
+        assert response.status_code == 200
+        rows = response.json()
+        assert 3 <= len(rows) <= 50
+        assert list(rows[0]) == ["speed_kmh"]
+
+    full = client.get(f"/api/laps/{lap_id}/telemetry?max_points=1000", headers=headers).json()
+    assert len(full) == 400
+    assert client.get(f"/api/laps/{lap_id}/telemetry?max_points=2", headers=headers).status_code == 422
+
+
+def test_compare_laps(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=100, seed=1), rf2_csv(samples=80, seed=2))
+    first, second = (lap["id"] for lap in data["laps"])
+
+    response = client.post(
+        "/api/laps/compare",
+        headers=headers,
+        json={"lap_ids": [first, second], "reference_lap_id": second, "channels": ["speed_kmh", "Channel40"]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reference_lap_id"] == second
+    # Common range is the shorter lap: 80 samples, 1.5 m apart
+    assert body["distance_m"][0] == 0.0 and body["distance_m"][-1] == 118.0
+    laps = {lap["lap_id"]: lap for lap in body["laps"]}
+    assert set(laps[first]["channels"]) == {"speed_kmh", "Channel40"}
+    assert len(laps[first]["channels"]["speed_kmh"]) == len(body["distance_m"])
+    # Both synthetic laps sample time and distance identically
+    assert all(abs(d) < 1e-9 for d in laps[first]["delta_s"])
+    assert all(d == 0 for d in laps[second]["delta_s"])
+
+
+def test_compare_laps_rejects_other_team_laps(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=10))["laps"][0]["id"]
+
+    response = client.post("/api/laps/compare", headers=headers, json={"lap_ids": [lap_id, 9999]})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Laps not found: 9999"
+
+
+def test_batch_lap_telemetry(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=30, seed=1), rf2_csv(samples=20, seed=2))
+    first, second = (lap["id"] for lap in data["laps"])
+
+    response = client.post(
+        "/api/laps/telemetry:batch",
+        headers=headers,
+        json={"lap_ids": [first, second], "channels": ["speed_kmh", "Channel40"], "max_points": 10},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == {}
+    assert set(body["laps"]) == {str(first), str(second)}
+    assert all(len(rows) == 10 for rows in body["laps"].values())
+    assert list(body["laps"][str(first)][0]) == ["speed_kmh", "Channel40"]
+
+    single = client.get(f"/api/laps/{second}/telemetry?channels=speed_kmh,Channel40&max_points=10", headers=headers)
+    assert body["laps"][str(second)] == single.json()
+
+
+def test_batch_lap_telemetry_reports_per_lap_errors(client, db, test_user, rf2_csv):
+    import os
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=5, seed=1), rf2_csv(samples=5, seed=2))
+    first, second = (lap["id"] for lap in data["laps"])
+    os.remove(db.get(Lap, second).file_path)
+
+    response = client.post("/api/laps/telemetry:batch", headers=headers, json={"lap_ids": [first, second]})
+    assert response.status_code == 200
+    assert len(response.json()["laps"][str(first)]) == 5
+    assert response.json()["errors"] == {str(second): "Telemetry file not found"}
+    # Partial results must not be cached as final
+    assert "etag" not in response.headers
+
+    response = client.post("/api/laps/telemetry:batch", headers=headers, json={"lap_ids": [first, 12345]})
+    assert response.status_code == 404
+
+
+def test_get_lap_telemetry_binary_formats(client, test_user, rf2_csv):
+    import msgpack
+    import numpy as np
+    import pyarrow as pa
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=25))["laps"][0]["id"]
+    rows = client.get(f"/api/laps/{lap_id}/telemetry", headers=headers).json()
+
+    response = client.get(
+        f"/api/laps/{lap_id}/telemetry", headers={**headers, "Accept": "application/vnd.apache.arrow.stream"}
+    )
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == list(rows[0])
+    assert table.column("speed_kmh").to_pylist() == [row["speed_kmh"] for row in rows]
+    assert table.column("gear").to_pylist() == [row["gear"] for row in rows]
+
+    response = client.get(
+        f"/api/laps/{lap_id}/telemetry?channels=rpm,gear", headers={**headers, "Accept": "application/msgpack"}
+    )
+    assert response.headers["content-type"] == "application/vnd.msgpack"
+    body = msgpack.unpackb(response.content)
+    assert body["length"] == 25
+    rpm = body["channels"]["rpm"]
+    assert np.frombuffer(rpm["data"], dtype=rpm["dtype"]).tolist() == [row["rpm"] for row in rows]
+    assert body["channels"]["gear"]["dtype"] == "<i4"
+
+    # JSON stays the default, including for browsers' generic Accept headers
+    response = client.get(f"/api/laps/{lap_id}/telemetry", headers={**headers, "Accept": "text/html,*/*;q=0.8"})
+    assert response.json() == rows
+
+
+def test_batch_lap_telemetry_arrow(client, test_user, rf2_csv):
+    import pyarrow as pa
+
+    headers = {"Authorization": f"Bearer {test_user['token']}", "Accept": "application/vnd.apache.arrow.stream"}
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=6, seed=1), rf2_csv(samples=4, seed=2))
+    first, second = (lap["id"] for lap in data["laps"])
+
+    response = client.post(
+        "/api/laps/telemetry:batch", headers=headers, json={"lap_ids": [first, second], "channels": ["speed_kmh"]}
+    )
+
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["lap_id", "speed_kmh"]
+    assert table.column("lap_id").to_pylist() == [first] * 6 + [second] * 4
+    assert table.schema.metadata[b"errors"] == b"{}"
+
+
+def test_lap_telemetry_conditional_get(client, test_user, rf2_csv, monkeypatch):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=40))["laps"][0]["id"]
+
+    response = client.get(f"/api/laps/{lap_id}/telemetry", headers=headers)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+    assert response.headers["content-encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+    assert len(response.json()) == 40
+
+    def fail(*args, **kwargs):
+        raise AssertionError("telemetry was decoded for a 304")
+
+    monkeypatch.setattr("app.api.laps.lap_telemetry_frame", fail)
+    response = client.get(f"/api/laps/{lap_id}/telemetry", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    monkeypatch.undo()
+
+    # Each channel selection and content coding is a separate representation
+    other = client.get(f"/api/laps/{lap_id}/telemetry?channels=rpm", headers={**headers, "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+    plain = client.get(f"/api/laps/{lap_id}/telemetry", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != etag
+
+
+def test_lap_telemetry_zstd(client, test_user, rf2_csv):
+    import zstandard
+
+    headers = {"Authorization": f"Bearer {test_user['token']}", "Accept-Encoding": "zstd, gzip"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=40))["laps"][0]["id"]
+
+    with client.stream("GET", f"/api/laps/{lap_id}/telemetry", headers=headers) as response:
+        assert response.headers["content-encoding"] == "zstd"
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(response.read())
+    assert len(json.loads(body)) == 40
+
+
+def test_small_telemetry_is_not_compressed(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}", "Accept-Encoding": "zstd, gzip"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv(samples=3))["laps"][0]["id"]
+
+    response = client.get(f"/api/laps/{lap_id}/telemetry?channels=rpm", headers=headers)
+    assert len(response.content) < 1024
+    assert "content-encoding" not in response.headers
+    assert len(response.json()) == 3
+
+    etag = response.headers["etag"]
+    cached = client.get(f"/api/laps/{lap_id}/telemetry?channels=rpm", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_get_lap_conditional_get(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    lap_id = upload_laps(client, test_user["token"], rf2_csv())["laps"][0]["id"]
+
+    response = client.get(f"/api/laps/{lap_id}", headers=headers)
+    assert response.json()["id"] == lap_id
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = client.get(f"/api/laps/{lap_id}", headers={**headers, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+def test_batch_lap_telemetry_get(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=6, seed=1), rf2_csv(samples=4, seed=2))
+    first, second = (lap["id"] for lap in data["laps"])
+    url = f"/api/laps/telemetry:batch?lap_ids={first},{second}&channels=speed_kmh,rpm"
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert list(response.json()["laps"][str(first)][0]) == ["speed_kmh", "rpm"]
+    assert len(response.json()["laps"][str(second)]) == 4
+    assert (
+        response.json()
+        == client.post(
+            "/api/laps/telemetry:batch",
+            headers=headers,
+            json={"lap_ids": [first, second], "channels": ["speed_kmh", "rpm"]},
+        ).json()
+    )
+
+    response = client.get(url, headers={**headers, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    assert client.get("/api/laps/telemetry:batch?lap_ids=1,x", headers=headers).status_code == 400
+
+
+def test_upload_resolves_entities_in_bulk(client, test_user, rf2_csv, monkeypatch):
+    from sqlalchemy import event
+
+    from app.core.config import settings
+    from tests.conftest import async_engine
+
+    engine = async_engine.sync_engine
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 1)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    contents = [
+        rf2_csv(driver_name=driver, lap_number=i, seed=i)
+        for i, driver in enumerate(["Driver A", "Driver B", "Driver A", "Driver B", "Driver A"])
+    ]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        data = upload_laps(client, test_user["token"], *contents)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert data["uploaded"] == 5
+    assert sorted(data["created_drivers"]) == ["Driver A", "Driver B"]
+    assert data["created_tracks"] == ["Test Track"]
+    assert len({lap["session_id"] for lap in data["laps"]}) == 2
+    assert [lap["lap_number"] for lap in data["laps"]] == [0, 1, 2, 3, 4]
+
+    def count(prefix: str) -> int:
+        return sum(statement.startswith(prefix) for statement in statements)
+
+    assert count("INSERT INTO laps") == 1
+    assert count("INSERT INTO drivers") == 1
+    assert count("SELECT drivers.name") == 1
+
+    # Entities that exist are reused, not reported as created
+    again = upload_laps(client, test_user["token"], rf2_csv(driver_name="Driver A", seed=99))
+    assert again["created_drivers"] == [] and again["created_tracks"] == [] and again["created_karts"] == []
+    assert again["laps"][0]["driver_id"] == data["laps"][0]["driver_id"]
+
+
+def test_check_hashes(client, test_user, rf2_csv):
+    import hashlib
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    imported, new = rf2_csv(samples=10, seed=1), rf2_csv(samples=10, seed=2)
+    upload_laps(client, test_user["token"], imported)
+    imported_hash = hashlib.sha256(imported.encode()).hexdigest()
+    new_hash = hashlib.sha256(new.encode()).hexdigest()
+
+    response = client.post(
+        "/api/laps/check-hashes", headers=headers, json={"hashes": [new_hash, imported_hash.upper(), new_hash]}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"existing": [imported_hash], "missing": [new_hash]}
+    bad = client.post("/api/laps/check-hashes", headers=headers, json={"hashes": ["not-a-digest"]})
+    assert bad.status_code == 422
+
+    # Another team has not imported the file
+    client.post(
+        "/api/auth/register",
+        json={"email": "other@example.com", "password": "testpass123", "full_name": "Other", "team_name": "Other"},
+    )
+    token = client.post("/api/auth/login", json={"email": "other@example.com", "password": "testpass123"})
+    other_headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+    response = client.post("/api/laps/check-hashes", headers=other_headers, json={"hashes": [imported_hash]})
+    assert response.json() == {"existing": [], "missing": [imported_hash]}
+    assert upload_laps(client, token.json()["access_token"], imported)["uploaded"] == 1
+
+
+def test_upload_skips_duplicates_within_batch(client, test_user, rf2_csv):
+    content = rf2_csv(samples=10)
+
+    data = upload_laps(client, test_user["token"], content, content)
+
+    assert data["uploaded"] == 1
+    assert data["errors"] == ["lap1.csv: Duplicate file (already imported)"]
+
+
+def test_upload_skips_file_imported_concurrently(client, db, test_user, rf2_csv, monkeypatch):
+    from app.services import lap_import
+
+    content = rf2_csv(samples=10)
+    upload_laps(client, test_user["token"], content)
+    # Another upload of the same file that checked for duplicates before the first one committed
+    monkeypatch.setattr(lap_import, "lap_exists", lambda db, team_id, file_hash: False)
+
+    data = upload_laps(client, test_user["token"], content)
+
+    assert data["uploaded"] == 0
+    assert data["errors"] == ["lap0.csv: Duplicate file (already imported)"]
+    assert db.query(Lap).count() == 1
+
+
+def test_list_laps_keyset_pages(client, db, test_user):
+    from datetime import datetime
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    recorded = [None, datetime(2025, 6, 2), datetime(2025, 6, 1), datetime(2025, 6, 1), None, datetime(2025, 6, 3)]
+    for i, recorded_at in enumerate(recorded):
+        db.add(
+            Lap(
+                team_id=test_user["user"]["team_id"],
+                original_filename=f"lap{i}.csv",
+                file_path=f"/tmp/lap{i}.csv",
+                driver_name="Driver",
+                track_name="Track",
+                car_name="Kart",
+                lap_number=i,
+                lap_time_ms=50000 + (i % 2) * 1000,
+                recorded_at=recorded_at,
+            )
+        )
+    db.commit()
+
+    everything = client.get("/api/laps/", headers=headers)
+    assert "x-next-cursor" not in everything.headers
+    # NULL recorded_at first, then newest first, ties by lap time and id
+    assert [lap["lap_number"] for lap in everything.json()] == [0, 4, 5, 1, 2, 3]
+
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/laps/", headers=headers, params={"limit": 2, "cursor": cursor})
+        assert response.status_code == 200
+        pages.append([lap["lap_number"] for lap in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert pages == [[0, 4], [5, 1], [2, 3]]
+
+    assert client.get("/api/laps/", headers=headers, params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/api/laps/", headers=headers, params={"limit": 10_000}).status_code == 422
+
+
+def test_list_laps_filters_and_order(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    data = upload_laps(
+        client,
+        test_user["token"],
+        rf2_csv(lap_number=2, lap_time_s=51.0, seed=1),
+        rf2_csv(lap_number=1, lap_time_s=53.0, seed=2),
+        rf2_csv(lap_number=3, lap_time_s=52.0, seed=3),
+        rf2_csv(lap_number=1, lap_time_s=50.0, seed=4, session_date="2025-06-02 10:00:00"),
+    )
+    session_id = data["laps"][0]["session_id"]
+
+    def lap_numbers(**params):
+        response = client.get("/api/laps/", headers=headers, params=params)
+        assert response.status_code == 200
+        return [lap["lap_number"] for lap in response.json()]
+
+    assert lap_numbers(session_id=session_id, order="lap_number") == [1, 2, 3]
+    assert lap_numbers(session_id=session_id, order="lap_time") == [2, 3, 1]
+    assert lap_numbers(order="lap_time", min_lap_time_ms=51000, max_lap_time_ms=52000) == [2, 3]
+    assert lap_numbers(driver_id=data["laps"][0]["driver_id"], kart_id=data["laps"][0]["kart_id"]) == [1, 2, 3, 1]
+    assert client.get("/api/laps/", headers=headers, params={"order": "random"}).status_code == 422
+    response = client.get("/api/laps/", headers=headers, params={"min_lap_time_ms": 2, "max_lap_time_ms": 1})
+    assert response.status_code == 400
+
+
+def test_upload_keeps_file_work_off_the_event_loop(client, test_user, rf2_csv, monkeypatch):
+    import asyncio
+
+    from app.core.config import settings
+    from app.services import ingest, lap_import
+
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 1)
+    on_loop = {"ingest": [], "db": []}
+    ingest_file, run_db = ingest.ingest_file, lap_import.AsyncLapImporter._run_db
+
+    def recording_ingest(*args, **kwargs):
+        on_loop["ingest"].append(asyncio._get_running_loop() is not None)
+        return ingest_file(*args, **kwargs)
+
+    def recording_run_db(self, work):
+        def wrapped(db):
+            on_loop["db"].append(asyncio._get_running_loop() is not None)
+            return work(db)
+
+        return run_db(self, wrapped)
+
+    monkeypatch.setattr(ingest, "ingest_file", recording_ingest)
+    monkeypatch.setattr(lap_import.AsyncLapImporter, "_run_db", recording_run_db)
+
+    data = upload_laps(client, test_user["token"], rf2_csv(samples=10, seed=1), rf2_csv(samples=10, seed=2))
+
+    assert data["uploaded"] == 2
+    assert on_loop["ingest"] == [False, False]
+    # Duplicate checks and the final write run on the loop, through the async session
+    assert on_loop["db"] and all(on_loop["db"])
+
+
+def test_import_karts_leave_team_karts_alone(client, test_user, rf2_csv):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    kart = {"chassis_brand": "OK Senior", "team_id": test_user["user"]["team_id"]}
+    owned = [
+        client.post("/api/equipment/karts", headers=headers, json={**kart, "chassis_serial": serial}) for serial in "AB"
+    ]
+    assert [response.status_code for response in owned] == [201, 201]
+
+    data = upload_laps(client, test_user["token"], rf2_csv(seed=1))
+    assert data["created_karts"] == ["OK Senior"]
+    kart_id = data["laps"][0]["kart_id"]
+    assert kart_id not in {response.json()["id"] for response in owned}
+
+    # Later imports of the same car reuse the kart the first import created
+    again = upload_laps(client, test_user["token"], rf2_csv(seed=2))
+    assert again["created_karts"] == []
+    assert again["laps"][0]["kart_id"] == kart_id
@@ -0,0 +1,304 @@
+import hashlib
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services import ingest, telemetry_cache
+from app.services.parsers import (
+    STANDARD_CHANNELS,
+    ParserRegistry,
+    ParserSpec,
+    TelemetryDataPoint,
+    TelemetryFrame,
+)
+from app.services.parsers.rf2_parser import RF2Parser
+
+
+def test_rf2_read_frame_columns(tmp_path, rf2_csv):
+    path = tmp_path / "lap.csv"
+    path.write_text(rf2_csv(samples=40))
+
+    frame = RF2Parser().read_frame(path)
+
+    assert len(frame) == 40
+    assert frame.channel_names[: len(STANDARD_CHANNELS)] == list(STANDARD_CHANNELS)
+    # Every other header column is kept under its header name
+    assert len(frame.channel_names) == 113
+    assert "Channel40" in frame and "Channel5" not in frame
+    assert all(values.dtype == np.float64 for values in frame.channels.values())
+    assert frame["distance_m"][1] == 1.5
+    assert frame["time_s"][2] == 0.1
+
+
+def test_rf2_stream_telemetry_matches_frame(tmp_path, rf2_csv):
+    path = tmp_path / "lap.csv"
+    path.write_text(rf2_csv(samples=10))
+    parser = RF2Parser()
+
+    points = list(parser.stream_telemetry(path))
+    frame = parser.read_frame(path)
+
+    assert len(points) == 10
+    assert isinstance(points[0].gear, int)
+    assert [p.speed_kmh for p in points] == frame["speed_kmh"].tolist()
+    assert [p.g_lat for p in points] == frame["g_lat"].tolist()
+
+
+def test_rf2_read_frame_skips_bad_rows(tmp_path, rf2_csv):
+    content = rf2_csv(samples=2, columns=30)
+    content += "short,row\n"
+    content += "9,0,oops,0,0,50,8000,90,0,3,0,4\n"  # non-numeric time
+    content += "12,0,0.6,0,0,55,,90,0,3,0,4.0\n"  # empty rpm, no g-forces
+    path = tmp_path / "lap.csv"
+    path.write_text(content)
+
+    points = list(RF2Parser().stream_telemetry(path))
+
+    assert len(points) == 3
+    assert points[-1] == TelemetryDataPoint(
+        distance_m=12.0,
+        time_s=0.6,
+        speed_kmh=55.0,
+        throttle_pct=90.0,
+        brake_pct=0.0,
+        steering_pct=3.0,
+        gear=4,
+        rpm=0.0,
+        g_lat=None,
+        g_long=None,
+    )
+
+
+def test_rf2_read_frame_row_widths(tmp_path, rf2_csv):
+    content = rf2_csv(samples=2, columns=30)
+    content += "7,0,0.3,0,0,52,8000,90,0,3,0\n"  # 11 columns: never a sample
+    content += "8,0,0.4,0,0,53,8100,90,0,3,0,5\n"  # 12 columns: kept, g-forces missing
+    content += "9,0,0.5,0,0,54,8200,90,0,3,0,5" + ",1" * 30 + "\n"  # wider than the header: kept
+    path = tmp_path / "lap.csv"
+    path.write_text(content)
+
+    frame = RF2Parser().read_frame(path)
+
+    assert frame["distance_m"].tolist() == [0.0, 1.5, 8.0, 9.0]
+    assert np.isnan(frame["g_lat"][2]) and frame["g_lat"][3] == 1.0
+    assert np.isnan(frame["Channel20"][2])
+
+    # A single-pass stream cannot fall back to the per-row decode
+    with open(path, "rb") as f, pytest.raises(ValueError):
+        RF2Parser().read_frame_stream(io.BufferedReader(_OneWay(f)))
+
+
+class _OneWay(io.RawIOBase):
+    def __init__(self, f):
+        self.f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.f.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def test_frame_from_points_round_trip():
+    points = [
+        TelemetryDataPoint(1.0, 0.1, 50.0, 90.0, 0.0, 3.0, 4, 8000.0, 0.5, None),
+        TelemetryDataPoint(2.0, 0.2, 51.0, 91.0, 0.0, 3.0, 5, 8100.0, None, -0.2),
+    ]
+
+    frame = TelemetryFrame.from_points(points)
+
+    assert len(frame) == 2
+    assert list(frame.iter_points()) == points
+    assert len(frame.select(["speed_kmh"]).channels) == 1
+
+
+def test_rf2_read_frame_decodes_only_requested_columns(tmp_path, rf2_csv, monkeypatch):
+    path = tmp_path / "lap.csv"
+    path.write_text(rf2_csv(samples=20))
+    parser = RF2Parser()
+    full = parser.read_frame(path)
+
+    decoded = []
+    read_samples = RF2Parser._read_samples
+
+    def spy(stream, width, columns):
+        decoded.append(columns)
+        return read_samples(stream, width, columns)
+
+    monkeypatch.setattr(RF2Parser, "_read_samples", staticmethod(spy))
+    frame = parser.read_frame(path, ["speed_kmh", "Channel40"])
+
+    assert frame.channel_names == ["speed_kmh", "Channel40"]
+    np.testing.assert_array_equal(frame["Channel40"], full["Channel40"])
+    # The standard columns decide which rows are samples, so they are always decoded
+    assert decoded == [[0, 2, 5, 6, 7, 8, 9, 11, 25, 26, 40]]
+
+    decoded.clear()
+    list(parser.stream_telemetry(path))
+    assert decoded == [[0, 2, 5, 6, 7, 8, 9, 11, 25, 26]]
+
+
+def test_rf2_read_frame_header_only(tmp_path, rf2_csv):
+    path = Path(tmp_path / "lap.csv")
+    path.write_text(rf2_csv(samples=0))
+
+    assert len(RF2Parser().read_frame(path)) == 0
+
+
+def test_frame_cache_round_trip(tmp_path, rf2_csv):
+    path = tmp_path / "lap.csv"
+    path.write_text(rf2_csv(samples=25))
+    frame = RF2Parser().read_frame(path)
+    sidecar = telemetry_cache.sidecar_path(path, "abc123")
+
+    telemetry_cache.write_frame(sidecar, frame, "abc123")
+    cached = telemetry_cache.read_frame(sidecar, "abc123")
+
+    assert cached is not None
+    assert cached.channel_names == frame.channel_names
+    for name in frame.channel_names:
+        np.testing.assert_array_equal(cached[name], frame[name])
+    assert telemetry_cache.read_frame(sidecar, "other-hash") is None
+    assert telemetry_cache.read_frame(tmp_path / "missing.frame") is None
+
+
+def test_ingest_file_single_pass(tmp_path, rf2_csv):
+    content = rf2_csv(samples=30).encode()
+    dest = tmp_path / "lap.csv"
+
+    result = ingest.ingest_file(io.BytesIO(content), dest)
+
+    assert dest.read_bytes() == content
+    assert result.size == len(content)
+    assert result.file_hash == hashlib.sha256(content).hexdigest()
+    assert result.parsed is not None
+    assert result.parsed.metadata.driver_name == "Test Driver"
+    cached = telemetry_cache.read_frame(telemetry_cache.sidecar_path(dest, result.file_hash), result.file_hash)
+    assert cached is not None
+    assert len(cached) == 30
+
+
+def test_ingest_file_decodes_in_bounded_batches(tmp_path, rf2_csv, monkeypatch):
+    from app.services.parsers import rf2_parser
+
+    lines = rf2_csv(samples=3000).splitlines(keepends=True)
+    # Rows the Arrow reader rejects, so their batch takes the per-row decode
+    lines.insert(1500, "short,row\n")
+    lines.insert(2500, "9,0,oops,0,0,50,8000,90,0,3,0,4\n")
+    content = "".join(lines).encode()
+    dest = tmp_path / "lap.csv"
+
+    batches = []
+    append = telemetry_cache.FrameWriter.append
+
+    def record(self, frame):
+        batches.append(len(frame))
+        append(self, frame)
+
+    def whole_file(*args, **kwargs):
+        raise AssertionError("ingest decoded the whole file at once")
+
+    monkeypatch.setattr(rf2_parser, "BATCH_BYTES", 16 * 1024)
+    monkeypatch.setattr(telemetry_cache.FrameWriter, "append", record)
+    monkeypatch.setattr(RF2Parser, "read_frame_stream", whole_file)
+    result = ingest.ingest_file(io.BufferedReader(_OneWay(io.BytesIO(content))), dest)
+    monkeypatch.undo()
+
+    # Each batch holds about 16 kB of sample text, whatever the file size
+    row_bytes = len(lines[-1])
+    assert len(batches) > 100
+    assert max(batches) <= 2 * 16 * 1024 // row_bytes
+    assert sum(batches) == 3000
+
+    cached = telemetry_cache.read_frame(telemetry_cache.sidecar_path(dest, result.file_hash), result.file_hash)
+    frame = RF2Parser().read_frame(dest, STANDARD_CHANNELS)
+    assert cached.channel_names == list(STANDARD_CHANNELS)
+    for name in frame.channel_names:
+        assert np.array_equal(cached[name], frame[name], equal_nan=True)
+    assert list(telemetry_cache.sidecar_dir(dest).iterdir()) == [telemetry_cache.sidecar_path(dest, result.file_hash)]
+
+
+def test_ingest_file_non_numeric_samples(tmp_path, rf2_csv):
+    content = (rf2_csv(samples=3, columns=30) + "9,0,oops,0,0,50,8000,90,0,3,0,4\n").encode()
+    dest = tmp_path / "lap.csv"
+
+    result = ingest.ingest_file(io.BytesIO(content), dest)
+
+    assert dest.read_bytes() == content
+    cached = telemetry_cache.read_frame(telemetry_cache.sidecar_path(dest, result.file_hash))
+    assert cached is not None
+    assert len(cached) == 3
+
+
+def test_ingest_file_enforces_max_size(tmp_path, rf2_csv):
+    content = rf2_csv(samples=2000).encode()
+    dest = tmp_path / "lap.csv"
+
+    with pytest.raises(ingest.UploadTooLargeError):
+        ingest.ingest_file(io.BytesIO(content), dest, max_size=len(content) // 2)
+    assert not dest.exists()
+
+    with pytest.raises(ingest.UploadTooLargeError):
+        ingest.store_file(io.BytesIO(content), dest, max_size=len(content) - 1)
+    assert not dest.exists()
+
+    assert ingest.store_file(io.BytesIO(content), dest, max_size=len(content)) == (
+        len(content),
+        hashlib.sha256(content).hexdigest(),
+    )
+
+
+class FakeParser(RF2Parser):
+    """RF2 clone under another name that records header checks"""
+
+    header_checks = 0
+
+    @property
+    def format_name(self) -> str:
+        return "FAKE"
+
+    def can_parse_header(self, header: bytes) -> bool:
+        FakeParser.header_checks += 1
+        return header.startswith(b"FAKE")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Isolated parser registry state"""
+    monkeypatch.setattr(ParserRegistry, "_specs", dict(ParserRegistry._specs))
+    monkeypatch.setattr(ParserRegistry, "_parsers", dict(ParserRegistry._parsers))
+    monkeypatch.setattr(ParserRegistry, "_magic_index", None)
+    FakeParser.header_checks = 0
+    return ParserRegistry
+
+
+def test_registry_dispatches_by_magic_bytes(tmp_path, rf2_csv, registry):
+    registry.register_spec(ParserSpec("FAKE", "tests.test_parsers:FakeParser", magic=(b"FAKE",), extensions=(".csv",)))
+    path = tmp_path / "lap.csv"
+    path.write_text(rf2_csv(samples=5))
+
+    assert registry.candidates(b"player,v8,Driver", ".csv") == ["RF2"]
+    assert registry.candidates(b"FAKE\n", ".csv") == ["FAKE"]
+    assert registry.detect_parser(path).format_name == "RF2"
+    assert FakeParser.header_checks == 0
+    assert registry.detect_header(b"unknown,format\n", ".csv") is None
+
+
+def test_registry_loads_entry_point_parsers_lazily(registry, monkeypatch):
+    class EntryPoint:
+        name = "fake"
+
+        def load(self):
+            return ParserSpec("FAKE", "tests.test_parsers:FakeParser", magic=(b"FAKE",))
+
+    monkeypatch.setattr("app.services.parsers.entry_points", lambda group: [EntryPoint()])
+    monkeypatch.setattr(ParserRegistry, "_entry_points_loaded", False)
+
+    assert "FAKE" in registry.available_formats()
+    assert "FAKE" not in registry._parsers
+    assert isinstance(registry.get_parser("FAKE"), FakeParser)
+    assert registry.detect_header(b"FAKE,header").format_name == "FAKE"
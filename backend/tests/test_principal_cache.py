@@ -0,0 +1,110 @@
+import redis
+from sqlalchemy import event
+
+from app.services.ingest_queue import InMemoryRedis
+from app.services.principal_cache import PrincipalCache
+from tests.conftest import async_engine
+
+FIELDS = {"id": 1, "email": "a@example.com", "full_name": "A", "role": "admin", "team_id": 7}
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, name):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+    def set(self, name, value, ex=None):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+    def delete(self, *names):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+
+def count_user_queries(statements):
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    return record
+
+
+def test_authenticated_requests_query_users_once(client, test_user, isolated_principal_cache):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    statements = []
+    record = count_user_queries(statements)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        responses = [client.get("/api/auth/me", headers=headers) for _ in range(3)]
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert all(response.json() == responses[0].json() for response in responses)
+    assert responses[0].json()["email"] == "test@example.com"
+    assert responses[0].json()["full_name"] == "Test User"
+    assert isolated_principal_cache.stats()["hits"] == 2
+
+
+def test_redis_tier_is_shared(client, test_user, isolated_principal_cache):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    isolated_principal_cache.clear()  # Memory tier gone, e.g. another worker
+    response = client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "admin"
+    assert isolated_principal_cache.stats()["redis_hits"] == 1
+
+
+def test_team_delete_invalidates_members(client, test_user, isolated_principal_cache):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    team_id = client.get("/api/auth/me", headers=headers).json()["team_id"]
+    assert team_id is not None
+
+    assert isolated_principal_cache.get_local("test@example.com")["team_id"] == team_id
+
+    assert client.delete(f"/api/teams/{team_id}", headers=headers).status_code == 204
+    assert isolated_principal_cache.get_local("test@example.com") is None
+
+
+def test_memory_entries_expire():
+    cache = PrincipalCache(ttl=30, max_entries=2)
+    cache.put("a@example.com", FIELDS)
+    assert cache.get("a@example.com") == FIELDS
+
+    cache._entries["a@example.com"] = (0.0, FIELDS)
+    assert cache.get_local("a@example.com") is None
+    assert cache.stats()["entries"] == 0
+
+    for i in range(3):
+        cache.put(f"{i}@example.com", FIELDS)
+    assert cache.get_local("0@example.com") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_drops_both_tiers():
+    cache = PrincipalCache(ttl=30, max_entries=10, redis_client=InMemoryRedis())
+    cache.put("a@example.com", FIELDS)
+    cache.invalidate(["a@example.com"])
+
+    assert cache.get("a@example.com") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_redis_failure_fails_open_and_pauses():
+    broken = BrokenRedis()
+    cache = PrincipalCache(ttl=30, max_entries=10, redis_client=broken)
+
+    assert cache.get("a@example.com") is None
+    cache.put("a@example.com", FIELDS)
+    cache.invalidate(["a@example.com"])
+    assert cache.get("a@example.com") is None
+
+    # One failed call, then Redis is skipped until the retry pause ends
+    assert broken.calls == 1
+    assert cache.stats()["redis_errors"] == 1
@@ -172,3 +172,205 @@ def test_get_session_analysis(client, test_user):
     data = response.json()
     assert data["best_lap_time_ms"] == 44000
     assert data["improvement_trend"] == "improving"
+
+
+def test_upload_telemetry_too_large(client, test_user, monkeypatch):
+    from app.core.config import settings
+
+    track_id = client.post(
+        "/api/tracks/", headers={"Authorization": f"Bearer {test_user['token']}"}, json={"name": "Track 1"}
+    ).json()["id"]
+    driver_id = client.post(
+        "/api/drivers/",
+        headers={"Authorization": f"Bearer {test_user['token']}"},
+        json={"name": "Driver 1", "team_id": test_user["user"]["team_id"]},
+    ).json()["id"]
+    session_id = client.post(
+        "/api/sessions/",
+        headers={"Authorization": f"Bearer {test_user['token']}"},
+        json={
+            "team_id": test_user["user"]["team_id"],
+            "driver_id": driver_id,
+            "track_id": track_id,
+            "session_date": datetime.now().isoformat(),
+        },
+    ).json()["id"]
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 16)
+    files = {"file": ("telemetry.csv", io.BytesIO(b"lap,lap_time_ms\n1,45000\n2,44500\n"), "text/csv")}
+    response = client.post(
+        f"/api/sessions/{session_id}/upload-telemetry",
+        headers={"Authorization": f"Bearer {test_user['token']}"},
+        files=files,
+    )
+
+    assert response.status_code == 413
+
+
+def test_session_analysis_is_stored(client, db, test_user, monkeypatch):
+    from app.models.session import TelemetryData
+    from app.services.telemetry_analyzer import TelemetryAnalyzer
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    track_id = client.post("/api/tracks/", headers=headers, json={"name": "Track 1"}).json()["id"]
+    driver_id = client.post(
+        "/api/drivers/", headers=headers, json={"name": "Driver 1", "team_id": test_user["user"]["team_id"]}
+    ).json()["id"]
+    session_id = client.post(
+        "/api/sessions/",
+        headers=headers,
+        json={
+            "team_id": test_user["user"]["team_id"],
+            "driver_id": driver_id,
+            "track_id": track_id,
+            "session_date": datetime.now().isoformat(),
+        },
+    ).json()["id"]
+
+    # Unrecognized formats get mock numbers, which must not change between reads
+    files = {"file": ("telemetry.bin", io.BytesIO(b"\x00\x01"), "application/octet-stream")}
+    uploaded = client.post(f"/api/sessions/{session_id}/upload-telemetry", headers=headers, files=files).json()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("telemetry was analyzed again")
+
+    monkeypatch.setattr(TelemetryAnalyzer, "analyze_file", fail)
+    assert client.get(f"/api/sessions/{session_id}/analysis", headers=headers).json() == uploaded
+    assert client.get(f"/api/sessions/{session_id}/analysis", headers=headers).json() == uploaded
+    monkeypatch.undo()
+
+    # New telemetry replaces the stored analysis
+    files = {"file": ("telemetry.csv", io.BytesIO(b"lap,lap_time_ms\n1,45000\n2,44000\n"), "text/csv")}
+    client.post(f"/api/sessions/{session_id}/upload-telemetry", headers=headers, files=files)
+    assert client.get(f"/api/sessions/{session_id}/analysis", headers=headers).json()["best_lap_time_ms"] == 44000
+    assert db.query(TelemetryData).filter(TelemetryData.session_id == session_id).count() == 1
+
+    # Analyses from another analyzer version are recomputed on read
+    monkeypatch.setattr(TelemetryAnalyzer, "VERSION", TelemetryAnalyzer.VERSION + 1)
+    assert client.get(f"/api/sessions/{session_id}/analysis", headers=headers).json()["best_lap_time_ms"] == 44000
+    db.expire_all()
+    stored = db.query(TelemetryData).filter(TelemetryData.session_id == session_id).one()
+    assert stored.parsed_data["analyzer_version"] == TelemetryAnalyzer.VERSION
+
+    assert client.delete(f"/api/sessions/{session_id}", headers=headers).status_code == 204
+    assert db.query(TelemetryData).count() == 0
+
+
+def test_session_lap_totals_are_incremental(client, db, test_user, rf2_csv):
+    from app.models.session import Session as RacingSession
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    files = [
+        ("files", (f"lap{i}.csv", io.BytesIO(content.encode()), "text/csv"))
+        for i, content in enumerate(
+            [
+                rf2_csv(lap_time_s=52.0, seed=1),
+                rf2_csv(lap_time_s=51.0, seed=2),
+                rf2_csv(lap_time_s=50.0, valid=False, seed=3),
+            ]
+        )
+    ]
+    laps = client.post("/api/laps/upload", headers=headers, files=files).json()["laps"]
+    session_id = laps[0]["session_id"]
+    assert {lap["session_id"] for lap in laps} == {session_id}
+
+    def session_stats():
+        data = client.get(f"/api/sessions/{session_id}", headers=headers).json()
+        return data["total_laps"], data["best_lap_time_ms"], data["average_lap_time_ms"]
+
+    assert session_stats() == (3, 51000, 51500)
+
+    # Another batch adds to the running totals
+    more = [("files", ("lap3.csv", io.BytesIO(rf2_csv(lap_time_s=53.0, seed=4).encode()), "text/csv"))]
+    client.post("/api/laps/upload", headers=headers, files=more)
+    assert session_stats() == (4, 51000, 52000)
+
+    # Deleting the best lap falls back to the next best valid lap
+    assert client.delete(f"/api/laps/{laps[1]['id']}", headers=headers).status_code == 204
+    assert session_stats() == (3, 52000, 52500)
+    assert client.delete(f"/api/laps/{laps[2]['id']}", headers=headers).status_code == 204
+    assert session_stats() == (2, 52000, 52500)
+
+    # Repair rebuilds the totals from the laps
+    db.query(RacingSession).filter(RacingSession.id == session_id).update(
+        {"total_laps": 99, "valid_lap_count": 0, "valid_lap_time_sum_ms": 0, "best_lap_time_ms": None}
+    )
+    db.commit()
+    response = client.post("/api/sessions/recompute-stats", headers=headers, params={"session_id": session_id})
+    assert response.json() == {"updated": 1}
+    assert session_stats() == (2, 52000, 52500)
+    assert (
+        client.post("/api/sessions/recompute-stats", headers=headers, params={"session_id": 12345}).status_code == 404
+    )
+
+
+def test_session_totals_come_from_laps_only(client, db, test_user, rf2_csv):
+    from app.models.lap import Lap
+    from app.models.session import Session as RacingSession
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    files = [
+        ("files", (f"lap{i}.csv", io.BytesIO(rf2_csv(lap_time_s=50.0 + i, seed=i).encode()), "text/csv"))
+        for i in range(2)
+    ]
+    laps = client.post("/api/laps/upload", headers=headers, files=files).json()["laps"]
+    session_id = laps[0]["session_id"]
+
+    def totals():
+        db.expire_all()
+        session = db.get(RacingSession, session_id)
+        return (
+            session.total_laps,
+            session.valid_lap_count,
+            session.valid_lap_time_sum_ms,
+            session.best_lap_time_ms,
+            session.average_lap_time_ms,
+        )
+
+    # Session telemetry files (here one of unknown format, analysed with mock data) leave the lap totals alone
+    assert totals() == (2, 2, 101000, 50000, 50500)
+    for content in ("lap,lap_time_ms\n1,45000\n2,44000\n3,46000\n", "not,telemetry\n"):
+        files = {"file": ("telemetry.csv", io.BytesIO(content.encode()), "text/csv")}
+        response = client.post(f"/api/sessions/{session_id}/upload-telemetry", headers=headers, files=files)
+        assert response.status_code == 200
+        assert totals() == (2, 2, 101000, 50000, 50500)
+    assert client.get(f"/api/sessions/{session_id}/analysis", headers=headers).json()["total_laps"] == 15
+
+    # A lap whose valid flag is NULL counts as invalid when added, removed or recomputed
+    db.query(Lap).filter(Lap.id == laps[0]["id"]).update({"valid": None})
+    db.commit()
+    client.post("/api/sessions/recompute-stats", headers=headers, params={"session_id": session_id})
+    assert totals() == (2, 1, 51000, 51000, 51000)
+    assert client.delete(f"/api/laps/{laps[0]['id']}", headers=headers).status_code == 204
+    assert totals() == (1, 1, 51000, 51000, 51000)
+
+
+def test_list_sessions_keyset_pages(client, test_user):
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    team_id = test_user["user"]["team_id"]
+    track_id = client.post("/api/tracks/", headers=headers, json={"name": "Track 1"}).json()["id"]
+    driver_id = client.post("/api/drivers/", headers=headers, json={"name": "Driver 1", "team_id": team_id}).json()[
+        "id"
+    ]
+    dates = ["2025-06-01T10:00:00", "2025-06-03T10:00:00", "2025-06-01T10:00:00", "2025-06-02T10:00:00"]
+    ids = [
+        client.post(
+            "/api/sessions/",
+            headers=headers,
+            json={"team_id": team_id, "driver_id": driver_id, "track_id": track_id, "session_date": date},
+        ).json()["id"]
+        for date in dates
+    ]
+
+    first = client.get("/api/sessions/", headers=headers, params={"limit": 3})
+    second = client.get(
+        "/api/sessions/", headers=headers, params={"limit": 3, "cursor": first.headers["x-next-cursor"]}
+    )
+
+    # Newest first; sessions on the same date newest id first
+    assert [s["id"] for s in first.json()] == [ids[1], ids[3], ids[2]]
+    assert [s["id"] for s in second.json()] == [ids[0]]
+    assert "x-next-cursor" not in second.headers
+    # A cursor only works for the list it came from
+    response = client.get("/api/laps/", headers=headers, params={"cursor": first.headers["x-next-cursor"]})
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+import statistics
+
+import numpy as np
+import pytest
+
+from app.services import telemetry_analyzer
+from app.services.telemetry_analyzer import LapTimeStats, TelemetryAnalyzer
+
+
+def write_csv(tmp_path, content: str):
+    path = tmp_path / "session.csv"
+    path.write_text(content)
+    return str(path)
+
+
+def test_lap_time_stats_match_statistics_module():
+    lap_times = np.random.default_rng(1).integers(40_000, 50_000, 1001)
+    stats = LapTimeStats()
+    for chunk in np.array_split(lap_times, 7):
+        stats.update(chunk)
+
+    assert stats.count == 1001
+    assert stats.best == lap_times.min()
+    assert stats.total == lap_times.sum()
+    assert stats.stdev == pytest.approx(statistics.stdev(lap_times.tolist()))
+
+
+@pytest.mark.parametrize("chunk_rows", [2, 1_000_000])
+def test_analyze_csv_in_chunks(tmp_path, monkeypatch, chunk_rows):
+    monkeypatch.setattr(telemetry_analyzer, "CSV_CHUNK_ROWS", chunk_rows)
+    # Seconds and milliseconds mixed, plus values that are skipped
+    path = write_csv(
+        tmp_path, "lap,lap_time_ms,note\n1,46.5,a\n2,45000,b\n3,,c\n4,x,d\n5,0,e\n6,44000,f\n7,43999.9,g\n"
+    )
+
+    analysis = TelemetryAnalyzer().analyze_file(path, "session.csv")
+
+    assert analysis["lap_times"] == [46500, 45000, 44000, 43999]
+    assert analysis["best_lap_time_ms"] == 43999
+    assert analysis["average_lap_time_ms"] == (46500 + 45000 + 44000 + 43999) // 4
+    assert analysis["consistency_score"] == round(100 - statistics.stdev(analysis["lap_times"]) / 50, 2)
+    assert analysis["improvement_trend"] == "improving"
+
+
+def test_analyze_csv_prefers_lap_time_column(tmp_path):
+    path = write_csv(tmp_path, "time,lap_time\n1000,50.0\n2000,51.0\n")
+    assert TelemetryAnalyzer().analyze_file(path, "session.csv")["lap_times"] == [50000, 51000]
+
+
+def test_analyze_csv_without_lap_times_is_mocked(tmp_path):
+    path = write_csv(tmp_path, "speed,rpm\n100,8000\n")
+    assert TelemetryAnalyzer().analyze_file(path, "session.csv")["total_laps"] == 15
@@ -0,0 +1,20 @@
+import pytest
+
+from app.services.telemetry_formats import ARROW_STREAM, JSON, MSGPACK, negotiate
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("application/vnd.apache.arrow.stream", ARROW_STREAM),
+        ("application/x-msgpack, application/json;q=0.5", MSGPACK),
+        ("application/json;q=0.9, application/vnd.apache.arrow.stream", ARROW_STREAM),
+        ("application/vnd.msgpack;q=0, application/json", JSON),
+        ("image/png", JSON),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
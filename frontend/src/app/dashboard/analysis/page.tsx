@@ -9,6 +9,9 @@ import { Loader2 } from "lucide-react";
 import { TelemetryCharts, TelemetrySeries } from "@/components/telemetry/TelemetryCharts";
 import { LapConsistency } from "@/components/telemetry/LapConsistency";
 
+// Samples per lap requested for charts; the server downsamples with LTTB
+const CHART_MAX_POINTS = 2000;
+
 const CHART_COLORS = [
     "#3b82f6", // Blue
     "#ef4444", // Red
@@ -58,10 +61,12 @@ function AnalysisContent() {
     useEffect(() => {
         if (!selectedSessionId) return;
 
+        let cancelled = false;
         setLoading(true);
-        lapsApi.getLaps({ session_id: selectedSessionId, valid_only: true })
-            .then(res => {
-                const sorted = res.data.sort((a, b) => a.lap_number - b.lap_number);
+        lapsApi.getAllLaps({ session_id: selectedSessionId, valid_only: true, order: 'lap_number', limit: 500 })
+            .then(sorted => {
+                // Pages of a session that is no longer selected arrive late
+                if (cancelled) return;
                 setLaps(sorted);
                 // Default select fastest lap
                 const best = sorted.reduce((prev, curr) => (prev.lap_time_ms < curr.lap_time_ms ? prev : curr), sorted[0]);
@@ -73,6 +78,9 @@ function AnalysisContent() {
                 setLoading(false);
             })
             .catch(console.error);
+        return () => {
+            cancelled = true;
+        };
     }, [selectedSessionId]);
 
     // Fetch telemetry for selected laps
@@ -83,23 +91,18 @@ function AnalysisContent() {
 
             setLoadingTelemetry(true);
             try {
-                // Fetch in parallel
-                const promises = missingIds.map(id =>
-                    lapsApi.getLapTelemetry(id)
-                        .then(res => ({ id, data: res.data }))
-                        .catch(err => ({ id, data: [] }))
-                );
-
-                const results = await Promise.all(promises);
+                // One round trip for all missing laps
+                const res = await lapsApi.getLapsTelemetryBatch(missingIds, { max_points: CHART_MAX_POINTS });
 
                 setTelemetryCache(prev => {
                     const next = { ...prev };
-                    results.forEach(r => {
-                        // @ts-ignore
-                        next[r.id] = r.data;
+                    missingIds.forEach(id => {
+                        next[id] = res.data.laps[id] || [];
                     });
                     return next;
                 });
+            } catch (err) {
+                console.error(err);
             } finally {
                 setLoadingTelemetry(false);
             }
@@ -3,7 +3,7 @@
 import { useCallback, useState } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { Upload, FileText, CheckCircle, XCircle, Loader2 } from 'lucide-react';
-import api from '@/lib/api';
+import api, { lapsApi } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 
 interface UploadedLap {
@@ -29,6 +29,37 @@ interface UploadResponse {
     created_karts: string[];
 }
 
+// Digests per check-hashes request (the server's limit)
+const HASH_CHECK_BATCH = 1000;
+
+async function sha256Hex(file: File): Promise<string> {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Files the team has not imported yet (and only the first of identical files).
+// Falls back to all files where hashing or the check is unavailable; the server still rejects duplicates.
+async function filterNewFiles(files: File[]): Promise<{ upload: File[]; skipped: number }> {
+    if (typeof crypto === 'undefined' || !crypto.subtle) {
+        return { upload: files, skipped: 0 };
+    }
+    try {
+        const hashes: string[] = [];
+        for (const file of files) {
+            hashes.push(await sha256Hex(file));
+        }
+        const missing = new Set<string>();
+        for (let i = 0; i < hashes.length; i += HASH_CHECK_BATCH) {
+            const response = await lapsApi.checkHashes(hashes.slice(i, i + HASH_CHECK_BATCH));
+            response.data.missing.forEach((hash) => missing.add(hash));
+        }
+        const upload = files.filter((_, i) => missing.delete(hashes[i]));
+        return { upload, skipped: files.length - upload.length };
+    } catch {
+        return { upload: files, skipped: 0 };
+    }
+}
+
 interface TelemetryUploaderProps {
     onUploadComplete?: (response: UploadResponse) => void;
 }
@@ -38,6 +69,7 @@ export default function TelemetryUploader({ onUploadComplete }: TelemetryUploade
     const [uploading, setUploading] = useState(false);
     const [uploadResult, setUploadResult] = useState<UploadResponse | null>(null);
     const [error, setError] = useState<string | null>(null);
+    const [skipped, setSkipped] = useState(0);
 
     const onDrop = useCallback((acceptedFiles: File[]) => {
         setFiles(prev => [...prev, ...acceptedFiles]);
@@ -79,12 +111,25 @@ export default function TelemetryUploader({ onUploadComplete }: TelemetryUploade
         setUploading(true);
         setError(null);
 
-        const formData = new FormData();
-        files.forEach((file) => {
-            formData.append('files', file);
-        });
-
         try {
+            // Hash locally and send only files the team does not have yet
+            const { upload, skipped } = await filterNewFiles(files);
+            setSkipped(skipped);
+            if (upload.length === 0) {
+                const empty: UploadResponse = {
+                    uploaded: 0, laps: [], errors: [], created_drivers: [], created_tracks: [], created_karts: [],
+                };
+                setUploadResult(empty);
+                setFiles([]);
+                onUploadComplete?.(empty);
+                return;
+            }
+
+            const formData = new FormData();
+            upload.forEach((file) => {
+                formData.append('files', file);
+            });
+
             const response = await api.post<UploadResponse>('/api/laps/upload', formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data',
@@ -189,6 +234,11 @@ export default function TelemetryUploader({ onUploadComplete }: TelemetryUploade
                             Successfully uploaded {uploadResult.uploaded} lap{uploadResult.uploaded !== 1 ? 's' : ''}
                         </span>
                     </div>
+                    {skipped > 0 && (
+                        <p className="text-sm text-zinc-400">
+                            Skipped {skipped} file{skipped !== 1 ? 's' : ''} already imported
+                        </p>
+                    )}
 
                     {/* Created entities */}
                     {(uploadResult.created_drivers.length > 0 || uploadResult.created_tracks.length > 0 || uploadResult.created_karts.length > 0) && (
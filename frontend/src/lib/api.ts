@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Lap, TelemetryDataPoint, Session } from '@/types';
+import { Lap, LapTelemetryBatch, TelemetryDataPoint, TelemetryQueryParams, Session } from '@/types';
 
 // Use empty string for production (nginx proxy), localhost:8000 for dev
 // Check for undefined specifically, not falsy, so empty string works
@@ -34,12 +34,36 @@ export const lapsApi = {
         return api.get<Lap[]>("/api/laps", { params });
     },
 
+    async getAllLaps(params?: any) {
+        // Follows X-Next-Cursor until the last page, so no lap beyond a page limit is dropped
+        const laps: Lap[] = [];
+        let cursor: string | undefined;
+        do {
+            const res = await api.get<Lap[]>("/api/laps", { params: { ...params, cursor } });
+            laps.push(...res.data);
+            cursor = res.headers['x-next-cursor'] || undefined;
+        } while (cursor);
+        return laps;
+    },
+
     async getLap(id: number) {
         return api.get<Lap>(`/api/laps/${id}`);
     },
 
-    async getLapTelemetry(id: number) {
-        return api.get<TelemetryDataPoint[]>(`/api/laps/${id}/telemetry`);
+    async getLapTelemetry(id: number, params?: TelemetryQueryParams) {
+        return api.get<TelemetryDataPoint[]>(`/api/laps/${id}/telemetry`, { params });
+    },
+
+    async getLapsTelemetryBatch(lapIds: number[], params?: TelemetryQueryParams) {
+        // GET so the browser can cache the response and revalidate it by ETag
+        return api.get<LapTelemetryBatch>('/api/laps/telemetry:batch', {
+            params: { lap_ids: lapIds.join(','), ...params },
+        });
+    },
+
+    async checkHashes(hashes: string[]) {
+        // SHA-256 hex digests of file contents; answers which ones the team already imported
+        return api.post<{ existing: string[]; missing: string[] }>('/api/laps/check-hashes', { hashes });
     },
 
     async deleteLap(id: number) {
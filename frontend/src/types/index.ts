@@ -106,6 +106,17 @@ export interface TelemetryDataPoint {
     g_long?: number;
 }
 
+export interface TelemetryQueryParams {
+    channels?: string;  // comma-separated channel names
+    max_points?: number;
+    method?: 'lttb' | 'minmax';
+}
+
+export interface LapTelemetryBatch {
+    laps: Record<number, TelemetryDataPoint[]>;
+    errors: Record<number, string>;
+}
+
 export interface Lap {
     id: number;
     team_id: number;
@@ -126,4 +137,5 @@ export interface Lap {
     car_name?: string;
     recorded_at?: string;
     has_detailed_telemetry?: boolean;
+    telemetry_columns?: string[] | null;
 }